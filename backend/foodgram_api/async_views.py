@@ -0,0 +1,140 @@
+from io import BytesIO
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.db import transaction
+from django.http import Http404, HttpResponse
+from django.utils.decorators import classonlymethod
+from django.utils.translation import gettext_lazy as _
+from django.views import View
+from rest_framework import exceptions, status
+from rest_framework.authentication import get_authorization_header
+from rest_framework.parsers import JSONParser
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+
+from foodgram_api.authentication import CachedTokenAuthentication
+
+
+@sync_to_async
+@transaction.atomic
+def delete_atomic(instance):
+    """
+    Удаляет объект в транзакции вместе с изменениями его сигналов.
+    Асинхронный ORM транзакций не поддерживает, поэтому удаление идёт
+    в синхронном потоке.
+    """
+    instance.delete()
+
+
+class AsyncAPIView(View):
+    """
+    Асинхронное представление для частых коротких запросов под ASGI.
+    Это не APIView DRF: тело принимается только в JSON (иначе 415),
+    ответ - только JSON, без согласования формата и HTML-версии API.
+    Токен проверяется, как CachedTokenAuthentication, но через
+    асинхронный ORM; права и ограничение частоты задаются классами DRF
+    в permission_classes и throttle_classes и проверяются явно.
+    """
+    keyword = 'Token'
+    authentication = CachedTokenAuthentication()
+    parser = JSONParser()
+    renderer = JSONRenderer()
+    permission_classes = (IsAuthenticated,)
+    throttle_classes = api_settings.DEFAULT_THROTTLE_CLASSES
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        view.csrf_exempt = True
+        return view
+
+    async def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return AnonymousUser()
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed(
+                _('Invalid token header. No credentials provided.')
+            )
+        try:
+            key = auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed(_(
+                'Invalid token header. '
+                'Token string should not contain invalid characters.'
+            ))
+
+        user, _token = await self.authentication.aauthenticate_credentials(
+            key
+        )
+        return user
+
+    def get_data(self, request):
+        if not request.body:
+            return {}
+        if request.content_type != self.parser.media_type:
+            raise exceptions.UnsupportedMediaType(request.content_type)
+        return self.parser.parse(BytesIO(request.body))
+
+    def check_permissions(self, request):
+        for permission_class in self.permission_classes:
+            permission = permission_class()
+            if permission.has_permission(request, self):
+                continue
+            if not request.user.is_authenticated:
+                raise exceptions.NotAuthenticated()
+            raise exceptions.PermissionDenied(
+                getattr(permission, 'message', None)
+            )
+
+    def check_throttles(self, request):
+        waits = [
+            throttle.wait() for throttle in (
+                throttle_class() for throttle_class in self.throttle_classes
+            ) if not throttle.allow_request(request, self)
+        ]
+        if waits:
+            raise exceptions.Throttled(
+                max((wait for wait in waits if wait is not None), default=None)
+            )
+
+    def render(self, data=None, status=status.HTTP_200_OK):
+        if data is None:
+            return HttpResponse(status=status)
+        return HttpResponse(
+            self.renderer.render(data),
+            status=status,
+            content_type='application/json'
+        )
+
+    def handle_exception(self, exc):
+        if isinstance(exc, Http404):
+            exc = exceptions.NotFound()
+        detail = exc.detail
+        response = self.render(
+            detail if isinstance(detail, (list, dict))
+            else {'detail': detail},
+            status=exc.status_code
+        )
+        if exc.status_code == status.HTTP_401_UNAUTHORIZED:
+            response['WWW-Authenticate'] = self.keyword
+        if getattr(exc, 'wait', None):
+            response['Retry-After'] = str(int(exc.wait))
+        return response
+
+    async def dispatch(self, request, *args, **kwargs):
+        method = request.method.lower()
+        try:
+            if method not in self.http_method_names or not hasattr(
+                self, method
+            ):
+                raise exceptions.MethodNotAllowed(request.method)
+            request.user = await self.authenticate(request)
+            self.check_permissions(request)
+            if self.throttle_classes:
+                await sync_to_async(self.check_throttles)(request)
+            return await getattr(self, method)(request, *args, **kwargs)
+        except (exceptions.APIException, Http404) as exc:
+            return self.handle_exception(exc)
@@ -0,0 +1,153 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from foodgram_api.constants import (AUTH_TOKEN_CACHE_KEY,
+                                    AUTH_TOKEN_CACHE_SIZE,
+                                    AUTH_TOKEN_CACHE_TTL,
+                                    AUTH_TOKEN_LOCAL_TTL)
+
+
+class TokenCache:
+    """
+    Кэш токенов: ограниченный LRU в памяти процесса и, если включён
+    AUTH_TOKEN_SHARED_CACHE, общий кэш Django. Хранятся только id
+    пользователя и время создания токена - без пароля и профиля.
+    Удаление очищает LRU своего процесса и общий кэш, в других процессах
+    запись живёт не дольше AUTH_TOKEN_LOCAL_TTL.
+    """
+    def __init__(self, size=AUTH_TOKEN_CACHE_SIZE):
+        self.size = size
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    @property
+    def shared(self):
+        return getattr(settings, 'AUTH_TOKEN_SHARED_CACHE', False)
+
+    def get_cache_key(self, key):
+        return AUTH_TOKEN_CACHE_KEY.format(
+            hashlib.sha256(key.encode()).hexdigest()
+        )
+
+    def get_local(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set_local(self, key, data):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + AUTH_TOKEN_LOCAL_TTL,
+                                  data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def get(self, key):
+        data = self.get_local(key)
+        if data is None and self.shared:
+            data = cache.get(self.get_cache_key(key))
+            if data is not None:
+                self.set_local(key, data)
+        return data
+
+    async def aget(self, key):
+        data = self.get_local(key)
+        if data is None and self.shared:
+            data = await cache.aget(self.get_cache_key(key))
+            if data is not None:
+                self.set_local(key, data)
+        return data
+
+    def set(self, token):
+        data = (token.user_id, token.created)
+        self.set_local(token.key, data)
+        if self.shared:
+            cache.set(
+                self.get_cache_key(token.key), data, AUTH_TOKEN_CACHE_TTL
+            )
+
+    async def aset(self, token):
+        data = (token.user_id, token.created)
+        self.set_local(token.key, data)
+        if self.shared:
+            await cache.aset(
+                self.get_cache_key(token.key), data, AUTH_TOKEN_CACHE_TTL
+            )
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.shared:
+            cache.delete(self.get_cache_key(key))
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication, который берёт id пользователя из token_cache и
+    обращается к базе только при промахе. При попадании пользователь
+    создаётся только с id: остальные поля загружаются из базы при
+    первом обращении, поэтому save() не запишет устаревших значений.
+    """
+    def check_user(self, token):
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.')
+            )
+        return token.user, token
+
+    def get_cached(self, key, data):
+        user_id, created = data
+        user_model = get_user_model()
+        user = user_model.from_db(
+            user_model.objects.db, ('id',), (user_id,)
+        )
+        token = Token.from_db(
+            Token.objects.db,
+            ('key', 'user_id', 'created'),
+            (key, user_id, created)
+        )
+        token.user = user
+        return user, token
+
+    def authenticate_credentials(self, key):
+        data = token_cache.get(key)
+        if data is not None:
+            return self.get_cached(key, data)
+        try:
+            token = Token.objects.select_related('user').get(key=key)
+        except Token.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+        if token.user.is_active:
+            token_cache.set(token)
+        return self.check_user(token)
+
+    async def aauthenticate_credentials(self, key):
+        data = await token_cache.aget(key)
+        if data is not None:
+            return self.get_cached(key, data)
+        try:
+            token = await Token.objects.select_related('user').aget(key=key)
+        except Token.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+        if token.user.is_active:
+            await token_cache.aset(token)
+        return self.check_user(token)
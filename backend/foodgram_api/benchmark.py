@@ -0,0 +1,358 @@
+import json
+import math
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from django.conf import settings
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+
+from foodgram_api.constants import BENCHMARK_PERCENTILES
+from recipes_app.models import Ingredient, Recipe, Tag
+from users_app.models import User
+
+VARIABLE = re.compile(r'{{(\w+)}}')
+SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+RECIPE_VARIABLES = (
+    'firstRecipeId',
+    'secondRecipeId',
+    'thirdRecipeId',
+    'fourthRecipeId',
+    'fifthRecipeId',
+)
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+def collect_requests(items, requests):
+    """
+    Собирает запросы коллекции Postman по названию. При повторе
+    названия остаётся первый запрос.
+    """
+    for item in items:
+        if 'item' in item:
+            collect_requests(item['item'], requests)
+        else:
+            requests.setdefault(item['name'], item['request'])
+    return requests
+
+
+def get_authorization(request):
+    auth = request.get('auth') or {}
+    if auth.get('type') != 'apikey':
+        return None
+    return {
+        entry['key']: entry['value'] for entry in auth['apikey']
+    }.get('value')
+
+
+def load_scenario(path, scenario):
+    """
+    Возвращает шаги сценария: в шаге один запрос или пара запросов,
+    возвращающая данные в исходное состояние (добавление и удаление).
+    """
+    with open(path, encoding='utf-8') as file:
+        requests = collect_requests(json.load(file)['item'], {})
+
+    steps = []
+    for names in scenario:
+        step = []
+        for name in names:
+            if name not in requests:
+                raise BenchmarkError(f'В коллекции нет запроса «{name}».')
+            request = requests[name]
+            step.append({
+                'name': name,
+                'method': request['method'],
+                'url': request['url']['raw'],
+                'authorization': get_authorization(request),
+                'body': (request.get('body') or {}).get('raw'),
+            })
+        steps.append(step)
+    return steps
+
+
+def get_variables(user, base_url, workers):
+    """
+    Значения переменных коллекции для каждого потока. Рецепты и авторы
+    выбираются не из избранного, списка покупок и подписок пользователя,
+    а у разных потоков по возможности различаются, чтобы пары
+    добавления и удаления не мешали друг другу.
+    """
+    tags = list(Tag.objects.order_by('id')[:3])
+    ingredient = Ingredient.objects.order_by('id').first()
+    recipes = list(Recipe.objects.exclude(
+        users_favorites__user=user
+    ).exclude(
+        shopping_cart__user=user
+    ).order_by('id').values_list('pk', flat=True)[:workers + 4])
+    authors = list(User.objects.exclude(pk=user.pk).exclude(
+        following__user=user
+    ).order_by('id').values_list('pk', flat=True)[:workers + 1])
+    if not (tags and ingredient and recipes and authors):
+        raise BenchmarkError(
+            'Для теста нужны хотя бы один тег, ингредиент, рецепт не из '
+            'избранного и списка покупок пользователя и автор, на которого '
+            'он не подписан.'
+        )
+
+    token, _ = Token.objects.get_or_create(user=user)
+    variables = []
+    for worker in range(workers):
+        values = {
+            'baseUrl': base_url,
+            'userToken': token.key,
+            'userId': user.pk,
+            'thirdUserId': authors[worker % len(authors)],
+            'secondUserId': authors[(worker + 1) % len(authors)],
+            'firstTagId': tags[0].pk,
+            'secondTagSlug': tags[1 % len(tags)].slug,
+            'thirdTagSlug': tags[2 % len(tags)].slug,
+            'firstIndredientId': ingredient.pk,
+            'ingredientNameFirstLatter': ingredient.name[:1],
+        }
+        for offset, name in enumerate(RECIPE_VARIABLES):
+            values[name] = recipes[(worker + offset) % len(recipes)]
+        variables.append(values)
+    return variables, min(len(recipes), len(authors))
+
+
+def substitute(template, variables):
+    if template is None:
+        return None
+
+    def replace(match):
+        try:
+            return str(variables[match.group(1)])
+        except KeyError:
+            raise BenchmarkError(
+                f'Неизвестная переменная коллекции {match.group(0)}.'
+            )
+    return VARIABLE.sub(replace, template)
+
+
+def prepare(step, variables):
+    prepared = []
+    for request in step:
+        headers = {'Content-Type': 'application/json'}
+        authorization = substitute(request['authorization'], variables)
+        if authorization:
+            headers['Authorization'] = authorization
+        prepared.append((
+            request['method'],
+            substitute(request['url'], variables),
+            headers,
+            substitute(request['body'], variables),
+        ))
+    return prepared
+
+
+def get_server_name():
+    for host in settings.ALLOWED_HOSTS:
+        if host != '*':
+            return host.lstrip('.')
+    return 'localhost'
+
+
+class LocalTransport:
+    """
+    Запросы к приложению в этом же процессе через тестовый клиент.
+    SQL-запросы считаются в потоке, с учётом потоковых ответов.
+    """
+    def __init__(self):
+        self.client = Client(
+            SERVER_NAME=get_server_name(), raise_request_exception=False
+        )
+
+    def send(self, method, url, headers, body):
+        extra = {
+            'HTTP_' + name.upper().replace('-', '_'): value
+            for name, value in headers.items() if name != 'Content-Type'
+        }
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.generic(
+                method,
+                url,
+                data=body or '',
+                content_type=headers['Content-Type'],
+                **extra
+            )
+            if response.streaming:
+                b''.join(response.streaming_content)
+        return response.status_code, len(queries)
+
+    def close(self):
+        connection.close()
+
+
+class HttpTransport:
+    """
+    Запросы к запущенному серверу. Число SQL-запросов берётся
+    из заголовка Server-Timing, если сервер его отдаёт.
+    """
+    def send(self, method, url, headers, body):
+        request = Request(
+            url,
+            data=body.encode() if body else None,
+            headers=headers,
+            method=method
+        )
+        try:
+            with urlopen(request) as response:
+                response.read()
+                status, response_headers = response.status, response.headers
+        except HTTPError as error:
+            error.read()
+            status, response_headers = error.code, error.headers
+
+        match = SERVER_TIMING_QUERIES.search(
+            response_headers.get('Server-Timing', '')
+        )
+        return status, int(match.group(1)) if match else None
+
+    def close(self):
+        pass
+
+
+def percentile(sorted_values, percent):
+    """
+    Перцентиль методом ближайшего ранга.
+    """
+    rank = max(math.ceil(percent / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def run_step(step, variables, transport_class, iterations, concurrency,
+             warmup):
+    """
+    Выполняет шаг iterations раз в concurrency потоков и возвращает
+    записи (время, статус, SQL-запросы) по запросам шага и общее время.
+    """
+    prepared = [prepare(step, values) for values in variables]
+    records = {request['name']: [] for request in step}
+    lock = threading.Lock()
+
+    def worker(index, count, record=True):
+        transport = transport_class()
+        try:
+            for _ in range(count):
+                for request, arguments in zip(step, prepared[index]):
+                    start = time.perf_counter()
+                    status, queries = transport.send(*arguments)
+                    elapsed = time.perf_counter() - start
+                    if record:
+                        with lock:
+                            records[request['name']].append(
+                                (elapsed, status, queries)
+                            )
+        finally:
+            transport.close()
+
+    if warmup:
+        worker(0, warmup, record=False)
+
+    shares = [
+        iterations // concurrency + (index < iterations % concurrency)
+        for index in range(concurrency)
+    ]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(worker, range(concurrency), shares))
+    return records, time.perf_counter() - start
+
+
+def summarize(step, records, elapsed):
+    results = []
+    for request in step:
+        rows = records[request['name']]
+        durations = sorted(duration * 1000 for duration, _, _ in rows)
+        queries = [count for _, _, count in rows if count is not None]
+        result = {
+            'name': request['name'],
+            'method': request['method'],
+            'count': len(rows),
+            'errors': sum(status >= 400 for _, status, _ in rows),
+            'rps': len(rows) / elapsed if elapsed else 0.0,
+            'queries': sum(queries) / len(queries) if queries else None,
+        }
+        for percent in BENCHMARK_PERCENTILES:
+            result[f'p{percent}'] = (
+                percentile(durations, percent) if durations else 0.0
+            )
+        results.append(result)
+    return results
+
+
+def run_benchmark(steps, user, base_url=None, iterations=50, concurrency=1,
+                  warmup=0):
+    """
+    Прогоняет сценарий в процессе или, если задан base_url, против
+    сервера. Возвращает сводку по каждому запросу, общее число запросов
+    в секунду и число потоков, у которых есть свои рецепты и авторы.
+    """
+    variables, distinct = get_variables(user, base_url or '', concurrency)
+    transport_class = HttpTransport if base_url else LocalTransport
+
+    results = []
+    total_requests = 0
+    total_time = 0.0
+    for step in steps:
+        records, elapsed = run_step(
+            step, variables, transport_class, iterations, concurrency,
+            warmup
+        )
+        results += summarize(step, records, elapsed)
+        total_requests += sum(len(rows) for rows in records.values())
+        total_time += elapsed
+    return results, total_requests / total_time, distinct
+
+
+def make_baseline(results):
+    return {
+        result['name']: {
+            'p95': result['p95'],
+            'queries': result['queries'],
+            'errors': result['errors'],
+        } for result in results
+    }
+
+
+def compare_with_baseline(results, baseline, tolerance):
+    """
+    Возвращает описания регрессий: p95 выше базового больше чем на
+    tolerance, больше SQL-запросов или ошибок.
+    """
+    regressions = []
+    for result in results:
+        expected = baseline.get(result['name'])
+        if expected is None:
+            continue
+        name = result['name']
+        limit = expected['p95'] * (1 + tolerance)
+        if result['p95'] > limit:
+            regressions.append(
+                f'{name}: p95 {result["p95"]:.1f} мс > {limit:.1f} мс'
+            )
+        if (
+            result['queries'] is not None
+            and expected.get('queries') is not None
+            and result['queries'] > expected['queries']
+        ):
+            regressions.append(
+                f'{name}: SQL-запросов {result["queries"]:.1f}'
+                f' > {expected["queries"]:.1f}'
+            )
+        if result['errors'] > expected.get('errors', 0):
+            regressions.append(
+                f'{name}: ошибок {result["errors"]}'
+                f' > {expected.get("errors", 0)}'
+            )
+    return regressions
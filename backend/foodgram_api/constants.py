@@ -1 +1,38 @@
 PAGE_SIZE = 6
+
+SHOPPING_CART_FILE_NAME = 'Shopping_cart'
+SHOPPING_CART_BUFFER_ROWS = 100
+SHOPPING_CART_CHUNK_SIZE = 2000
+
+AUTH_TOKEN_CACHE_KEY = 'auth_token:{}'
+AUTH_TOKEN_CACHE_SIZE = 1024
+AUTH_TOKEN_CACHE_TTL = 60
+AUTH_TOKEN_LOCAL_TTL = 10
+
+VERSION_LOCAL_TTL = 1
+
+PAGINATION_QUERY_PARAM = 'pagination'
+CURSOR_PAGINATION = 'cursor'
+FEED_CURSOR_SEPARATOR = '|'
+
+BENCHMARK_COLLECTION = 'diploma.postman_collection.json'
+BENCHMARK_ITERATIONS = 50
+BENCHMARK_WARMUP = 2
+BENCHMARK_TOLERANCE = 0.2
+BENCHMARK_PERCENTILES = (50, 95, 99)
+BENCHMARK_SCENARIO = (
+    ('get_recipes_list // No Auth',),
+    ('get_recipes_list // User',),
+    ('get_recipes_list_with_limit_param // User',),
+    ('get_recipes_list_with_author_param // User',),
+    ('get_recipes_list_with_two_tags_param // User',),
+    ('get_recipe_detail // No Auth',),
+    ('get_recipes_list_with_is_favorited_param // User',),
+    ('get_recipes_list_with_is_in_shopping_cart_param // User',),
+    ('add_to_favorite // User', 'remove_from_favorite // User'),
+    ('add_to_shopping_cart // User', 'remove_from_shopping_cart // User'),
+    ('create_subscription // User', 'delete_first_subscription // User'),
+    ('get_subscription_list // User',),
+    ('get_subscription_list_with_recipes_limit_param // User',),
+    ('download_shopping_cart // User',),
+)
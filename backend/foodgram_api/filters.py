@@ -1,6 +1,10 @@
 from django_filters import rest_framework as filters
 
+from recipes_app.constants import RECIPE_ORDERING_POPULAR
 from recipes_app.models import Ingredient, Recipe, Tag
+from recipes_app.popularity import order_by_popularity
+from recipes_app.search import search_recipes
+from recipes_app.tags_mask import filter_by_tags
 from users_app.models import User
 
 
@@ -10,15 +14,29 @@ class RecipeFilter(filters.FilterSet):
         field_name='tags__slug',
         queryset=Tag.objects.all(),
         to_field_name='slug',
+        method='get_tags'
     )
     is_favorited = filters.BooleanFilter(method='get_is_favorited')
     is_in_shopping_cart = filters.BooleanFilter(
         method='get_is_in_shopping_cart'
     )
+    search = filters.CharFilter(method='get_search')
+    ordering = filters.ChoiceFilter(
+        choices=((RECIPE_ORDERING_POPULAR, 'По популярности'),),
+        method='get_ordering'
+    )
 
     class Meta:
         model = Recipe
-        fields = ('tags', 'author', 'is_favorited', 'is_in_shopping_cart')
+        fields = (
+            'tags', 'author', 'is_favorited', 'is_in_shopping_cart', 'search',
+            'ordering'
+        )
+
+    def get_tags(self, queryset, name, value):
+        if not value:
+            return queryset
+        return filter_by_tags(queryset, value)
 
     def get_is_favorited(self, queryset, name, value):
         if self.request.user and value:
@@ -34,6 +52,25 @@ class RecipeFilter(filters.FilterSet):
             )
         return queryset
 
+    def get_search(self, queryset, name, value):
+        """
+        Полнотекстовый поиск по названию и описанию, результаты
+        упорядочены по релевантности.
+        """
+        if not value.strip():
+            return queryset
+        return search_recipes(queryset, value)
+
+    def get_ordering(self, queryset, name, value):
+        """
+        Сортировка по оценке популярности, которую пересчитывает
+        команда update_popularity. Объявлена последней, чтобы заменить
+        порядок, заданный остальными фильтрами.
+        """
+        if value == RECIPE_ORDERING_POPULAR:
+            return order_by_popularity(queryset)
+        return queryset
+
 
 class IngredientFilter(filters.FilterSet):
     name = filters.CharFilter(lookup_expr='istartswith')
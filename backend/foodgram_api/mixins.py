@@ -0,0 +1,71 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from foodgram_backend.middleware import time_serializer
+
+
+class ConditionalGetMixin:
+    """
+    Условные GET-запросы для list и retrieve: ETag и Last-Modified
+    вычисляются до сериализации, и на If-None-Match / If-Modified-Since
+    сразу отдаётся 304.
+    Представление определяет get_etag_data() и get_last_modified().
+    """
+    conditional_vary_headers = ()
+
+    def get_etag_data(self, request):
+        return None
+
+    def get_last_modified(self, request):
+        return None
+
+    def get_etag(self, request):
+        etag_data = self.get_etag_data(request)
+        if etag_data is None:
+            return None
+        return quote_etag(hashlib.md5(
+            repr((request.get_full_path(), etag_data)).encode(),
+            usedforsecurity=False
+        ).hexdigest())
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        etag = self.get_etag(request)
+        last_modified = self.get_last_modified(request)
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(
+            request, etag=etag, last_modified=timestamp
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+
+        if response.status_code in (200, 304):
+            if etag:
+                response['ETag'] = etag
+            if timestamp:
+                response['Last-Modified'] = http_date(timestamp)
+        if self.conditional_vary_headers:
+            patch_vary_headers(response, self.conditional_vary_headers)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+
+class TimedSerializerMixin:
+    """
+    Время to_representation попадает в метрики RequestTimingMiddleware.
+    Списки без своего to_representation считаются по элементам.
+    """
+    def to_representation(self, instance):
+        with time_serializer():
+            return super().to_representation(instance)
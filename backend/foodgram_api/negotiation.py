@@ -0,0 +1,13 @@
+from rest_framework.negotiation import BaseContentNegotiation
+
+
+class FirstRendererNegotiation(BaseContentNegotiation):
+    """
+    Всегда выбирает первый парсер и рендерер представления.
+    Параметр ?format= при этом остаётся в распоряжении самого представления.
+    """
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
@@ -1,8 +1,130 @@
-from rest_framework.pagination import PageNumberPagination
+import binascii
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
 
-from foodgram_api.constants import PAGE_SIZE
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import (BasePagination,
+                                       CursorPagination,
+                                       PageNumberPagination)
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from foodgram_api.constants import (CURSOR_PAGINATION,
+                                    FEED_CURSOR_SEPARATOR,
+                                    PAGE_SIZE,
+                                    PAGINATION_QUERY_PARAM)
 
 
 class CustomPagination(PageNumberPagination):
     page_size = PAGE_SIZE
     page_size_query_param = 'limit'
+
+
+class RecipeCursorPagination(CursorPagination):
+    """
+    Курсорная пагинация рецептов по (-pub_date, id): без COUNT(*) и OFFSET,
+    глубокие страницы стоят столько же, сколько первая.
+    """
+    page_size = PAGE_SIZE
+    page_size_query_param = 'limit'
+    ordering = ('-pub_date', 'id')
+
+
+class RecipePagination(CustomPagination):
+    """
+    Постраничная пагинация рецептов.
+    С параметром ?pagination=cursor используется курсорная. Она
+    упорядочивает рецепты по дате, поэтому с сортировкой, заданной
+    фильтрами ordering и search, не сочетается.
+    """
+    cursor_pagination_class = RecipeCursorPagination
+    invalid_ordering_message = (
+        'Курсорная пагинация недоступна с параметрами ordering и search.'
+    )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if request.query_params.get(
+            PAGINATION_QUERY_PARAM
+        ) == CURSOR_PAGINATION:
+            if queryset.query.order_by:
+                raise ValidationError(
+                    {PAGINATION_QUERY_PARAM: self.invalid_ordering_message}
+                )
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class FeedPagination(BasePagination):
+    """
+    Курсорная пагинация ленты подписок. Курсор - позиция (pub_date, id)
+    последнего рецепта страницы, страницу выбирает функция get_page.
+    Лента листается только вперёд.
+    """
+    page_size = PAGE_SIZE
+    max_page_size = 100
+    page_size_query_param = 'limit'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Неверный курсор.'
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size < 1:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            pub_date, pk = urlsafe_b64decode(
+                encoded.encode()
+            ).decode().split(FEED_CURSOR_SEPARATOR)
+            position = (parse_datetime(pub_date), int(pk))
+        except (TypeError, ValueError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        if position[0] is None:
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    def encode_cursor(self, position):
+        pub_date, pk = position
+        return urlsafe_b64encode(
+            f'{pub_date.isoformat()}{FEED_CURSOR_SEPARATOR}{pk}'.encode()
+        ).decode()
+
+    def paginate_feed(self, request, get_page):
+        self.request = request
+        page, self.next_position = get_page(
+            self.decode_cursor(request), self.get_page_size(request)
+        )
+        return page
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(self.next_position)
+        )
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict((
+            ('next', self.get_next_link()),
+            ('previous', None),
+            ('results', data),
+        )))
@@ -0,0 +1,130 @@
+import base64
+import os
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.core.cache import cache
+from django.test import override_settings
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APITestCase
+
+from foodgram_api.versions import forget_local_versions
+from recipes_app.models import (Ingredient,
+                                Recipe,
+                                RecipeIngredientQuantity,
+                                Tag)
+from users_app.models import User
+
+PASSWORD = 'Test-password-1'
+IMAGE = 'recipes/images/test.png'
+
+
+def get_image_bytes():
+    buffer = BytesIO()
+    Image.new('RGB', (4, 4), (226, 108, 45)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def get_image_data():
+    return 'data:image/png;base64,' + base64.b64encode(
+        get_image_bytes()
+    ).decode()
+
+
+class FoodgramTestCase(APITestCase):
+    """
+    Общая основа тестов API: медиафайлы во временном каталоге, чистый
+    кэш перед каждым тестом, теги, ингредиенты и помощники для
+    создания пользователей и рецептов.
+    """
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.mkdtemp()
+        cls.media_override = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media_override.enable()
+        os.makedirs(os.path.join(cls.media_root, os.path.dirname(IMAGE)))
+        with open(os.path.join(cls.media_root, IMAGE), 'wb') as file:
+            file.write(get_image_bytes())
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.media_override.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.breakfast = Tag.objects.create(
+            name='Завтрак', color='#E26C2D', slug='breakfast'
+        )
+        cls.dinner = Tag.objects.create(
+            name='Ужин', color='#49B64E', slug='dinner'
+        )
+        cls.flour = Ingredient.objects.create(
+            name='мука', measurement_unit='г'
+        )
+        cls.milk = Ingredient.objects.create(
+            name='молоко', measurement_unit='мл'
+        )
+        cls.egg = Ingredient.objects.create(
+            name='яйцо', measurement_unit='шт'
+        )
+
+    def setUp(self):
+        cache.clear()
+        forget_local_versions()
+
+    @staticmethod
+    def create_user(username):
+        return User.objects.create_user(
+            email=f'{username}@example.com',
+            username=username,
+            first_name=username.capitalize(),
+            last_name='Тестов',
+            password=PASSWORD
+        )
+
+    @staticmethod
+    def get_client(user=None):
+        client = APIClient()
+        if user is not None:
+            token, _ = Token.objects.get_or_create(user=user)
+            client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        return client
+
+    @staticmethod
+    def create_recipe(author, tags=(), ingredients=(), name='Рецепт'):
+        """
+        ingredients - пары (ингредиент, количество).
+        """
+        recipe = Recipe.objects.create(
+            author=author,
+            name=name,
+            text='Описание',
+            cooking_time=10,
+            image=IMAGE
+        )
+        recipe.tags.set(tags)
+        RecipeIngredientQuantity.objects.bulk_create([
+            RecipeIngredientQuantity(
+                recipe=recipe, ingredient=ingredient, amount=amount
+            ) for ingredient, amount in ingredients
+        ])
+        return recipe
+
+    def get_recipe_data(self, tags, ingredients, **fields):
+        return {
+            'tags': [tag.pk for tag in tags],
+            'ingredients': [
+                {'id': ingredient.pk, 'amount': amount}
+                for ingredient, amount in ingredients
+            ],
+            'image': get_image_data(),
+            'name': 'Рецепт',
+            'text': 'Описание',
+            'cooking_time': 10,
+            **fields
+        }
@@ -0,0 +1,77 @@
+from unittest import mock
+
+from rest_framework import status
+from rest_framework.throttling import UserRateThrottle
+
+from foodgram_api.tests.base import FoodgramTestCase
+from recipes_app.models import Favorite
+from recipes_app.views import FavoriteBatchView
+from subscriptions_app.models import Subscription
+
+
+class OncePerMinuteThrottle(UserRateThrottle):
+    rate = '1/min'
+
+
+class AsyncAPIViewTests(FoodgramTestCase):
+    """
+    Асинхронные эндпоинты принимают только JSON, а права и
+    ограничение частоты берут из классов DRF.
+    """
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('author')
+        self.reader = self.create_user('reader')
+        self.client = self.get_client(self.reader)
+        self.recipe = self.create_recipe(
+            self.author, (self.breakfast,), ((self.flour, 100),)
+        )
+        self.url = '/api/recipes/favorite/batch/'
+
+    def test_form_body_is_unsupported(self):
+        response = self.client.post(
+            self.url, {'add': [self.recipe.pk], 'remove': []}
+        )
+        self.assertEqual(
+            response.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+        )
+        self.assertFalse(Favorite.objects.exists())
+
+        response = self.client.post(
+            self.url, {'add': [self.recipe.pk], 'remove': []}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['added'], [self.recipe.pk])
+
+    def test_anonymous_is_not_authenticated(self):
+        response = self.get_client().post(
+            self.url, {'add': [self.recipe.pk], 'remove': []}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response['WWW-Authenticate'], 'Token')
+
+    def test_throttle_classes_are_applied(self):
+        with mock.patch.object(
+            FavoriteBatchView, 'throttle_classes', (OncePerMinuteThrottle,)
+        ):
+            for expected in (status.HTTP_200_OK,
+                             status.HTTP_429_TOO_MANY_REQUESTS):
+                response = self.client.post(
+                    self.url, {'add': [self.recipe.pk], 'remove': []},
+                    format='json'
+                )
+                self.assertEqual(response.status_code, expected)
+        self.assertIn('Retry-After', response)
+
+    def test_subscribe_validation(self):
+        url = f'/api/users/{self.author.pk}/subscribe/'
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()['id'], self.author.pk)
+        self.assertEqual(len(response.json()['recipes']), 1)
+
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(f'/api/users/{self.reader.pk}/subscribe/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Subscription.objects.count(), 1)
@@ -0,0 +1,67 @@
+from rest_framework import status
+
+from foodgram_api.tests.base import FoodgramTestCase
+from recipes_app.models import Recipe
+
+
+class RecipePaginationTests(FoodgramTestCase):
+    """
+    С ?pagination=cursor рецепты листаются курсором по (-pub_date, id),
+    без COUNT(*); с ordering и search курсор не сочетается.
+    """
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('author')
+        for number in range(5):
+            self.create_recipe(
+                self.author,
+                (self.breakfast,) if number % 2 else (self.dinner,),
+                name=f'Рецепт {number}'
+            )
+
+    def get_cursor_ids(self, **params):
+        ids, url = [], '/api/recipes/'
+        params = {'pagination': 'cursor', 'limit': 2, **params}
+        while url:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            ids += [recipe['id'] for recipe in response.data['results']]
+            url, params = response.data['next'], None
+        return ids
+
+    def test_cursor_pages_cover_recipes_once(self):
+        self.assertEqual(
+            self.get_cursor_ids(),
+            list(Recipe.objects.order_by(
+                '-pub_date', 'id'
+            ).values_list('id', flat=True))
+        )
+
+    def test_cursor_pages_with_filters(self):
+        self.assertEqual(
+            self.get_cursor_ids(tags='breakfast'),
+            list(Recipe.objects.filter(tags=self.breakfast).order_by(
+                '-pub_date', 'id'
+            ).values_list('id', flat=True))
+        )
+
+    def test_page_number_pagination_by_default(self):
+        response = self.client.get('/api/recipes/', {'limit': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 5)
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_cursor_rejects_ordering_and_search(self):
+        for params in ({'ordering': 'popular'}, {'search': 'Рецепт'}):
+            response = self.client.get(
+                '/api/recipes/', {'pagination': 'cursor', **params}
+            )
+            self.assertEqual(
+                response.status_code, status.HTTP_400_BAD_REQUEST
+            )
+            self.assertEqual(
+                response.data['pagination'],
+                'Курсорная пагинация недоступна с параметрами '
+                'ordering и search.'
+            )
@@ -0,0 +1,134 @@
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+
+from foodgram_api.tests.base import FoodgramTestCase
+from foodgram_api.versions import forget_local_versions
+from recipes_app.models import Favorite, ShoppingCart
+from subscriptions_app.models import Subscription
+
+
+@mock.patch('recipes_app.images.schedule_renditions', mock.Mock())
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+})
+class QueryCountTests(FoodgramTestCase):
+    """
+    Число SQL-запросов страниц не зависит от числа рецептов на них и
+    укладывается в REQUEST_BUDGETS - и с прогретым кэшем, и с пустым.
+    Здесь кэш в памяти, в DefaultCacheQueryCountTests - кэш проекта.
+    Копии изображений не создаются, чтобы их готовность не меняла
+    ключи кэша между запросами.
+    """
+    def setUp(self):
+        super().setUp()
+        self.reader = self.create_user('reader')
+        self.client = self.get_client(self.reader)
+        self.authors = 0
+        self.add_recipes(2)
+
+    def add_recipes(self, count):
+        for _ in range(count):
+            self.authors += 1
+            author = self.create_user(f'author{self.authors}')
+            recipe = self.create_recipe(
+                author, (self.breakfast, self.dinner),
+                ((self.flour, 100), (self.milk, 200), (self.egg, 2))
+            )
+            Favorite.objects.create(user=self.reader, recipe=recipe)
+            ShoppingCart.objects.create(user=self.reader, recipe=recipe)
+            Subscription.objects.create(user=self.reader, author=author)
+
+    def count_queries(self, url, cold=False, **params):
+        if cold:
+            cache.clear()
+            forget_local_versions()
+        else:
+            self.assertEqual(
+                self.client.get(url, params).status_code, status.HTTP_200_OK
+            )
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(queries)
+
+    def assertWithinBudget(self, budget, *counts):
+        for count in counts:
+            self.assertLessEqual(
+                count, settings.REQUEST_BUDGETS[budget]['queries']
+            )
+
+    def assertConstantQueries(self, budget, url, **params):
+        few = self.count_queries(url, **params)
+        few_cold = self.count_queries(url, cold=True, **params)
+        self.add_recipes(4)
+        many = self.count_queries(url, **params)
+        many_cold = self.count_queries(url, cold=True, **params)
+        self.assertEqual(few, many)
+        self.assertEqual(few_cold, many_cold)
+        self.assertLessEqual(many, many_cold)
+        self.assertWithinBudget(budget, many, many_cold)
+
+    def test_recipe_list(self):
+        self.assertConstantQueries(
+            'RecipeViewSet.list', '/api/recipes/', limit=100
+        )
+
+    def test_recipe_list_with_filters(self):
+        self.assertConstantQueries(
+            'RecipeViewSet.list', '/api/recipes/',
+            limit=100, tags='breakfast', is_favorited=1
+        )
+
+    def test_recipe_retrieve(self):
+        """
+        Рецепт с одним тегом и ингредиентом и рецепт со всеми
+        читаются одинаковым числом запросов.
+        """
+        author = self.create_user('retrieve_author')
+        small = self.create_recipe(
+            author, (self.breakfast,), ((self.flour, 100),)
+        )
+        large = self.create_recipe(
+            author, (self.breakfast, self.dinner),
+            ((self.flour, 100), (self.milk, 200), (self.egg, 2))
+        )
+        for cold in (False, True):
+            counts = [
+                self.count_queries(f'/api/recipes/{recipe.pk}/', cold=cold)
+                for recipe in (small, large)
+            ]
+            self.assertEqual(counts[0], counts[1])
+            self.assertWithinBudget('RecipeViewSet.retrieve', *counts)
+
+    def test_subscriptions(self):
+        self.assertConstantQueries(
+            'SubscriptionViewSet.get', '/api/users/subscriptions/',
+            limit=100, recipes_limit=3
+        )
+
+    def test_shopping_cart_download(self):
+        self.assertConstantQueries(
+            'RecipeViewSet.download_shopping_cart',
+            '/api/recipes/download_shopping_cart/'
+        )
+
+
+@override_settings(CACHES=settings.CACHES)
+class DefaultCacheQueryCountTests(QueryCountTests):
+    """
+    Те же проверки с кэшем из настроек проекта (CACHE_BACKEND): запросы
+    к нему считаются вместе с запросами к данным.
+    """
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command('createcachetable', verbosity=0)
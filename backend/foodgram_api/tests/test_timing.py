@@ -0,0 +1,66 @@
+import json
+
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.serializers import BaseSerializer
+
+from foodgram_api.tests.base import FoodgramTestCase
+from recipes_app.models import ShoppingCart
+
+
+class RequestTimingTests(FoodgramTestCase):
+    """
+    Бюджеты RequestTimingMiddleware ищутся по имени класса
+    представления, в том числе асинхронного.
+    """
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user('user')
+        self.recipe = self.create_recipe(
+            self.user, (self.breakfast,), ((self.flour, 100),)
+        )
+
+    def get_records(self, client, method, path):
+        with self.assertLogs('foodgram_backend.timing', 'INFO') as logs:
+            response = getattr(client, method)(path)
+        self.assertIn('Server-Timing', response)
+        return response, [json.loads(record.getMessage())
+                          for record in logs.records]
+
+    def test_viewset_name_and_action(self):
+        response, records = self.get_records(
+            self.get_client(), 'get', f'/api/recipes/{self.recipe.pk}/'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(records[0]['view'], 'RecipeViewSet')
+        self.assertEqual(records[0]['action'], 'retrieve')
+        self.assertGreater(records[0]['serializer_ms'], 0)
+        self.assertFalse(hasattr(BaseSerializer.data.fget, 'is_timed'))
+
+    @override_settings(REQUEST_BUDGETS={
+        'RecipeViewSet.download_shopping_cart': {'queries': 0}
+    })
+    def test_streaming_response_counts_body_queries(self):
+        ShoppingCart.objects.create(user=self.user, recipe=self.recipe)
+        with self.assertLogs('foodgram_backend.timing', 'INFO') as logs:
+            response = self.get_client(self.user).get(
+                '/api/recipes/download_shopping_cart/'
+            )
+            self.assertEqual(logs.records, [])
+            content = b''.join(response.streaming_content)
+        self.assertIn(self.flour.name.encode(), content)
+        self.assertNotIn('Server-Timing', response)
+        [record] = [json.loads(record.getMessage())
+                    for record in logs.records]
+        self.assertEqual(record['event'], 'over_budget')
+        self.assertGreater(record['queries'], 0)
+
+    @override_settings(REQUEST_BUDGETS={'FavoriteView.post': {'queries': 0}})
+    def test_budget_targets_async_view(self):
+        response, records = self.get_records(
+            self.get_client(self.user), 'post',
+            f'/api/recipes/{self.recipe.pk}/favorite/'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(records[0]['view'], 'FavoriteView')
+        self.assertEqual(records[0]['event'], 'over_budget')
@@ -0,0 +1,96 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+
+from foodgram_api.tests.base import FoodgramTestCase
+from foodgram_api.versions import (bump_version,
+                                   forget_local_versions,
+                                   get_local_version,
+                                   get_version)
+from recipes_app.ingredient_index import ingredient_index
+from recipes_app.models import Ingredient
+
+
+class VersionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        forget_local_versions()
+
+    def test_version_changes_only_on_bump(self):
+        version = get_version('test_version')
+        self.assertEqual(get_version('test_version'), version)
+        bump_version('test_version')
+        self.assertNotEqual(get_version('test_version')[0], version[0])
+
+    def test_local_version_sees_own_bump_at_once(self):
+        version = get_local_version('test_version')
+        cache.set('test_version', ('other', version[1]), None)
+        self.assertEqual(get_local_version('test_version'), version)
+        bump_version('test_version')
+        self.assertNotEqual(get_local_version('test_version'), version)
+        self.assertEqual(
+            get_local_version('test_version'), get_version('test_version')
+        )
+
+    def test_ingredient_index_follows_invalidation(self):
+        self.assertEqual(ingredient_index.search('сол'), [])
+        Ingredient.objects.bulk_create(
+            [Ingredient(name='соль', measurement_unit='г')]
+        )
+        self.assertEqual(ingredient_index.search('сол'), [])
+        ingredient_index.invalidate()
+        self.assertEqual(
+            [row['name'] for row in ingredient_index.search('сол')],
+            ['соль']
+        )
+
+
+@override_settings(CACHES={'default': {
+    'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+    'LOCATION': 'foodgram_cache',
+}})
+class CatalogueQueriesTests(FoodgramTestCase):
+    """
+    Справочники и автодополнение отвечают из памяти процесса, не
+    обращаясь ни к базе, ни к кэшу в ней, даже если кэш - таблица.
+    """
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command('createcachetable', verbosity=0)
+
+    def assertNoQueries(self, url, **params):
+        self.assertEqual(
+            self.client.get(url, params).status_code, status.HTTP_200_OK
+        )
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 0, [q['sql'] for q in queries])
+        return response
+
+    def test_tags(self):
+        self.assertNoQueries('/api/tags/')
+
+    def test_ingredients(self):
+        self.assertNoQueries('/api/ingredients/')
+
+    def test_ingredient_autocomplete(self):
+        response = self.assertNoQueries('/api/ingredients/', name='м')
+        self.assertEqual(
+            [row['name'] for row in response.data],
+            [self.flour.name, self.milk.name]
+        )
+
+    def test_version_is_read_once_per_interval(self):
+        with mock.patch(
+            'foodgram_api.versions.get_version', wraps=get_version
+        ) as shared_get_version:
+            self.client.get('/api/ingredients/', {'name': 'м'})
+            self.client.get('/api/ingredients/')
+        self.assertEqual(shared_get_version.call_count, 1)
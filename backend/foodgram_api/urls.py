@@ -1,21 +1,30 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from recipes_app.views import (IngredientViewSet,
+from recipes_app.views import (FavoriteBatchView,
+                               FavoriteView,
+                               IngredientViewSet,
                                RecipeViewSet,
+                               ShoppingCartBatchView,
+                               ShoppingCartView,
                                TagsViewSet)
 from subscriptions_app.views import SubscribeView, SubscriptionViewSet
+from users_app.views import UserViewSet
 
 router_v1 = DefaultRouter()
 
 router_v1.register('tags', TagsViewSet, basename='tags')
 router_v1.register('ingredients', IngredientViewSet, basename='ingredients')
 router_v1.register(r'recipes', RecipeViewSet, basename='recipes')
+router_v1.register('users', UserViewSet, basename='users')
 
 urlpatterns = [
     path('users/subscriptions/', SubscriptionViewSet.as_view()),
     path('users/<int:pk>/subscribe/', SubscribeView.as_view()),
+    path('recipes/<int:pk>/favorite/', FavoriteView.as_view()),
+    path('recipes/<int:pk>/shopping_cart/', ShoppingCartView.as_view()),
+    path('recipes/favorite/batch/', FavoriteBatchView.as_view()),
+    path('recipes/shopping_cart/batch/', ShoppingCartBatchView.as_view()),
     path('', include(router_v1.urls)),
-    path('', include('djoser.urls')),
     path('auth/', include('djoser.urls.authtoken')),
 ]
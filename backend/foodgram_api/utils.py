@@ -1,18 +1,142 @@
-from django.http import HttpResponse
+import csv
+import json
 
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.http import StreamingHttpResponse
 
-def convert_shopping_cart_to_txt(shopping_list):
-    file_name = 'Shopping_cart.txt'
-    response = HttpResponse(content_type='text/plain,charset=utf8')
-    response['Content-Disposition'] = f'attachment; filename={file_name}'
+from foodgram_api.constants import (SHOPPING_CART_BUFFER_ROWS,
+                                    SHOPPING_CART_FILE_NAME)
 
+
+class Echo:
+    """
+    Псевдо-файл для csv.writer: возвращает строку вместо записи.
+    """
+    def write(self, value):
+        return value
+
+
+def get_shopping_cart_rows(shopping_list):
     for ingredient in shopping_list:
-        name = ingredient['ingredient__name']
-        measurement_unit = ingredient['ingredient__measurement_unit']
-        amount = ingredient['ingredient_total']
-        response.write(
-            (str(name) + ' - ' + str(amount)
-             + ' ' + str(measurement_unit) + '\n')
+        yield (
+            ingredient['ingredient__name'],
+            ingredient['ingredient_total'],
+            ingredient['ingredient__measurement_unit'],
         )
 
+
+def render_shopping_cart_txt(rows):
+    for name, amount, measurement_unit in rows:
+        yield f'{name} - {amount} {measurement_unit}\n'
+
+
+def render_shopping_cart_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(('name', 'amount', 'measurement_unit'))
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def render_shopping_cart_json(rows):
+    yield '['
+    separator = ''
+    for name, amount, measurement_unit in rows:
+        yield separator + json.dumps(
+            {
+                'name': name,
+                'measurement_unit': measurement_unit,
+                'amount': amount,
+            },
+            ensure_ascii=False
+        )
+        separator = ','
+    yield ']'
+
+
+SHOPPING_CART_FORMATS = {
+    'txt': ('text/plain; charset=utf-8', render_shopping_cart_txt),
+    'csv': ('text/csv; charset=utf-8', render_shopping_cart_csv),
+    'json': ('application/json; charset=utf-8', render_shopping_cart_json),
+}
+
+
+def buffer_chunks(chunks, size=SHOPPING_CART_BUFFER_ROWS):
+    """
+    Склеивает мелкие куски ответа, чтобы не писать в сокет каждую строку.
+    """
+    buffer = []
+    for chunk in chunks:
+        buffer.append(chunk)
+        if len(buffer) >= size:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+def stream_shopping_cart(shopping_list, file_format='txt'):
+    """
+    Отдаёт список покупок потоком в формате txt, csv или json.
+    shopping_list - итератор строк агрегированного запроса.
+    """
+    content_type, render = SHOPPING_CART_FORMATS[file_format]
+    response = StreamingHttpResponse(
+        buffer_chunks(render(get_shopping_cart_rows(shopping_list))),
+        content_type=content_type
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename={SHOPPING_CART_FILE_NAME}.{file_format}'
+    )
     return response
+
+
+class CounterFieldsMixin:
+    """
+    Не даёт save() существующей строки перезаписать счётчики из
+    counter_fields. Их меняют отдельные UPDATE через change_counter, и
+    значения в загруженном экземпляре могут быть уже устаревшими.
+    """
+    counter_fields = ()
+
+    def save(self, *args, update_fields=None, **kwargs):
+        if not self._state.adding:
+            if update_fields is None:
+                deferred = self.get_deferred_fields()
+                update_fields = [
+                    field.name for field in self._meta.concrete_fields
+                    if not field.primary_key
+                    and field.attname not in deferred
+                ]
+            update_fields = [
+                name for name in update_fields
+                if name not in self.counter_fields
+            ]
+        super().save(*args, update_fields=update_fields, **kwargs)
+
+
+def change_counter(model, pk, field, delta):
+    """
+    Атомарно изменяет денормализованный счётчик на delta одним UPDATE.
+    Счётчик не опускается ниже нуля.
+    """
+    queryset = model.objects.filter(pk=pk)
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    queryset.update(**{field: F(field) + delta})
+
+
+def count_subquery(model, field):
+    """
+    Подзапрос с числом строк model, ссылающихся через field на OuterRef.
+    """
+    return Coalesce(
+        Subquery(
+            model.objects.filter(
+                **{field: OuterRef('pk')}
+            ).order_by().values(field).annotate(
+                total=Count('pk')
+            ).values('total')
+        ),
+        0
+    )
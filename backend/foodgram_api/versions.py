@@ -0,0 +1,50 @@
+import time
+import uuid
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from foodgram_api.constants import VERSION_LOCAL_TTL
+
+_local_versions = {}
+
+
+def new_version():
+    return uuid.uuid4().hex, timezone.now()
+
+
+def get_version(key):
+    """
+    Возвращает версию данных и время её смены: (строка, datetime).
+    Версия хранится в общем кэше, чтобы её видели все процессы.
+    """
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, new_version(), None)
+        version = cache.get(key) or new_version()
+    return version
+
+
+def get_local_version(key):
+    """
+    get_version для версий, которые проверяются на каждом запросе:
+    общий кэш читается не чаще раза в VERSION_LOCAL_TTL секунд. Смену
+    версии в другом процессе процесс видит с этой задержкой, свою -
+    сразу.
+    """
+    entry = _local_versions.get(key)
+    if entry is None or entry[0] < time.monotonic():
+        entry = (time.monotonic() + VERSION_LOCAL_TTL, get_version(key))
+        _local_versions[key] = entry
+    return entry[1]
+
+
+def forget_local_versions():
+    _local_versions.clear()
+
+
+def bump_version(key):
+    version = new_version()
+    cache.set(key, version, None)
+    if key in _local_versions:
+        _local_versions[key] = (time.monotonic() + VERSION_LOCAL_TTL, version)
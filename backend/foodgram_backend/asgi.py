@@ -5,3 +5,12 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram_backend.settings')
 
 application = get_asgi_application()
+
+from django.db import DatabaseError  # noqa: E402
+
+from recipes_app.ingredient_index import ingredient_index  # noqa: E402
+
+try:
+    ingredient_index.refresh()
+except DatabaseError:
+    pass
@@ -0,0 +1,242 @@
+import json
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger('foodgram_backend.timing')
+
+_current_metrics = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """
+    Метрики одного запроса: число SQL-запросов и время этапов в секундах.
+    """
+    __slots__ = ('queries', 'db_time', 'serializer_time', 'serializer_depth',
+                 'view_name', 'action', 'view_start', 'view_time')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+        self.view_name = None
+        self.action = None
+        self.view_start = None
+        self.view_time = None
+
+
+def count_query(execute, sql, params, many, context):
+    """
+    Обёртка выполнения SQL, считающая запросы и время в базе.
+    """
+    metrics = _current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.db_time += time.perf_counter() - start
+
+
+def add_query_counter(sender, connection, **kwargs):
+    """
+    Подключает count_query к каждому новому соединению. При async-
+    представлениях запросы выполняются в других потоках, поэтому
+    обёртка ставится на соединения всех потоков, а не только текущего.
+    """
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_query)
+
+
+@contextmanager
+def time_serializer():
+    """
+    Засекает время сериализации для текущего запроса. Вложенные
+    сериализаторы не учитываются повторно.
+    """
+    metrics = _current_metrics.get()
+    if metrics is None or metrics.serializer_depth:
+        yield
+        return
+
+    metrics.serializer_depth += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serializer_time += time.perf_counter() - start
+        metrics.serializer_depth -= 1
+
+
+class RequestTimingMiddleware:
+    """
+    Считает SQL-запросы, время в базе, сериализаторах и представлении.
+    Результат отдаётся в заголовке Server-Timing и пишется в лог,
+    при превышении бюджета из settings.REQUEST_BUDGETS - с предупреждением.
+    Потоковые ответы считаются до конца передачи тела, поэтому попадают
+    только в лог: заголовки к этому времени уже отправлены.
+    Время сериализаторов считает TimedSerializerMixin.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.budgets = getattr(settings, 'REQUEST_BUDGETS', {})
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        connection_created.connect(add_query_counter)
+        for connection in connections.all(initialized_only=True):
+            add_query_counter(None, connection)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        metrics = RequestMetrics()
+        token = _current_metrics.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_metrics.reset(token)
+        return self.finish(request, response, metrics, start)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current_metrics.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_metrics.reset(token)
+        return self.finish(request, response, metrics, start)
+
+    def finish(self, request, response, metrics, start):
+        if metrics.view_time is None and metrics.view_start is not None:
+            metrics.view_time = time.perf_counter() - metrics.view_start
+        if response.streaming:
+            stream = self.astream if response.is_async else self.stream
+            response.streaming_content = stream(
+                request, response, metrics, start, response.streaming_content
+            )
+        else:
+            self.report(
+                request, response, metrics, time.perf_counter() - start
+            )
+        return response
+
+    def stream(self, request, response, metrics, start, content):
+        """
+        Отдаёт тело потокового ответа, считая запросы к базе при его
+        получении. Отчёт пишется, когда тело передано или поток закрыт.
+        """
+        try:
+            iterator = iter(content)
+            while True:
+                token = _current_metrics.set(metrics)
+                try:
+                    chunk = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    _current_metrics.reset(token)
+                yield chunk
+        finally:
+            self.report(
+                request, response, metrics, time.perf_counter() - start
+            )
+
+    async def astream(self, request, response, metrics, start, content):
+        try:
+            iterator = aiter(content)
+            while True:
+                token = _current_metrics.set(metrics)
+                try:
+                    chunk = await anext(iterator)
+                except StopAsyncIteration:
+                    return
+                finally:
+                    _current_metrics.reset(token)
+                yield chunk
+        finally:
+            self.report(
+                request, response, metrics, time.perf_counter() - start
+            )
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = _current_metrics.get()
+        if metrics is None:
+            return None
+
+        view_class = (
+            getattr(view_func, 'cls', None)
+            or getattr(view_func, 'view_class', None)
+        )
+        metrics.view_name = (
+            view_class.__name__ if view_class else view_func.__name__
+        )
+        method = request.method.lower()
+        actions = getattr(view_func, 'actions', None) or {}
+        metrics.action = actions.get(method, method)
+        metrics.view_start = time.perf_counter()
+        return None
+
+    def process_template_response(self, request, response):
+        metrics = _current_metrics.get()
+        if metrics is not None and metrics.view_start is not None:
+            metrics.view_time = time.perf_counter() - metrics.view_start
+        return response
+
+    def get_budget(self, metrics):
+        return self.budgets.get(
+            f'{metrics.view_name}.{metrics.action}',
+            self.budgets.get('default', {})
+        )
+
+    def report(self, request, response, metrics, total_time):
+        timings = {
+            'db': metrics.db_time * 1000,
+            'serializer': metrics.serializer_time * 1000,
+            'view': (metrics.view_time or 0.0) * 1000,
+            'total': total_time * 1000,
+        }
+        if not response.streaming:
+            response['Server-Timing'] = ', '.join(
+                [f'db;dur={timings["db"]:.1f};'
+                 f'desc="{metrics.queries} queries"']
+                + [f'{name};dur={timings[name]:.1f}'
+                   for name in ('serializer', 'view', 'total')]
+            )
+
+        budget = self.get_budget(metrics)
+        over_budget = (
+            metrics.queries > budget.get('queries', float('inf'))
+            or timings['total'] > budget.get('duration', float('inf'))
+        )
+        level = logging.WARNING if over_budget else logging.INFO
+        if not logger.isEnabledFor(level):
+            return
+
+        logger.log(level, json.dumps({
+            'event': 'over_budget' if over_budget else 'request',
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'view': metrics.view_name,
+            'action': metrics.action,
+            'queries': metrics.queries,
+            **{f'{name}_ms': round(value, 1)
+               for name, value in timings.items()},
+            'budget': budget if over_budget else None,
+        }, ensure_ascii=False))
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -32,6 +33,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'foodgram_backend.middleware.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -74,6 +76,32 @@ DATABASES = {
     }
 }
 
+# Кэш должен быть общим для всех процессов: в нём хранятся версии
+# данных, по которым воркеры и команды управления сбрасывают свои копии.
+# Без настроек используются файлы во временном каталоге, общие для
+# процессов одной машины и не нагружающие базу; в docker compose - Redis.
+CACHE_BACKEND = os.getenv(
+    'CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'
+)
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': os.getenv('CACHE_LOCATION', (
+            os.path.join(tempfile.gettempdir(), 'foodgram_cache')
+            if CACHE_BACKEND.endswith('FileBasedCache') else 'foodgram_cache'
+        )),
+    }
+}
+if not CACHE_BACKEND.endswith('RedisCache'):
+    CACHES['default']['OPTIONS'] = {
+        'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', 100000)),
+    }
+
+# Хранить токены авторизации и в общем кэше, а не только в памяти процесса.
+AUTH_TOKEN_SHARED_CACHE = os.getenv(
+    'AUTH_TOKEN_SHARED_CACHE', 'False'
+).lower() in ('true', 't', '1')
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -108,6 +136,8 @@ STATIC_ROOT = BASE_DIR / 'foodgram_static/'
 MEDIA_URL = '/foodgram_media/'
 MEDIA_ROOT = BASE_DIR / 'foodgram_media/'
 
+IMAGE_RENDITION_WORKERS = int(os.getenv('IMAGE_RENDITION_WORKERS', 2))
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 CSRF_TRUSTED_ORIGINS = ['https://foodgram.tech']
@@ -134,9 +164,38 @@ REST_FRAMEWORK = {
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'foodgram_api.authentication.CachedTokenAuthentication',
     ],
 
     'DEFAULT_PAGINATION_CLASS': 'foodgram_api.pagination.CustomPagination',
     'PAGE_SIZE': 6,
 }
+
+# Бюджеты запросов для RequestTimingMiddleware: число SQL-запросов и
+# длительность в миллисекундах. Ключ - 'ИмяПредставления.действие'.
+REQUEST_BUDGETS = {
+    'default': {'queries': 20, 'duration': 300},
+    'RecipeViewSet.list': {'queries': 10, 'duration': 300},
+    'RecipeViewSet.retrieve': {'queries': 10, 'duration': 200},
+    'RecipeViewSet.feed': {'queries': 10, 'duration': 300},
+    'RecipeViewSet.similar': {'queries': 10, 'duration': 300},
+    'SubscriptionViewSet.get': {'queries': 10, 'duration': 300},
+    'RecipeViewSet.download_shopping_cart': {'queries': 5, 'duration': 1000},
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'foodgram_backend.timing': {
+            'handlers': ('console',),
+            'level': os.getenv('REQUEST_TIMING_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+    },
+}
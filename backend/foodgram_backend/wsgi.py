@@ -5,3 +5,12 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram_backend.settings')
 
 application = get_wsgi_application()
+
+from django.db import DatabaseError  # noqa: E402
+
+from recipes_app.ingredient_index import ingredient_index  # noqa: E402
+
+try:
+    ingredient_index.refresh()
+except DatabaseError:
+    pass
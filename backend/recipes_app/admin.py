@@ -1,4 +1,6 @@
 from django.contrib import admin
+from django.db import transaction
+from django.utils import timezone
 
 from recipes_app.models import (
     Favorite,
@@ -6,8 +8,11 @@ from recipes_app.models import (
     Recipe,
     RecipeIngredientQuantity,
     ShoppingCart,
+    ShoppingListItem,
     Tag,
 )
+from recipes_app.shopping_list import (get_recipe_quantities,
+                                       update_recipe_in_shopping_lists)
 
 
 class TagAdmin(admin.ModelAdmin):
@@ -31,6 +36,10 @@ class IngredientAdmin(admin.ModelAdmin):
 
 
 class RecipeIngredientQuantityAdmin(admin.ModelAdmin):
+    """
+    Изменение ингредиента рецепта обновляет updated_at рецепта:
+    от него зависят ETag и закэшированный фрагмент рецепта.
+    """
     list_display = (
         'pk',
         'ingredient',
@@ -38,6 +47,43 @@ class RecipeIngredientQuantityAdmin(admin.ModelAdmin):
         'amount'
     )
 
+    def sync_recipes(self, old_quantities):
+        for recipe_id, quantities in old_quantities.items():
+            update_recipe_in_shopping_lists(recipe_id, quantities)
+        Recipe.objects.filter(pk__in=old_quantities).update(
+            updated_at=timezone.now()
+        )
+
+    @transaction.atomic
+    def save_model(self, request, obj, form, change):
+        recipe_ids = {obj.recipe_id}
+        if change:
+            recipe_ids.add(
+                RecipeIngredientQuantity.objects.get(pk=obj.pk).recipe_id
+            )
+        old_quantities = {
+            recipe_id: get_recipe_quantities(recipe_id)
+            for recipe_id in recipe_ids
+        }
+        super().save_model(request, obj, form, change)
+        self.sync_recipes(old_quantities)
+
+    @transaction.atomic
+    def delete_queryset(self, request, queryset):
+        old_quantities = {
+            recipe_id: get_recipe_quantities(recipe_id)
+            for recipe_id in set(
+                queryset.values_list('recipe_id', flat=True)
+            )
+        }
+        super().delete_queryset(request, queryset)
+        self.sync_recipes(old_quantities)
+
+    def delete_model(self, request, obj):
+        self.delete_queryset(
+            request, RecipeIngredientQuantity.objects.filter(pk=obj.pk)
+        )
+
 
 class RecipeIngredientQuantityInline(admin.TabularInline):
     model = Recipe.ingredients.through
@@ -54,8 +100,17 @@ class RecipeAdmin(admin.ModelAdmin):
     list_filter = ('name', 'author', 'tags')
     readonly_fields = ('is_favorite',)
 
+    @transaction.atomic
+    def save_related(self, request, form, formsets, change):
+        if not change:
+            return super().save_related(request, form, formsets, change)
+
+        old_quantities = get_recipe_quantities(form.instance.pk)
+        super().save_related(request, form, formsets, change)
+        update_recipe_in_shopping_lists(form.instance.pk, old_quantities)
+
     def is_favorite(self, instance):
-        return instance.users_favorites.count()
+        return instance.favorites_count
 
     is_favorite.short_description = 'В избранном'
 
@@ -76,9 +131,20 @@ class ShoppingCartAdmin(admin.ModelAdmin):
     )
 
 
+class ShoppingListItemAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'user',
+        'ingredient',
+        'amount'
+    )
+    readonly_fields = ('user', 'ingredient', 'amount')
+
+
 admin.site.register(Tag, TagAdmin)
 admin.site.register(Ingredient, IngredientAdmin)
 admin.site.register(RecipeIngredientQuantity, RecipeIngredientQuantityAdmin)
 admin.site.register(Recipe, RecipeAdmin)
 admin.site.register(Favorite, FavoriteAdmin)
 admin.site.register(ShoppingCart, ShoppingCartAdmin)
+admin.site.register(ShoppingListItem, ShoppingListItemAdmin)
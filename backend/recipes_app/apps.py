@@ -5,3 +5,6 @@ class RecipesAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'recipes_app'
     verbose_name = 'Рецепты, ингредиенты и теги'
+
+    def ready(self):
+        import recipes_app.signals  # noqa: F401
@@ -1,15 +1,79 @@
+from datetime import datetime, timedelta, timezone
+
 TAG_SLUG_MAX_LENGTH = 200
 TAG_NAME_MAX_LENGTH = 200
 TAG_COLOR_MAX_LENGTH = 7
+TAG_MASK_BITS = 63
 
 INGREDIENT_AMOUNT_MIN_VALUE = 1
 INGREDIENT_AMOUNT_MAX_VALUE = 9999
 INGREDIENT_NAME_MAX_LENGTH = 200
 INGREDIENT_UNIT_MAX_LENGTH = 200
+INGREDIENTS_LOAD_BATCH_SIZE = 1000
+INGREDIENTS_JSON_READ_SIZE = 64 * 1024
 
 RECIPE_NAME_MAX_LENGTH = 200
 RECIPE_IMAGE_MAX_VALUE = 5
 RECIPE_COOKING_TIME_MIN_VALUE = 1
 RECIPE_COOKING_TIME_MAX_VALUE = 9999
+RECIPE_BULK_IMPORT_MAX_SIZE = 1000
+RECIPE_BATCH_MAX_SIZE = 1000
+RECIPE_BULK_IMPORT_BATCH_SIZE = 100
 
 IMAGE_EXTENSION_TYPE = -1
+IMAGE_RENDITIONS_DIR = 'renditions'
+IMAGE_RENDITION_QUALITY = 80
+IMAGE_RENDITION_SIZES = {
+    'thumbnail': (240, 240),
+    'card': (640, 640),
+    'full': (1600, 1600),
+}
+IMAGE_RENDITION_FORMATS = {
+    'jpeg': {'pil_format': 'JPEG', 'extension': 'jpg', 'modes': ('RGB', 'L')},
+    'webp': {'pil_format': 'WEBP', 'extension': 'webp',
+             'modes': ('RGB', 'RGBA')},
+}
+
+INGREDIENTS_VERSION_KEY = 'ingredients_version'
+TAGS_VERSION_KEY = 'tags_version'
+
+RECIPE_FRAGMENT_KEY = 'recipe_fragment:{pk}:{updated_at}:{base_url}'
+RECIPE_FRAGMENT_TIMEOUT = 60 * 60
+
+RECIPE_ORDERING_POPULAR = 'popular'
+POPULARITY_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+POPULARITY_HALF_LIFE = timedelta(days=7)
+POPULARITY_FAVORITE_WEIGHT = 1.0
+POPULARITY_CART_WEIGHT = 1.0
+POPULARITY_CHUNK_SIZE = 1000
+
+SIMILAR_RECIPES_SIZE = 12
+SIMILAR_NEIGHBOURS_SIZE = 24
+SIMILAR_TAG_WEIGHT = 0.5
+SIMILAR_BATCH_SIZE = 500
+SIMILAR_BLOCK_SIZE = 10 ** 7
+SIMILAR_CHUNK_SIZE = 5000
+
+RECIPE_SEARCH_CONFIG = 'russian'
+
+SEED_CHUNK_SIZE = 5000
+SEED_ZIPF_EXPONENT = 1.1
+SEED_INGREDIENTS_PER_RECIPE = (3, 12)
+SEED_TAGS_PER_RECIPE = (1, 3)
+SEED_INGREDIENT_AMOUNT = (1, 500)
+SEED_COOKING_TIME = (5, 180)
+SEED_PASSWORD = 'Seed-password-1'
+SEED_IMAGE = 'recipes/images/seed.png'
+SEED_ACTIVITY_PERIOD = timedelta(days=90)
+SEED_TAGS = (
+    ('Завтрак', '#E26C2D', 'breakfast'),
+    ('Обед', '#49B64E', 'lunch'),
+    ('Ужин', '#8775D2', 'dinner'),
+)
+SEED_WORDS = (
+    'запечённый', 'домашний', 'быстрый', 'пряный', 'нежный', 'летний',
+    'салат', 'суп', 'пирог', 'рагу', 'омлет', 'паста', 'соус', 'каша',
+    'с', 'из', 'и', 'по-деревенски', 'на', 'сковороде', 'духовке',
+    'нарезать', 'смешать', 'обжарить', 'довести', 'до', 'кипения',
+    'посолить', 'поперчить', 'подавать', 'горячим', 'минут',
+)
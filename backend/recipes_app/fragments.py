@@ -0,0 +1,86 @@
+import hashlib
+
+from django.core.cache import cache
+
+from foodgram_api.versions import get_local_version, get_version
+from recipes_app.constants import (INGREDIENTS_VERSION_KEY,
+                                   RECIPE_FRAGMENT_KEY,
+                                   RECIPE_FRAGMENT_TIMEOUT,
+                                   TAGS_VERSION_KEY)
+from recipes_app.images import renditions_exist
+from users_app.constants import PROFILE_VERSION_KEY
+
+
+def get_fragment_key(recipe, base_url):
+    """
+    Ключ зависит от времени изменения рецепта и адреса сайта,
+    от которого строятся абсолютные ссылки на изображения.
+    """
+    return RECIPE_FRAGMENT_KEY.format(
+        pk=recipe.pk,
+        updated_at=recipe.updated_at.timestamp(),
+        base_url=hashlib.md5(base_url.encode()).hexdigest()
+    )
+
+
+def get_catalogue_versions():
+    return (
+        get_local_version(TAGS_VERSION_KEY)[0],
+        get_local_version(INGREDIENTS_VERSION_KEY)[0],
+    )
+
+
+def get_renditions_ready(recipe):
+    return not recipe.image or renditions_exist(recipe.image.name)
+
+
+def get_fragments(recipes, base_url):
+    """
+    Возвращает {id рецепта: фрагмент} для рецептов, чьи фрагменты
+    есть в кэше и не устарели, и версии, с которыми нужно сохранить
+    остальные. Фрагменты и версии профилей авторов читаются одним
+    обращением к кэшу. Версии берутся до сериализации, чтобы данные,
+    изменённые во время неё, не сохранились под новой версией.
+    """
+    keys = {get_fragment_key(recipe, base_url): recipe for recipe in recipes}
+    profile_keys = {
+        recipe.author_id: PROFILE_VERSION_KEY.format(recipe.author_id)
+        for recipe in recipes
+    }
+    cached = cache.get_many([*keys, *profile_keys.values()])
+    versions = {
+        'catalogues': get_catalogue_versions(),
+        'profiles': {
+            author_id: (cached.get(key) or get_version(key))[0]
+            for author_id, key in profile_keys.items()
+        },
+    }
+
+    fragments = {}
+    for key, recipe in keys.items():
+        entry = cached.get(key)
+        if (
+            entry is None
+            or entry['catalogues'] != versions['catalogues']
+            or entry['profile'] != versions['profiles'][recipe.author_id]
+        ):
+            continue
+        if not entry['renditions_ready'] and get_renditions_ready(recipe):
+            continue
+        fragments[recipe.pk] = entry['data']
+    return fragments, versions
+
+
+def set_fragments(rendered, base_url, versions):
+    """
+    Кэширует фрагменты rendered - пары (рецепт, данные) - с версиями,
+    полученными от get_fragments.
+    """
+    cache.set_many({
+        get_fragment_key(recipe, base_url): {
+            'data': data,
+            'catalogues': versions['catalogues'],
+            'profile': versions['profiles'][recipe.author_id],
+            'renditions_ready': get_renditions_ready(recipe),
+        } for recipe, data in rendered
+    }, RECIPE_FRAGMENT_TIMEOUT)
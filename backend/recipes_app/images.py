@@ -0,0 +1,142 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from recipes_app.constants import (IMAGE_RENDITION_FORMATS,
+                                   IMAGE_RENDITION_QUALITY,
+                                   IMAGE_RENDITION_SIZES,
+                                   IMAGE_RENDITIONS_DIR)
+
+logger = logging.getLogger(__name__)
+
+executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'IMAGE_RENDITION_WORKERS', 2),
+    thread_name_prefix='image-renditions'
+)
+_scheduled = set()
+_failed = set()
+_scheduled_lock = threading.Lock()
+
+
+def get_rendition_name(image_name, size, image_format):
+    directory, file_name = os.path.split(image_name)
+    stem = os.path.splitext(file_name)[0]
+    extension = IMAGE_RENDITION_FORMATS[image_format]['extension']
+    return os.path.join(
+        directory, IMAGE_RENDITIONS_DIR, f'{stem}_{size}.{extension}'
+    )
+
+
+def get_marker_name(image_name):
+    """
+    Последняя создаваемая копия: если она есть, готовы и остальные.
+    """
+    return get_rendition_name(
+        image_name,
+        list(IMAGE_RENDITION_SIZES)[-1],
+        list(IMAGE_RENDITION_FORMATS)[-1]
+    )
+
+
+def renditions_exist(image_name):
+    return default_storage.exists(get_marker_name(image_name))
+
+
+def get_renditions_time(image_name):
+    """
+    Время создания копий изображения или None, пока их нет.
+    """
+    marker_name = get_marker_name(image_name)
+    if not default_storage.exists(marker_name):
+        return None
+    return default_storage.get_modified_time(marker_name)
+
+
+def generate_renditions(image_name):
+    """
+    Создаёт уменьшенные копии изображения во всех размерах и форматах.
+    """
+    with default_storage.open(image_name) as image_file:
+        image = ImageOps.exif_transpose(Image.open(image_file))
+        image.load()
+
+    for size, (width, height) in IMAGE_RENDITION_SIZES.items():
+        rendition = image.copy()
+        rendition.thumbnail((width, height), Image.LANCZOS)
+        for image_format, options in IMAGE_RENDITION_FORMATS.items():
+            converted = rendition
+            if converted.mode not in options['modes']:
+                converted = converted.convert('RGB')
+            buffer = BytesIO()
+            converted.save(
+                buffer,
+                options['pil_format'],
+                quality=IMAGE_RENDITION_QUALITY,
+                optimize=True
+            )
+            name = get_rendition_name(image_name, size, image_format)
+            if default_storage.exists(name):
+                default_storage.delete(name)
+            default_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def run_generation(image_name, force=False):
+    try:
+        if force or not renditions_exist(image_name):
+            generate_renditions(image_name)
+    except Exception:
+        logger.exception('Не удалось создать копии изображения %s',
+                         image_name)
+        with _scheduled_lock:
+            _failed.add(image_name)
+    finally:
+        with _scheduled_lock:
+            _scheduled.discard(image_name)
+
+
+def schedule_renditions(image_name):
+    """
+    Ставит создание копий в очередь пула потоков, если они ещё
+    не созданы и не создаются. После ошибки повторных попыток в этом
+    процессе не делается.
+    """
+    if not image_name:
+        return
+    with _scheduled_lock:
+        if image_name in _scheduled or image_name in _failed:
+            return
+        _scheduled.add(image_name)
+    executor.submit(run_generation, image_name)
+
+
+def get_rendition_urls(image, build_url=None):
+    """
+    Возвращает ссылки на копии изображения по размерам и форматам.
+    Пока копий нет, отдаёт ссылку на оригинал и ставит их создание в
+    очередь.
+    """
+    if not image:
+        return None
+
+    ready = renditions_exist(image.name)
+    if not ready:
+        schedule_renditions(image.name)
+
+    urls = {}
+    for size in IMAGE_RENDITION_SIZES:
+        urls[size] = {}
+        for image_format in IMAGE_RENDITION_FORMATS:
+            url = (
+                default_storage.url(
+                    get_rendition_name(image.name, size, image_format)
+                ) if ready else image.url
+            )
+            urls[size][image_format] = build_url(url) if build_url else url
+    return urls
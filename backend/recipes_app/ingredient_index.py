@@ -0,0 +1,69 @@
+import threading
+from bisect import bisect_left
+
+from foodgram_api.versions import bump_version, get_local_version
+from recipes_app.constants import INGREDIENTS_VERSION_KEY
+from recipes_app.models import Ingredient
+from recipes_app.serializers import IngredientSerializer
+
+PREFIX_UPPER_BOUND = chr(0x10FFFF)
+
+
+class IngredientIndex:
+    """
+    Индекс ингредиентов по префиксу названия в памяти процесса.
+    Хранит отсортированный массив названий в нижнем регистре и готовые
+    данные сериализатора. Пересобирается при смене версии в кэше.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._index = ((), (), ())
+
+    def build(self):
+        rows = IngredientSerializer(
+            Ingredient.objects.order_by('id'), many=True
+        ).data
+        all_rows = [dict(row) for row in rows]
+        entries = sorted(
+            (row['name'].casefold(), row['id'], row) for row in all_rows
+        )
+        names = [name for name, _, _ in entries]
+        rows = [row for _, _, row in entries]
+        self._index = (names, rows, all_rows)
+
+    def refresh(self, version=None):
+        """
+        version - уже прочитанная версия справочника, чтобы не читать её
+        повторно.
+        """
+        if version is None:
+            version, _ = get_local_version(INGREDIENTS_VERSION_KEY)
+        if version == self._version:
+            return
+
+        with self._lock:
+            if version != self._version:
+                self.build()
+                self._version = version
+
+    def search(self, prefix='', version=None):
+        """
+        Возвращает ингредиенты, название которых начинается с prefix
+        без учёта регистра, в порядке id - как IngredientFilter.
+        """
+        self.refresh(version)
+        names, rows, all_rows = self._index
+        if not prefix:
+            return all_rows
+
+        prefix = prefix.casefold()
+        start = bisect_left(names, prefix)
+        end = bisect_left(names, prefix + PREFIX_UPPER_BOUND, start)
+        return sorted(rows[start:end], key=lambda row: row['id'])
+
+    def invalidate(self):
+        bump_version(INGREDIENTS_VERSION_KEY)
+
+
+ingredient_index = IngredientIndex()
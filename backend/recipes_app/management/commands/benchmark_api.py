@@ -0,0 +1,147 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from foodgram_api.benchmark import (BenchmarkError,
+                                    compare_with_baseline,
+                                    load_scenario,
+                                    make_baseline,
+                                    run_benchmark)
+from foodgram_api.constants import (BENCHMARK_COLLECTION,
+                                    BENCHMARK_ITERATIONS,
+                                    BENCHMARK_PERCENTILES,
+                                    BENCHMARK_SCENARIO,
+                                    BENCHMARK_TOLERANCE,
+                                    BENCHMARK_WARMUP)
+from users_app.models import User
+
+
+class Command(BaseCommand):
+    help = ('Нагрузочный тест API по запросам Postman-коллекции: '
+            'перцентили задержки, запросы в секунду и SQL-запросы '
+            'на каждый запрос.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--collection',
+            default=str(
+                settings.BASE_DIR.parent
+                / 'postman-collection' / BENCHMARK_COLLECTION
+            ),
+            help='Путь к Postman-коллекции.'
+        )
+        parser.add_argument(
+            '--url',
+            help=('Адрес запущенного сервера, например '
+                  'http://127.0.0.1:8000. Без него запросы выполняются '
+                  'в этом процессе.')
+        )
+        parser.add_argument(
+            '--user',
+            help='Email пользователя, от имени которого идут запросы.'
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=BENCHMARK_ITERATIONS,
+            help='Сколько раз выполнить каждый шаг сценария.'
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=1,
+            help='Число параллельных потоков.'
+        )
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=BENCHMARK_WARMUP,
+            help='Прогревочные повторы шага, не попадающие в отчёт.'
+        )
+        parser.add_argument(
+            '--baseline',
+            help='JSON с базовыми значениями: превышение - ошибка.'
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=BENCHMARK_TOLERANCE,
+            help='Допустимый рост p95 относительно базового, доля.'
+        )
+        parser.add_argument(
+            '--save-baseline',
+            help='Сохранить результаты как базовые в этот файл.'
+        )
+
+    def get_user(self, email):
+        users = User.objects.filter(is_active=True).order_by('id')
+        user = users.filter(email=email).first() if email else users.first()
+        if user is None:
+            raise CommandError('Пользователь для теста не найден.')
+        return user
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1 or options['concurrency'] < 1:
+            raise CommandError(
+                'iterations и concurrency должны быть больше нуля.'
+            )
+        try:
+            steps = load_scenario(options['collection'], BENCHMARK_SCENARIO)
+            results, rps, distinct = run_benchmark(
+                steps,
+                self.get_user(options['user']),
+                base_url=options['url'],
+                iterations=options['iterations'],
+                concurrency=options['concurrency'],
+                warmup=options['warmup']
+            )
+        except (BenchmarkError, OSError) as error:
+            raise CommandError(error)
+
+        if distinct < options['concurrency']:
+            self.stderr.write(self.style.WARNING(
+                f'Distinct recipes/authors for only {distinct} threads: '
+                'add and remove requests may conflict.'
+            ))
+        self.write_report(results, rps)
+
+        if options['save_baseline']:
+            with open(options['save_baseline'], 'w', encoding='utf-8') as f:
+                json.dump(make_baseline(results), f, ensure_ascii=False,
+                          indent=2)
+            self.stdout.write(f'Baseline saved to {options["save_baseline"]}')
+
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as f:
+                baseline = json.load(f)
+            regressions = compare_with_baseline(
+                results, baseline, options['tolerance']
+            )
+            if regressions:
+                raise CommandError(
+                    'Превышены базовые значения:\n' + '\n'.join(regressions)
+                )
+            self.stdout.write(self.style.SUCCESS('Baseline check passed'))
+
+    def write_report(self, results, rps):
+        percentiles = [f'p{percent}' for percent in BENCHMARK_PERCENTILES]
+        width = max(len(result['name']) for result in results) + 2
+        header = (
+            f'{"request":<{width}}{"count":>7}{"errors":>8}'
+            + ''.join(f'{name + " ms":>10}' for name in percentiles)
+            + f'{"rps":>9}{"queries":>9}'
+        )
+        self.stdout.write(header)
+        for result in results:
+            queries = result['queries']
+            self.stdout.write(
+                f'{result["name"]:<{width}}{result["count"]:>7}'
+                f'{result["errors"]:>8}'
+                + ''.join(f'{result[name]:>10.1f}' for name in percentiles)
+                + f'{result["rps"]:>9.1f}'
+                + (f'{queries:>9.1f}' if queries is not None else f'{"-":>9}')
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Total: {rps:.1f} requests per second'
+        ))
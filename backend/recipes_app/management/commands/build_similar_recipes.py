@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes_app.similarity import build_neighbours, fold_in_neighbours
+
+
+class Command(BaseCommand):
+    help = ('Рассчитывает похожие рецепты по ингредиентам и тегам. '
+            'С --new только добавляет новые и изменённые рецепты, '
+            'полный пересчёт нужен реже.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--new',
+            action='store_true',
+            help='Добавить только рецепты, для которых нет соседей.'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            if options['new']:
+                count = fold_in_neighbours()
+                message = f'Folded in {count} recipes'
+            else:
+                count = build_neighbours()
+                message = f'Stored {count} recipe neighbours'
+        except ImportError as error:
+            raise CommandError(
+                f'Для расчёта нужны numpy и scipy из requirements.txt: {error}'
+            )
+        self.stdout.write(self.style.SUCCESS(message))
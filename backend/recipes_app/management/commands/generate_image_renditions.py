@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from recipes_app.images import run_generation
+from recipes_app.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Создаёт уменьшенные копии изображений рецептов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Пересоздать уже существующие копии.'
+        )
+
+    def handle(self, *args, **options):
+        image_names = Recipe.objects.exclude(image='').values_list(
+            'image', flat=True
+        ).distinct().iterator()
+        count = 0
+        for image_name in image_names:
+            run_generation(image_name, force=options['force'])
+            count += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed images of {count} recipes'
+        ))
@@ -1,34 +1,154 @@
 import csv
+import json
+import os
+import time
+from itertools import islice
 
-from django.core.management.base import BaseCommand
-from recipes_app.models import Ingredient
 from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
 
+from recipes_app.constants import (INGREDIENT_NAME_MAX_LENGTH,
+                                   INGREDIENT_UNIT_MAX_LENGTH,
+                                   INGREDIENTS_JSON_READ_SIZE,
+                                   INGREDIENTS_LOAD_BATCH_SIZE)
+from recipes_app.ingredient_index import ingredient_index
+from recipes_app.models import Ingredient
 
-class Command(BaseCommand):
+JSON_SEPARATORS = ' \t\r\n,'
+
+
+def read_csv(file):
+    yield from csv.DictReader(file)
 
-    def handle(self, *args, **kwargs):
-        file_name = 'ingredients.csv'
-        csv_path = f'{settings.BASE_DIR}/data/{file_name}'
 
+def read_json(file):
+    """
+    Читает элементы JSON-массива по одному, не загружая файл целиком.
+    """
+    decoder = json.JSONDecoder()
+    buffer = file.read(INGREDIENTS_JSON_READ_SIZE).lstrip()
+    if not buffer.startswith('['):
+        raise ValueError('Ожидается JSON-массив.')
+    buffer = buffer[1:]
+    while True:
+        buffer = buffer.lstrip(JSON_SEPARATORS)
+        if buffer.startswith(']'):
+            return
         try:
-            with open(csv_path, encoding='utf-8') as csvfile:
-                reader = csv.DictReader(csvfile)
-                ingredients_data = [
-                    {
-                        'name': row['name'],
-                        'measurement_unit': row['measurement_unit']
-                    } for row in reader
-                ]
-
-            Ingredient.objects.bulk_create(
-                [Ingredient(**ingredient) for ingredient in ingredients_data]
-            )
-
-            self.stdout.write(self.style.SUCCESS(
-                f'Successfully created {len(ingredients_data)}'
-                f' Ingredient objects from {csv_path}'
-            ))
+            item, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            chunk = file.read(INGREDIENTS_JSON_READ_SIZE)
+            if not chunk:
+                raise
+            buffer += chunk
+            continue
+        yield item
+        buffer = buffer[end:]
+
+
+READERS = {
+    '.csv': read_csv,
+    '.json': read_json,
+}
+
+
+def clean_row(row):
+    """
+    Возвращает ключ (название, единица измерения) или None для
+    некорректной строки.
+    """
+    if not isinstance(row, dict):
+        return None
+    name = (row.get('name') or '').strip()
+    unit = (row.get('measurement_unit') or '').strip()
+    if (
+        not name or not unit
+        or len(name) > INGREDIENT_NAME_MAX_LENGTH
+        or len(unit) > INGREDIENT_UNIT_MAX_LENGTH
+    ):
+        return None
+    return name, unit
 
+
+class Command(BaseCommand):
+    help = ('Загружает ингредиенты из CSV или JSON пачками. Уже '
+            'существующие ингредиенты пропускаются, повторный запуск '
+            'безопасен.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            nargs='?',
+            default=os.path.join(settings.BASE_DIR, 'data', 'ingredients.csv'),
+            help='Файл .csv или .json с полями name и measurement_unit.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=INGREDIENTS_LOAD_BATCH_SIZE
+        )
+
+    def load_batch(self, keys):
+        """
+        Вставляет ключи пачки, которых ещё нет в базе. ignore_conflicts
+        защищает от параллельной загрузки тех же ингредиентов и молча
+        пропускает конфликтующие строки, поэтому число вставленных
+        считается по строкам с этими названиями до и после вставки.
+        """
+        ingredients = Ingredient.objects.filter(
+            name__in={name for name, _ in keys}
+        )
+        existing = set(ingredients.values_list('name', 'measurement_unit'))
+        new = [key for key in keys if key not in existing]
+        if not new:
+            return 0
+        Ingredient.objects.bulk_create(
+            [Ingredient(name=name, measurement_unit=unit)
+             for name, unit in new],
+            ignore_conflicts=True
+        )
+        return ingredients.count() - len(existing)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        reader = READERS.get(os.path.splitext(path)[1].lower())
+        if reader is None:
+            raise CommandError('Поддерживаются файлы .csv и .json.')
+        if options['batch_size'] < 1:
+            raise CommandError('batch-size должен быть больше нуля.')
+
+        total = inserted = invalid = 0
+        start = time.perf_counter()
+        try:
+            with open(path, encoding='utf-8') as file:
+                rows = reader(file)
+                while True:
+                    batch = list(islice(rows, options['batch_size']))
+                    if not batch:
+                        break
+                    total += len(batch)
+                    keys = {}
+                    for row in batch:
+                        key = clean_row(row)
+                        if key is None:
+                            invalid += 1
+                        else:
+                            keys[key] = None
+                    if keys:
+                        inserted += self.load_batch(list(keys))
         except FileNotFoundError:
-            print(f'Файл {file_name} не найден.')
+            raise CommandError(f'Файл {path} не найден.')
+        except ValueError as error:
+            raise CommandError(f'Не удалось прочитать {path}: {error}')
+
+        if inserted:
+            ingredient_index.invalidate()
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {total} rows from {path} in {elapsed:.2f} s'
+            f' ({total / elapsed if elapsed else 0:.0f} rows/s):'
+            f' inserted {inserted},'
+            f' skipped {total - inserted - invalid} existing or duplicate,'
+            f' {invalid} invalid'
+        ))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from foodgram_api.constants import SHOPPING_CART_CHUNK_SIZE
+from recipes_app.shopping_list import rebuild_shopping_lists
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает списки покупок пользователей из ShoppingCart.'
+
+    def handle(self, *args, **kwargs):
+        count = rebuild_shopping_lists(SHOPPING_CART_CHUNK_SIZE)
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {count} shopping list items'
+        ))
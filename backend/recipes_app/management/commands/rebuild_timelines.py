@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from subscriptions_app.timeline import rebuild_timelines
+
+
+class Command(BaseCommand):
+    help = ('Заполняет ленты подписок заново: последние рецепты авторов, '
+            'на которых подписан каждый пользователь.')
+
+    def handle(self, *args, **kwargs):
+        count = rebuild_timelines()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {count} timeline entries'
+        ))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from foodgram_api.utils import count_subquery
+from recipes_app.models import Favorite, Recipe, ShoppingCart
+from subscriptions_app.models import Subscription
+from users_app.models import User
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает счётчики избранного, списков покупок, рецептов'
+            ' и подписчиков одним UPDATE на таблицу.')
+
+    def handle(self, *args, **kwargs):
+        with transaction.atomic():
+            recipes = Recipe.objects.update(
+                favorites_count=count_subquery(Favorite, 'recipe'),
+                in_carts_count=count_subquery(ShoppingCart, 'recipe'),
+            )
+            users = User.objects.update(
+                recipes_count=count_subquery(Recipe, 'author'),
+                followers_count=count_subquery(Subscription, 'author'),
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Recounted counters for {recipes} recipes and {users} users'
+        ))
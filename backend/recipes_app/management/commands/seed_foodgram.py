@@ -0,0 +1,305 @@
+import csv
+import random
+import time
+from bisect import bisect
+from io import BytesIO, StringIO
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from PIL import Image
+
+from recipes_app.constants import (SEED_ACTIVITY_PERIOD,
+                                   SEED_CHUNK_SIZE,
+                                   SEED_COOKING_TIME,
+                                   SEED_IMAGE,
+                                   SEED_INGREDIENT_AMOUNT,
+                                   SEED_INGREDIENTS_PER_RECIPE,
+                                   SEED_PASSWORD,
+                                   SEED_TAGS,
+                                   SEED_TAGS_PER_RECIPE,
+                                   SEED_WORDS,
+                                   SEED_ZIPF_EXPONENT)
+from recipes_app.models import (Favorite,
+                                Ingredient,
+                                Recipe,
+                                RecipeIngredientQuantity,
+                                ShoppingCart,
+                                Tag)
+from recipes_app.tags_mask import get_tags_mask
+from subscriptions_app.models import Subscription
+from users_app.models import User
+
+
+class ZipfSampler:
+    """
+    Выбирает индекс от 0 до size - 1 по закону Ципфа. Ранги популярности
+    перемешаны, чтобы популярные объекты не совпадали с первыми
+    созданными.
+    """
+    def __init__(self, size, exponent, rng):
+        self.rng = rng
+        self.indexes = list(range(size))
+        rng.shuffle(self.indexes)
+        self.cum_weights = list(accumulate(
+            1 / (rank + 1) ** exponent for rank in range(size)
+        ))
+
+    def sample(self):
+        rank = bisect(
+            self.cum_weights, self.rng.random() * self.cum_weights[-1]
+        )
+        return self.indexes[min(rank, len(self.indexes) - 1)]
+
+    def sample_unique(self, count):
+        count = min(count, len(self.indexes))
+        chosen = {}
+        for _ in range(count * 50):
+            if len(chosen) == count:
+                break
+            chosen[self.sample()] = None
+        return list(chosen)
+
+
+class Command(BaseCommand):
+    help = ('Создаёт воспроизводимый по seed синтетический набор данных: '
+            'пользователей, рецепты, избранное, списки покупок и подписки.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument('--favorites', type=int, default=50000)
+        parser.add_argument('--carts', type=int, default=10000)
+        parser.add_argument('--subscriptions', type=int, default=20000)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument(
+            '--zipf-exponent', type=float, default=SEED_ZIPF_EXPONENT
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=SEED_CHUNK_SIZE,
+            help='Размер пачки bulk_create и COPY.'
+        )
+
+    def write(self, model, fields, rows):
+        """
+        Записывает строки без получения id: в PostgreSQL через COPY,
+        в остальных базах через bulk_create.
+        """
+        start = time.perf_counter()
+        if connection.vendor == 'postgresql':
+            columns = ', '.join(
+                connection.ops.quote_name(model._meta.get_field(field).column)
+                for field in fields
+            )
+            buffer = StringIO()
+            csv.writer(buffer).writerows(rows)
+            buffer.seek(0)
+            with connection.cursor() as cursor:
+                cursor.copy_expert(
+                    f'COPY {connection.ops.quote_name(model._meta.db_table)}'
+                    f' ({columns}) FROM STDIN WITH (FORMAT csv)',
+                    buffer
+                )
+        else:
+            model.objects.bulk_create(
+                [model(**dict(zip(fields, row))) for row in rows],
+                batch_size=self.chunk_size
+            )
+        self.track(model, len(rows), time.perf_counter() - start)
+
+    def track(self, model, rows, seconds):
+        stats = self.stats.setdefault(model._meta.db_table, [0, 0.0])
+        stats[0] += rows
+        stats[1] += seconds
+
+    def create(self, objects):
+        start = time.perf_counter()
+        model = type(objects[0])
+        created = model.objects.bulk_create(
+            objects, batch_size=self.chunk_size
+        )
+        self.track(model, len(created), time.perf_counter() - start)
+        return [obj.pk for obj in created]
+
+    def get_tags(self):
+        tags = list(Tag.objects.order_by('id'))
+        if tags:
+            return tags
+        return [
+            Tag.objects.create(name=name, color=color, slug=slug)
+            for name, color, slug in SEED_TAGS
+        ]
+
+    def save_image(self):
+        if default_storage.exists(SEED_IMAGE):
+            return
+        buffer = BytesIO()
+        Image.new('RGB', (1200, 800), (226, 108, 45)).save(buffer, 'PNG')
+        default_storage.save(SEED_IMAGE, ContentFile(buffer.getvalue()))
+
+    def get_words(self, low, high):
+        return ' '.join(
+            self.rng.choice(SEED_WORDS)
+            for _ in range(self.rng.randint(low, high))
+        )
+
+    def create_users(self, count, seed):
+        password = make_password(SEED_PASSWORD)
+        user_ids = []
+        for start in range(0, count, self.chunk_size):
+            user_ids += self.create([
+                User(
+                    email=f'seed{seed}_{number}@example.com',
+                    username=f'seed{seed}_{number}',
+                    first_name=self.get_words(1, 1).capitalize(),
+                    last_name=self.get_words(1, 1).capitalize(),
+                    password=password
+                ) for number in range(
+                    start, min(start + self.chunk_size, count)
+                )
+            ])
+        return user_ids
+
+    def create_recipes(self, count, user_ids, tags, ingredient_ids):
+        authors = ZipfSampler(len(user_ids), self.exponent, self.rng)
+        tag_sampler = ZipfSampler(len(tags), self.exponent, self.rng)
+        ingredients = ZipfSampler(
+            len(ingredient_ids), self.exponent, self.rng
+        )
+
+        recipe_ids = []
+        for start in range(0, count, self.chunk_size):
+            recipes, recipe_tags, quantities = [], [], []
+            for number in range(start, min(start + self.chunk_size, count)):
+                chosen_tags = [
+                    tags[index] for index in tag_sampler.sample_unique(
+                        self.rng.randint(*SEED_TAGS_PER_RECIPE)
+                    )
+                ]
+                recipes.append(Recipe(
+                    name=f'{self.get_words(2, 4).capitalize()} {number}',
+                    text=self.get_words(20, 60).capitalize() + '.',
+                    image=SEED_IMAGE,
+                    cooking_time=self.rng.randint(*SEED_COOKING_TIME),
+                    author_id=user_ids[authors.sample()],
+                    tags_mask=get_tags_mask(chosen_tags)
+                ))
+                recipe_tags.append([tag.pk for tag in chosen_tags])
+                quantities.append([
+                    (
+                        ingredient_ids[index],
+                        self.rng.randint(*SEED_INGREDIENT_AMOUNT)
+                    ) for index in ingredients.sample_unique(
+                        self.rng.randint(*SEED_INGREDIENTS_PER_RECIPE)
+                    )
+                ])
+
+            chunk_ids = self.create(recipes)
+            self.write(
+                Recipe.tags.through,
+                ('recipe_id', 'tag_id'),
+                [
+                    (recipe_id, tag_id)
+                    for recipe_id, tag_ids in zip(chunk_ids, recipe_tags)
+                    for tag_id in tag_ids
+                ]
+            )
+            self.write(
+                RecipeIngredientQuantity,
+                ('recipe_id', 'ingredient_id', 'amount'),
+                [
+                    (recipe_id, ingredient_id, amount)
+                    for recipe_id, rows in zip(chunk_ids, quantities)
+                    for ingredient_id, amount in rows
+                ]
+            )
+            recipe_ids += chunk_ids
+        return recipe_ids
+
+    def create_pairs(self, model, fields, count, user_ids, target_ids):
+        """
+        Пары (пользователь, объект) без повторов: активность
+        пользователей и популярность объектов распределены по Ципфу.
+        Для подписок пары пользователя с самим собой пропускаются.
+        Если среди полей есть created_at, даты добавления равномерно
+        распределены по последним SEED_ACTIVITY_PERIOD.
+        """
+        users = ZipfSampler(len(user_ids), self.exponent, self.rng)
+        targets = ZipfSampler(len(target_ids), self.exponent, self.rng)
+        pairs = {}
+        for _ in range(count * 10):
+            if len(pairs) >= count:
+                break
+            pair = (user_ids[users.sample()], target_ids[targets.sample()])
+            if pair[0] != pair[1] or model is not Subscription:
+                pairs[pair] = None
+
+        pairs = list(pairs)
+        if 'created_at' in fields:
+            now = timezone.now()
+            pairs = [
+                (*pair, now - self.rng.random() * SEED_ACTIVITY_PERIOD)
+                for pair in pairs
+            ]
+        for start in range(0, len(pairs), self.chunk_size):
+            self.write(model, fields, pairs[start:start + self.chunk_size])
+
+    def handle(self, *args, **options):
+        seed = options['seed']
+        self.rng = random.Random(seed)
+        self.exponent = options['zipf_exponent']
+        self.chunk_size = options['chunk_size']
+        self.stats = {}
+        if options['users'] < 2 or options['recipes'] < 1:
+            raise CommandError('Нужно хотя бы 2 пользователя и 1 рецепт.')
+        if User.objects.filter(username__startswith=f'seed{seed}_').exists():
+            raise CommandError(f'Данные с seed {seed} уже созданы.')
+        ingredient_ids = list(
+            Ingredient.objects.order_by('id').values_list('pk', flat=True)
+        )
+        if not ingredient_ids:
+            raise CommandError(
+                'Нет ингредиентов: сначала выполните load_ingredients.'
+            )
+
+        self.save_image()
+        start = time.perf_counter()
+        with transaction.atomic():
+            user_ids = self.create_users(options['users'], seed)
+            recipe_ids = self.create_recipes(
+                options['recipes'],
+                user_ids,
+                self.get_tags(),
+                ingredient_ids
+            )
+            self.create_pairs(
+                Favorite, ('user_id', 'recipe_id', 'created_at'),
+                options['favorites'], user_ids, recipe_ids
+            )
+            self.create_pairs(
+                ShoppingCart, ('user_id', 'recipe_id', 'created_at'),
+                options['carts'], user_ids, recipe_ids
+            )
+            self.create_pairs(
+                Subscription, ('user_id', 'author_id'),
+                options['subscriptions'], user_ids, user_ids
+            )
+            call_command('recount_counters', stdout=self.stdout)
+            call_command('rebuild_shopping_lists', stdout=self.stdout)
+            call_command('rebuild_timelines', stdout=self.stdout)
+            call_command('update_popularity', '--full', stdout=self.stdout)
+            call_command('build_similar_recipes', stdout=self.stdout)
+
+        for table, (rows, seconds) in self.stats.items():
+            self.stdout.write(
+                f'{table}: {rows} rows in {seconds:.1f} s'
+                f' ({rows / seconds if seconds else 0:.0f} rows/s)'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded dataset {seed} in {time.perf_counter() - start:.1f} s'
+        ))
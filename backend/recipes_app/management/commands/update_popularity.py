@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from recipes_app.popularity import update_popularity
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает оценки популярности рецептов, изменившихся '
+            'с прошлого запуска. Запускается периодически, например '
+            'из cron.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Пересчитать все рецепты.'
+        )
+
+    def handle(self, *args, **options):
+        count = update_popularity(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Updated popularity of {count} recipes'
+        ))
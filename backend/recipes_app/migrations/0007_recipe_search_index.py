@@ -0,0 +1,44 @@
+from django.db import migrations
+
+SEARCH_CONFIG = 'russian'
+SEARCH_INDEX = 'recipe_search_idx'
+
+
+def get_index():
+    from django.contrib.postgres.indexes import GinIndex
+    from django.contrib.postgres.search import SearchVector
+
+    return GinIndex(
+        SearchVector('name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('text', weight='B', config=SEARCH_CONFIG),
+        name=SEARCH_INDEX
+    )
+
+
+def create_search_index(apps, schema_editor):
+    """
+    GIN-индекс по выражению поиска есть только в PostgreSQL,
+    в других базах поиск работает без индекса.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.add_index(apps.get_model('recipes_app', 'Recipe'),
+                            get_index())
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.remove_index(apps.get_model('recipes_app', 'Recipe'),
+                               get_index())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes_app', '0006_shoppinglistitem'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 4.2.11 on 2026-10-18 21:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def create_popularity_rows(apps, schema_editor):
+    """
+    Строки с нулевой оценкой - log2(1 + 0), как у рецептов без
+    действий: расхождение счётчиков с рецептами заставит
+    update_popularity их пересчитать.
+    """
+    Recipe = apps.get_model('recipes_app', 'Recipe')
+    RecipePopularity = apps.get_model('recipes_app', 'RecipePopularity')
+    RecipePopularity.objects.bulk_create(
+        [RecipePopularity(recipe_id=pk)
+         for pk in Recipe.objects.values_list('pk', flat=True)],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes_app', '0008_tag_bit_recipe_tags_mask'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='favorite',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True, default=django.utils.timezone.now, verbose_name='Дата добавления'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='shoppingcart',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True, default=django.utils.timezone.now, verbose_name='Дата добавления'),
+            preserve_default=False,
+        ),
+        migrations.CreateModel(
+            name='RecipePopularity',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='popularity', serialize=False, to='recipes_app.recipe', verbose_name='Рецепт')),
+                ('score', models.FloatField(default=0, verbose_name='Популярность')),
+                ('favorites_count', models.PositiveIntegerField(default=0, verbose_name='В избранном при расчёте')),
+                ('in_carts_count', models.PositiveIntegerField(default=0, verbose_name='В списках покупок при расчёте')),
+                ('computed_at', models.DateTimeField(blank=True, null=True, verbose_name='Время расчёта')),
+            ],
+            options={
+                'verbose_name': 'популярность рецепта',
+                'verbose_name_plural': 'Популярность рецептов',
+                'indexes': [models.Index(fields=['-score', '-recipe'], name='recipe_popularity_score')],
+            },
+        ),
+        migrations.RunPython(create_popularity_rows, migrations.RunPython.noop),
+    ]
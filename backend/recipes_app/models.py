@@ -1,4 +1,5 @@
 from colorfield.fields import ColorField
+from django.core.exceptions import ValidationError
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 
@@ -12,9 +13,11 @@ from recipes_app.constants import (
     RECIPE_IMAGE_MAX_VALUE,
     RECIPE_NAME_MAX_LENGTH,
     TAG_COLOR_MAX_LENGTH,
+    TAG_MASK_BITS,
     TAG_NAME_MAX_LENGTH,
     TAG_SLUG_MAX_LENGTH
 )
+from foodgram_api.utils import CounterFieldsMixin
 from users_app.models import User
 
 
@@ -43,6 +46,12 @@ class Tag(models.Model):
                    ', цифры, дефис и подчёркивание.'
                    f' Ограничение {TAG_SLUG_MAX_LENGTH} символов.'),
     )
+    bit = models.PositiveSmallIntegerField(
+        unique=True,
+        null=True,
+        editable=False,
+        verbose_name='Бит в маске тегов'
+    )
 
     class Meta:
         verbose_name = 'тег'
@@ -51,6 +60,28 @@ class Tag(models.Model):
     def __str__(self):
         return self.name
 
+    @property
+    def mask(self):
+        return 1 << self.bit
+
+    def get_free_bit(self):
+        used = set(Tag.objects.exclude(bit=None).values_list('bit', flat=True))
+        for bit in range(TAG_MASK_BITS):
+            if bit not in used:
+                return bit
+        raise ValidationError(
+            f'Можно создать не больше {TAG_MASK_BITS} тегов.'
+        )
+
+    def clean(self):
+        if self.bit is None:
+            self.bit = self.get_free_bit()
+
+    def save(self, *args, **kwargs):
+        if self.bit is None:
+            self.bit = self.get_free_bit()
+        super().save(*args, **kwargs)
+
 
 class Ingredient(models.Model):
     """
@@ -84,10 +115,12 @@ class Ingredient(models.Model):
         return self.name
 
 
-class Recipe(models.Model):
+class Recipe(CounterFieldsMixin, models.Model):
     """
     Модель рецептов.
     """
+    counter_fields = ('favorites_count', 'in_carts_count')
+
     name = models.CharField(
         blank=False,
         verbose_name='Название',
@@ -100,6 +133,10 @@ class Recipe(models.Model):
         verbose_name='Дата публикации',
         db_index=True
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения'
+    )
     text = models.TextField(
         blank=False,
         verbose_name='Описание рецепта',
@@ -137,6 +174,22 @@ class Recipe(models.Model):
                                   related_name='recipes_tags',
                                   verbose_name='Теги'
                                   )
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='В избранном'
+    )
+    in_carts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='В списках покупок'
+    )
+    tags_mask = models.BigIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Маска тегов',
+        help_text='Битовая маска тегов рецепта по полю Tag.bit.'
+    )
 
     def __str__(self):
         return self.name
@@ -207,6 +260,11 @@ class AbstractUserRecipeRelation(models.Model):
         on_delete=models.CASCADE,
         verbose_name='Рецепт'
     )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        verbose_name='Дата добавления'
+    )
 
     class Meta:
         abstract = True
@@ -236,3 +294,126 @@ class ShoppingCart(AbstractUserRecipeRelation):
 
     def __str__(self):
         return f'Список покупок {self.user}'
+
+
+class ShoppingListItem(models.Model):
+    """
+    Сумма ингредиента по всем рецептам из списка покупок пользователя.
+    Поддерживается при изменении списка покупок и ингредиентов рецептов.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='shopping_list',
+        verbose_name='Пользователь',
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name='shopping_list_items',
+        verbose_name='Ингредиент',
+    )
+    amount = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество'
+    )
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'ingredient'),
+                name='unique_shopping_list_item'
+            ),
+        )
+        verbose_name = 'позиция списка покупок'
+        verbose_name_plural = 'Позиции списков покупок'
+
+    def __str__(self):
+        return f'{self.user}: {self.ingredient} - {self.amount}'
+
+
+class RecipePopularity(models.Model):
+    """
+    Популярность рецепта: добавления в избранное и списки покупок,
+    каждое с весом 2 ** ((created_at - POPULARITY_EPOCH) / период
+    полураспада). Порядок по такой сумме совпадает с порядком по весам,
+    затухающим от текущего момента, поэтому старые оценки не нужно
+    пересчитывать со временем. Хранится log2(1 + сумма): сама сумма
+    переполнила бы float примерно через тысячу периодов.
+    Обновляется командой update_popularity.
+    """
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='popularity',
+        verbose_name='Рецепт'
+    )
+    score = models.FloatField(default=0, verbose_name='Популярность')
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='В избранном при расчёте'
+    )
+    in_carts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='В списках покупок при расчёте'
+    )
+    computed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Время расчёта'
+    )
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('-score', '-recipe'),
+                name='recipe_popularity_score'
+            ),
+        )
+        verbose_name = 'популярность рецепта'
+        verbose_name_plural = 'Популярность рецептов'
+
+    def __str__(self):
+        return f'{self.recipe}: {self.score:.2f}'
+
+
+class RecipeNeighbour(models.Model):
+    """
+    Похожий рецепт: косинусная близость векторов ингредиентов и тегов.
+    Для каждого рецепта хранится не больше SIMILAR_NEIGHBOURS_SIZE
+    соседей, таблицу заполняет команда build_similar_recipes.
+    """
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='neighbours',
+        db_index=False,
+        verbose_name='Рецепт'
+    )
+    neighbour = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Похожий рецепт'
+    )
+    score = models.FloatField(verbose_name='Близость')
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('recipe', 'neighbour'),
+                name='unique_recipe_neighbour'
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('recipe', '-score'),
+                name='recipe_neighbour_score'
+            ),
+        )
+        verbose_name = 'похожий рецепт'
+        verbose_name_plural = 'Похожие рецепты'
+
+    def __str__(self):
+        return f'{self.recipe} - {self.neighbour}: {self.score:.2f}'
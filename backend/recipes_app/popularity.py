@@ -0,0 +1,138 @@
+from math import inf, log2
+
+from django.db import transaction
+from django.db.models import F, Max, Q
+from django.utils import timezone
+
+from recipes_app.constants import (POPULARITY_CART_WEIGHT,
+                                   POPULARITY_CHUNK_SIZE,
+                                   POPULARITY_EPOCH,
+                                   POPULARITY_FAVORITE_WEIGHT,
+                                   POPULARITY_HALF_LIFE)
+from recipes_app.models import (Favorite,
+                                Recipe,
+                                RecipePopularity,
+                                ShoppingCart)
+
+ACTIVITY_WEIGHTS = (
+    (Favorite, POPULARITY_FAVORITE_WEIGHT),
+    (ShoppingCart, POPULARITY_CART_WEIGHT),
+)
+
+
+def get_log_weight(created_at, weight):
+    """
+    Двоичный логарифм веса действия. Сам вес растёт вдвое за каждый
+    период полураспада после POPULARITY_EPOCH и через тысячу периодов
+    не помещается во float, логарифм растёт линейно.
+    """
+    return log2(weight) + (
+        (created_at - POPULARITY_EPOCH) / POPULARITY_HALF_LIFE
+    )
+
+
+def add_logs(first, second):
+    """
+    log2(2 ** first + 2 ** second) без вычисления самих степеней.
+    """
+    high, low = max(first, second), min(first, second)
+    if low == -inf:
+        return high
+    return high + log2(1 + 2 ** (low - high))
+
+
+def create_missing_rows():
+    """
+    Строки для рецептов без оценки, например после массовой загрузки.
+    """
+    recipe_ids = Recipe.objects.filter(
+        popularity__isnull=True
+    ).values_list('pk', flat=True)
+    return len(RecipePopularity.objects.bulk_create(
+        [RecipePopularity(recipe_id=pk) for pk in recipe_ids],
+        batch_size=POPULARITY_CHUNK_SIZE,
+        ignore_conflicts=True
+    ))
+
+
+def get_changed_recipe_ids(since):
+    """
+    Рецепты, оценка которых могла измениться: с добавлениями после
+    since или со счётчиками, не совпадающими с последним расчётом.
+    Так находятся и удаления из избранного и списков покупок, и
+    добавления, закоммиченные уже после начала прошлого расчёта.
+    """
+    recipe_ids = set(RecipePopularity.objects.filter(
+        ~Q(favorites_count=F('recipe__favorites_count'))
+        | ~Q(in_carts_count=F('recipe__in_carts_count'))
+    ).values_list('recipe_id', flat=True))
+    for model, _ in ACTIVITY_WEIGHTS:
+        recipe_ids.update(model.objects.filter(
+            created_at__gte=since
+        ).values_list('recipe_id', flat=True).distinct())
+    return recipe_ids
+
+
+def compute_scores(recipe_ids, computed_at):
+    """
+    Оценка - log2(1 + сумма весов): порядок тот же, что по сумме,
+    рецепты без действий получают 0.
+    """
+    scores = {
+        pk: RecipePopularity(recipe_id=pk, score=-inf, computed_at=computed_at)
+        for pk in recipe_ids
+    }
+    for model, weight in ACTIVITY_WEIGHTS:
+        for recipe_id, created_at in model.objects.filter(
+            recipe_id__in=recipe_ids
+        ).values_list('recipe_id', 'created_at'):
+            scores[recipe_id].score = add_logs(
+                scores[recipe_id].score, get_log_weight(created_at, weight)
+            )
+    for popularity in scores.values():
+        popularity.score = add_logs(0, popularity.score)
+    for recipe_id, favorites, in_carts in Recipe.objects.filter(
+        pk__in=recipe_ids
+    ).values_list('pk', 'favorites_count', 'in_carts_count'):
+        scores[recipe_id].favorites_count = favorites
+        scores[recipe_id].in_carts_count = in_carts
+    return scores.values()
+
+
+@transaction.atomic
+def update_popularity(full=False):
+    """
+    Пересчитывает оценки рецептов, изменившихся с прошлого расчёта,
+    или всех рецептов при full и при первом запуске. Возвращает число
+    пересчитанных.
+    """
+    computed_at = timezone.now()
+    create_missing_rows()
+    since = RecipePopularity.objects.aggregate(
+        since=Max('computed_at')
+    )['since']
+    if full or since is None:
+        recipe_ids = list(RecipePopularity.objects.values_list(
+            'recipe_id', flat=True
+        ))
+    else:
+        recipe_ids = list(get_changed_recipe_ids(since))
+
+    for start in range(0, len(recipe_ids), POPULARITY_CHUNK_SIZE):
+        RecipePopularity.objects.bulk_update(
+            compute_scores(
+                recipe_ids[start:start + POPULARITY_CHUNK_SIZE], computed_at
+            ),
+            ('score', 'favorites_count', 'in_carts_count', 'computed_at')
+        )
+    return len(recipe_ids)
+
+
+def order_by_popularity(queryset):
+    """
+    Самые популярные рецепты первыми: чтение идёт по индексу
+    (-score, -recipe) таблицы оценок.
+    """
+    return queryset.filter(popularity__isnull=False).order_by(
+        '-popularity__score', '-id'
+    )
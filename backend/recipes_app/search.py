@@ -0,0 +1,64 @@
+from django.db import connections
+from django.db.models import Case, IntegerField, Q, Value, When
+
+from recipes_app.constants import RECIPE_SEARCH_CONFIG
+
+
+def get_search_vector():
+    """
+    Вектор поиска по названию и описанию рецепта. Совпадает с выражением
+    GIN-индекса recipe_search_idx, поэтому PostgreSQL использует индекс.
+    """
+    from django.contrib.postgres.search import SearchVector
+
+    return (
+        SearchVector('name', weight='A', config=RECIPE_SEARCH_CONFIG)
+        + SearchVector('text', weight='B', config=RECIPE_SEARCH_CONFIG)
+    )
+
+
+def search_postgresql(queryset, value):
+    from django.contrib.postgres.search import SearchQuery, SearchRank
+
+    vector = get_search_vector()
+    query = SearchQuery(
+        value, config=RECIPE_SEARCH_CONFIG, search_type='websearch'
+    )
+    return queryset.annotate(
+        search_vector=vector,
+        search_rank=SearchRank(vector, query)
+    ).filter(search_vector=query)
+
+
+def search_fallback(queryset, value):
+    """
+    Поиск для баз без полнотекстового поиска (SQLite в тестах): каждое
+    слово должно встречаться в названии или описании, совпадение
+    в названии весит больше. В SQLite регистр не учитывается только
+    у латиницы.
+    """
+    words = value.split()
+    if not words:
+        return queryset.annotate(search_rank=Value(0))
+
+    condition = Q()
+    rank = Value(0)
+    for word in words:
+        condition &= Q(name__icontains=word) | Q(text__icontains=word)
+        rank += Case(
+            When(name__icontains=word, then=Value(2)),
+            default=Value(1),
+            output_field=IntegerField()
+        )
+    return queryset.filter(condition).annotate(search_rank=rank)
+
+
+def search_recipes(queryset, value):
+    """
+    Оставляет рецепты, подходящие под запрос, сначала самые релевантные.
+    """
+    if connections[queryset.db].vendor == 'postgresql':
+        queryset = search_postgresql(queryset, value)
+    else:
+        queryset = search_fallback(queryset, value)
+    return queryset.order_by('-search_rank', *queryset.model._meta.ordering)
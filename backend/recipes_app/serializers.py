@@ -2,11 +2,19 @@ import base64
 
 import webcolors
 from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
 from rest_framework import serializers
 
+from foodgram_api.mixins import TimedSerializerMixin
+from foodgram_api.utils import change_counter
+from recipes_app.fragments import get_fragments, set_fragments
+from recipes_app.images import get_rendition_urls, schedule_renditions
 from recipes_app.constants import (INGREDIENT_AMOUNT_MAX_VALUE,
                                    INGREDIENT_AMOUNT_MIN_VALUE,
                                    IMAGE_EXTENSION_TYPE,
+                                   RECIPE_BATCH_MAX_SIZE,
+                                   RECIPE_BULK_IMPORT_BATCH_SIZE,
                                    RECIPE_COOKING_TIME_MAX_VALUE,
                                    RECIPE_COOKING_TIME_MIN_VALUE,
                                    TAG_SLUG_MAX_LENGTH)
@@ -14,8 +22,15 @@ from recipes_app.models import (Favorite,
                                 Ingredient,
                                 Recipe,
                                 RecipeIngredientQuantity,
+                                RecipeNeighbour,
+                                RecipePopularity,
                                 ShoppingCart,
                                 Tag)
+from recipes_app.shopping_list import (get_recipe_quantities,
+                                       update_recipe_in_shopping_lists)
+from recipes_app.tags_mask import get_tags_mask
+from subscriptions_app.timeline import fan_out
+from users_app.models import User
 from users_app.serializers import UserSerializer
 
 
@@ -47,7 +62,38 @@ class Base64ImageField(serializers.ImageField):
         return super().to_internal_value(data)
 
 
-class TagSerializer(serializers.ModelSerializer):
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Берёт объект из context['prefetched'], если он был загружен заранее,
+    иначе делает обычный запрос к базе.
+    """
+    def to_internal_value(self, data):
+        prefetched = self.context.get('prefetched', {}).get(
+            self.get_queryset().model, {}
+        )
+        try:
+            return prefetched[int(data)]
+        except (KeyError, TypeError, ValueError):
+            return super().to_internal_value(data)
+
+
+class ImageRenditionsField(serializers.Field):
+    """
+    Ссылки на уменьшенные копии изображения рецепта в JPEG и WebP.
+    """
+    def __init__(self, **kwargs):
+        kwargs['source'] = 'image'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        request = self.context.get('request')
+        return get_rendition_urls(
+            value, request.build_absolute_uri if request else None
+        )
+
+
+class TagSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     color = Hex2NameColor()
     slug = serializers.RegexField(
         regex=r'^[-a-zA-Z0-9_]+$',
@@ -59,34 +105,63 @@ class TagSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'color', 'slug',)
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(TimedSerializerMixin, serializers.ModelSerializer):
 
     class Meta:
         model = Ingredient
         fields = ('id', 'name', 'measurement_unit',)
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class RecipeSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    images = ImageRenditionsField()
 
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time',)
+        fields = ('id', 'name', 'image', 'images', 'cooking_time',)
 
 
-class FavoriteSerializer(serializers.ModelSerializer):
+class FavoriteSerializer(TimedSerializerMixin, serializers.ModelSerializer):
 
     class Meta:
         model = Favorite
         fields = ('id', 'recipe', 'user')
 
 
-class ShoppingCartSerializer(serializers.ModelSerializer):
+class ShoppingCartSerializer(TimedSerializerMixin,
+                             serializers.ModelSerializer):
 
     class Meta:
         model = ShoppingCart
         fields = ('id', 'recipe', 'user')
 
 
+class RecipeBatchSerializer(serializers.Serializer):
+    """
+    Списки id рецептов для добавления и удаления одним запросом.
+    """
+    add = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        max_length=RECIPE_BATCH_MAX_SIZE,
+        default=list
+    )
+    remove = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        max_length=RECIPE_BATCH_MAX_SIZE,
+        default=list
+    )
+
+    def validate(self, data):
+        if not data['add'] and not data['remove']:
+            raise serializers.ValidationError(
+                'Передайте рецепты в add или remove.'
+            )
+        if set(data['add']) & set(data['remove']):
+            raise serializers.ValidationError(
+                'Рецепт не может быть одновременно в add и remove.'
+            )
+        return data
+
+
 class IngredientRecipeSerializer(serializers.ModelSerializer):
     id = serializers.ReadOnlyField(source='ingredient.id')
     name = serializers.ReadOnlyField(source='ingredient.name')
@@ -100,7 +175,7 @@ class IngredientRecipeSerializer(serializers.ModelSerializer):
 
 
 class IngredientCreateSerializer(serializers.ModelSerializer):
-    id = serializers.PrimaryKeyRelatedField(
+    id = PrefetchedPrimaryKeyRelatedField(
         queryset=Ingredient.objects.all()
     )
     amount = serializers.IntegerField(
@@ -113,7 +188,21 @@ class IngredientCreateSerializer(serializers.ModelSerializer):
         fields = ('id', 'amount')
 
 
-class RecipeRetrieveSerializer(serializers.ModelSerializer):
+class RecipeRetrieveListSerializer(TimedSerializerMixin,
+                                   serializers.ListSerializer):
+    def to_representation(self, data):
+        recipes = data.all() if hasattr(data, 'all') else data
+        return self.child.represent(list(recipes))
+
+
+class RecipeRetrieveSerializer(TimedSerializerMixin,
+                               serializers.ModelSerializer):
+    """
+    Общая для всех пользователей часть рецепта кэшируется фрагментом,
+    поверх которого подставляются is_favorited, is_in_shopping_cart
+    и author.is_subscribed. На странице из кэша к базе обращаются
+    только за самими рецептами с аннотациями флагов.
+    """
     author = UserSerializer()
     ingredients = IngredientRecipeSerializer(
         source='recipe_ingredients',
@@ -121,6 +210,7 @@ class RecipeRetrieveSerializer(serializers.ModelSerializer):
         many=True
     )
     tags = TagSerializer(many=True)
+    images = ImageRenditionsField()
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
 
@@ -132,14 +222,72 @@ class RecipeRetrieveSerializer(serializers.ModelSerializer):
             'author',
             'ingredients',
             'image',
+            'images',
             'text',
             'cooking_time',
             'tags',
             'is_favorited',
             'is_in_shopping_cart',
         )
+        list_serializer_class = RecipeRetrieveListSerializer
+
+    def to_representation(self, instance):
+        return self.represent([instance])[0]
+
+    def get_base_url(self):
+        request = self.context.get('request')
+        return request.build_absolute_uri('/') if request else ''
+
+    def represent(self, recipes):
+        base_url = self.get_base_url()
+        fragments, versions = get_fragments(recipes, base_url)
+        missing = [recipe for recipe in recipes if recipe.pk not in fragments]
+        if missing:
+            prefetch_related_objects(
+                missing,
+                'author',
+                Prefetch(
+                    'recipe_ingredients',
+                    queryset=RecipeIngredientQuantity.objects.select_related(
+                        'ingredient'
+                    )
+                ),
+                'tags'
+            )
+            rendered = []
+            for recipe in missing:
+                # Флаг подписки подставляется в overlay, здесь - заглушка.
+                recipe.author.is_subscribed = False
+                fragments[recipe.pk] = super().to_representation(recipe)
+                rendered.append((recipe, fragments[recipe.pk]))
+            set_fragments(rendered, base_url, versions)
+        return [
+            self.overlay(fragments[recipe.pk], recipe) for recipe in recipes
+        ]
+
+    def overlay(self, fragment, recipe):
+        data = dict(fragment)
+        data['author'] = {
+            **fragment['author'],
+            'is_subscribed': self.get_author_is_subscribed(recipe),
+        }
+        data['is_favorited'] = self.get_is_favorited(recipe)
+        data['is_in_shopping_cart'] = self.get_is_in_shopping_cart(recipe)
+        return data
+
+    def get_author_is_subscribed(self, obj):
+        annotated = getattr(obj, 'author_is_subscribed', None)
+        if annotated is not None:
+            return annotated
+        return UserSerializer(context=self.context).get_is_subscribed(
+            obj.author
+        )
+
+    def get_model_object(self, obj, model, annotation):
+        annotated = getattr(obj, annotation, None)
+        if annotated is not None:
+            return annotated
 
-    def get_model_object(self, obj, model):
         request = self.context.get('request')
 
         return not request or (
@@ -150,14 +298,95 @@ class RecipeRetrieveSerializer(serializers.ModelSerializer):
         )
 
     def get_is_favorited(self, obj):
-        return self.get_model_object(obj, Favorite)
+        return self.get_model_object(obj, Favorite, 'is_favorited')
 
     def get_is_in_shopping_cart(self, obj):
-        return self.get_model_object(obj, ShoppingCart)
+        return self.get_model_object(
+            obj, ShoppingCart, 'is_in_shopping_cart'
+        )
+
+
+def get_ids(values):
+    ids = set()
+    for value in values:
+        try:
+            ids.add(int(value))
+        except (TypeError, ValueError):
+            continue
+    return ids
+
+
+class RecipeBulkCreateSerializer(serializers.ListSerializer):
+    """
+    Массовое создание рецептов: рецепты, теги и ингредиенты
+    вставляются через bulk_create пачками в одной транзакции.
+    """
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            self.child.prefetch_relations(data)
+        return super().to_internal_value(data)
+
+    def to_representation(self, data):
+        return RecipeSerializer(data, many=True, context=self.context).data
+
+    def create_batch(self, batch):
+        recipes = Recipe.objects.bulk_create([
+            Recipe(**{
+                field: value for field, value in item.items()
+                if field not in ('ingredients', 'tags')
+            }, tags_mask=get_tags_mask(item['tags'])) for item in batch
+        ])
+        Recipe.tags.through.objects.bulk_create([
+            Recipe.tags.through(recipe=recipe, tag=tag)
+            for recipe, item in zip(recipes, batch)
+            for tag in item['tags']
+        ])
+        RecipeIngredientQuantity.objects.bulk_create([
+            ingredient
+            for recipe, item in zip(recipes, batch)
+            for ingredient in self.child.build_ingredients(
+                item['ingredients'], recipe
+            )
+        ])
+        return recipes
+
+    def create(self, validated_data):
+        recipes = []
+        with transaction.atomic():
+            for start in range(
+                0, len(validated_data), RECIPE_BULK_IMPORT_BATCH_SIZE
+            ):
+                recipes += self.create_batch(
+                    validated_data[start:start + RECIPE_BULK_IMPORT_BATCH_SIZE]
+                )
+
+            authors = {}
+            for recipe in recipes:
+                authors[recipe.author_id] = authors.get(
+                    recipe.author_id, 0
+                ) + 1
+            for author_id, count in authors.items():
+                change_counter(User, author_id, 'recipes_count', count)
+            transaction.on_commit(lambda: fan_out(recipes))
+            RecipePopularity.objects.bulk_create(
+                [RecipePopularity(recipe=recipe) for recipe in recipes],
+                batch_size=RECIPE_BULK_IMPORT_BATCH_SIZE
+            )
+            for recipe in recipes:
+                transaction.on_commit(
+                    lambda name=recipe.image.name: schedule_renditions(name)
+                )
+        return recipes
 
 
 class RecipeCreateSerializer(serializers.ModelSerializer):
     ingredients = IngredientCreateSerializer(many=True)
+    tags = PrefetchedPrimaryKeyRelatedField(
+        queryset=Tag.objects.all(),
+        many=True,
+        allow_empty=False,
+        label='Теги'
+    )
     image = Base64ImageField()
     cooking_time = serializers.IntegerField(
         min_value=RECIPE_COOKING_TIME_MIN_VALUE,
@@ -169,37 +398,74 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
         fields = (
             'ingredients', 'tags', 'image', 'name', 'text', 'cooking_time'
         )
+        list_serializer_class = RecipeBulkCreateSerializer
 
     def to_representation(self, instance):
         serializer = RecipeRetrieveSerializer(instance)
         return serializer.data
 
-    def create_ingredients(self, ingredients, recipe):
-        for ingredient in ingredients:
-            amount = ingredient['amount']
-            ingredient = ingredient['id']
-            ingredients, _ = RecipeIngredientQuantity.objects.get_or_create(
+    def prefetch_relations(self, items):
+        """
+        Загружает все ингредиенты и теги из входных данных двумя
+        запросами вместо запроса на каждый идентификатор.
+        """
+        ingredient_ids, tag_ids = [], []
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            ingredient_ids += [
+                ingredient.get('id') for ingredient in
+                item.get('ingredients') or ()
+                if isinstance(ingredient, dict)
+            ]
+            tags = item.get('tags')
+            if isinstance(tags, list):
+                tag_ids += tags
+
+        self.context['prefetched'] = {
+            Ingredient: Ingredient.objects.in_bulk(get_ids(ingredient_ids)),
+            Tag: Tag.objects.in_bulk(get_ids(tag_ids)),
+        }
+
+    def to_internal_value(self, data):
+        if 'prefetched' not in self.context:
+            self.prefetch_relations([data])
+        return super().to_internal_value(data)
+
+    def build_ingredients(self, ingredients, recipe):
+        return [
+            RecipeIngredientQuantity(
                 recipe=recipe,
-                ingredient=ingredient,
-                amount=amount
-            )
+                ingredient=ingredient['id'],
+                amount=ingredient['amount']
+            ) for ingredient in ingredients
+        ]
+
+    def create_ingredients(self, ingredients, recipe):
+        RecipeIngredientQuantity.objects.bulk_create(
+            self.build_ingredients(ingredients, recipe)
+        )
 
+    @transaction.atomic
     def create(self, validated_data):
         ingredients = validated_data.pop('ingredients')
         tags = validated_data.pop('tags')
         recipe = Recipe.objects.create(**validated_data)
         recipe.tags.set(tags)
-        recipe.save()
         self.create_ingredients(ingredients, recipe)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         ingredients = validated_data.pop('ingredients')
         tags = validated_data.pop('tags')
+        old_quantities = get_recipe_quantities(instance.pk)
         instance.ingredients.clear()
         self.create_ingredients(ingredients, instance)
-        instance.tags.clear()
+        update_recipe_in_shopping_lists(instance.pk, old_quantities)
         instance.tags.set(tags)
+        instance.tags_mask = get_tags_mask(tags)
+        RecipeNeighbour.objects.filter(recipe=instance).delete()
         return super().update(instance, validated_data)
 
     def validate(self, data):
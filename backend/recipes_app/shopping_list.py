@@ -0,0 +1,104 @@
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+from django.db.models.functions import Greatest
+
+from recipes_app.models import (RecipeIngredientQuantity,
+                                ShoppingCart,
+                                ShoppingListItem)
+
+
+def get_recipe_quantities(recipe_id):
+    return dict(
+        RecipeIngredientQuantity.objects.filter(
+            recipe_id=recipe_id
+        ).values_list('ingredient_id', 'amount')
+    )
+
+
+@transaction.atomic
+def change_shopping_lists(user_ids, changes):
+    """
+    Прибавляет changes ({id ингредиента: изменение}) к спискам покупок
+    пользователей user_ids. Недостающие строки создаются с нулём, затем
+    все суммы меняются одним UPDATE (не ниже нуля), строки с нулём
+    удаляются.
+    """
+    changes = {
+        ingredient_id: delta for ingredient_id, delta in changes.items()
+        if delta
+    }
+    user_ids = list(user_ids)
+    if not changes or not user_ids:
+        return
+
+    ShoppingListItem.objects.bulk_create(
+        [
+            ShoppingListItem(user_id=user_id, ingredient_id=ingredient_id)
+            for user_id in user_ids
+            for ingredient_id, delta in changes.items()
+            if delta > 0
+        ],
+        ignore_conflicts=True
+    )
+    items = ShoppingListItem.objects.filter(
+        user_id__in=user_ids, ingredient_id__in=changes
+    )
+    items.update(amount=Greatest(
+        F('amount') + Case(
+            *[When(ingredient_id=ingredient_id, then=Value(delta))
+              for ingredient_id, delta in changes.items()],
+            default=Value(0),
+            output_field=IntegerField()
+        ),
+        Value(0)
+    ))
+    items.filter(amount__lte=0).delete()
+
+
+def update_recipe_in_shopping_lists(recipe_id, old_quantities):
+    """
+    Переносит в списки покупок разницу между прежними и текущими
+    ингредиентами рецепта.
+    """
+    new_quantities = get_recipe_quantities(recipe_id)
+    changes = {
+        ingredient_id: (
+            new_quantities.get(ingredient_id, 0)
+            - old_quantities.get(ingredient_id, 0)
+        ) for ingredient_id in {*old_quantities, *new_quantities}
+    }
+    change_shopping_lists(
+        ShoppingCart.objects.filter(recipe_id=recipe_id).values_list(
+            'user_id', flat=True
+        ),
+        changes
+    )
+
+
+@transaction.atomic
+def rebuild_shopping_lists(chunk_size):
+    """
+    Пересчитывает все списки покупок из ShoppingCart.
+    """
+    ShoppingListItem.objects.all().delete()
+    totals = RecipeIngredientQuantity.objects.filter(
+        recipe__shopping_cart__isnull=False
+    ).values(
+        'recipe__shopping_cart__user', 'ingredient'
+    ).annotate(total=Sum('amount')).order_by().iterator(
+        chunk_size=chunk_size
+    )
+
+    batch, count = [], 0
+    for row in totals:
+        batch.append(ShoppingListItem(
+            user_id=row['recipe__shopping_cart__user'],
+            ingredient_id=row['ingredient'],
+            amount=row['total']
+        ))
+        if len(batch) >= chunk_size:
+            ShoppingListItem.objects.bulk_create(batch)
+            count += len(batch)
+            batch = []
+    ShoppingListItem.objects.bulk_create(batch)
+    return count + len(batch)
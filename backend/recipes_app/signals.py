@@ -0,0 +1,100 @@
+from django.db import transaction
+from django.db.models.signals import (m2m_changed,
+                                      post_delete,
+                                      post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+
+from foodgram_api.utils import change_counter
+from foodgram_api.versions import bump_version
+from recipes_app.images import schedule_renditions
+from recipes_app.ingredient_index import ingredient_index
+from recipes_app.constants import TAGS_VERSION_KEY
+from recipes_app.models import (Favorite,
+                                Ingredient,
+                                Recipe,
+                                RecipePopularity,
+                                ShoppingCart,
+                                Tag)
+from recipes_app.tags_mask import clear_tag_bit, sync_tags_mask
+from recipes_app.user_recipes import apply_changes
+from users_app.models import User
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def invalidate_ingredient_index(sender, **kwargs):
+    transaction.on_commit(ingredient_index.invalidate)
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def bump_tags_version(sender, **kwargs):
+    transaction.on_commit(lambda: bump_version(TAGS_VERSION_KEY))
+
+
+@receiver(pre_delete, sender=Tag)
+def clear_deleted_tag_bit(sender, instance, **kwargs):
+    clear_tag_bit(instance)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def sync_recipe_tags_mask(sender, instance, action, reverse, pk_set,
+                          **kwargs):
+    """
+    Держит Recipe.tags_mask в соответствии с Recipe.tags. При очистке
+    тегов со стороны тега рецепты запоминаются до удаления связей.
+    """
+    if action == 'pre_clear' and reverse:
+        instance._cleared_recipe_ids = list(
+            instance.recipes_tags.values_list('pk', flat=True)
+        )
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        recipe_ids = (instance.pk,)
+    elif action == 'post_clear':
+        recipe_ids = instance.__dict__.pop('_cleared_recipe_ids', ())
+    else:
+        recipe_ids = pk_set
+    sync_tags_mask(recipe_ids)
+
+
+@receiver(post_save, sender=Recipe)
+def increment_recipes_count(sender, instance, created, **kwargs):
+    if created:
+        change_counter(User, instance.author_id, 'recipes_count', 1)
+
+
+@receiver(post_save, sender=Recipe)
+def create_popularity(sender, instance, created, **kwargs):
+    if created:
+        RecipePopularity.objects.create(recipe=instance)
+
+
+@receiver(post_save, sender=Recipe)
+def create_image_renditions(sender, instance, **kwargs):
+    if instance.image:
+        image_name = instance.image.name
+        transaction.on_commit(lambda: schedule_renditions(image_name))
+
+
+@receiver(post_delete, sender=Recipe)
+def decrement_recipes_count(sender, instance, **kwargs):
+    change_counter(User, instance.author_id, 'recipes_count', -1)
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+def add_user_recipe(sender, instance, created, **kwargs):
+    if created:
+        apply_changes(sender, instance.user_id, (instance.recipe_id,), 1)
+
+
+@receiver(pre_delete, sender=Favorite)
+@receiver(pre_delete, sender=ShoppingCart)
+def remove_user_recipe(sender, instance, **kwargs):
+    """
+    pre_delete, а не post_delete: при каскадном удалении рецепта его
+    ингредиенты ещё не удалены.
+    """
+    apply_changes(sender, instance.user_id, (instance.recipe_id,), -1)
@@ -0,0 +1,239 @@
+from django.db import transaction
+from django.db.models import Count, Min
+
+from recipes_app.constants import (SIMILAR_BATCH_SIZE,
+                                   SIMILAR_BLOCK_SIZE,
+                                   SIMILAR_CHUNK_SIZE,
+                                   SIMILAR_NEIGHBOURS_SIZE,
+                                   SIMILAR_TAG_WEIGHT)
+from recipes_app.models import (Recipe,
+                                RecipeIngredientQuantity,
+                                RecipeNeighbour)
+
+
+def get_matrix():
+    """
+    Разреженная матрица рецепт x (ингредиенты + теги) с нормированными
+    строками. Ингредиенты взвешены по IDF, чтобы соль и вода почти не
+    влияли на близость, теги - весом SIMILAR_TAG_WEIGHT. Возвращает
+    отсортированные id рецептов (номера строк) и матрицу.
+    NumPy и SciPy импортируются здесь: они нужны только офлайн-расчёту.
+    """
+    import numpy as np
+    from scipy import sparse
+
+    recipe_ids = np.fromiter(
+        Recipe.objects.order_by('pk').values_list('pk', flat=True),
+        dtype=np.int64
+    )
+    ingredient_pairs = np.array(
+        list(RecipeIngredientQuantity.objects.values_list(
+            'recipe_id', 'ingredient_id'
+        ).distinct().iterator(chunk_size=SIMILAR_CHUNK_SIZE)),
+        dtype=np.int64
+    ).reshape(-1, 2)
+    tag_pairs = np.array(
+        list(Recipe.tags.through.objects.values_list(
+            'recipe_id', 'tag_id'
+        ).iterator(chunk_size=SIMILAR_CHUNK_SIZE)),
+        dtype=np.int64
+    ).reshape(-1, 2)
+
+    ingredient_ids, ingredient_columns = np.unique(
+        ingredient_pairs[:, 1], return_inverse=True
+    )
+    tag_ids, tag_columns = np.unique(tag_pairs[:, 1], return_inverse=True)
+    frequencies = np.bincount(
+        ingredient_columns, minlength=len(ingredient_ids)
+    )
+    idf = np.log((1 + len(recipe_ids)) / (1 + frequencies)) + 1
+
+    matrix = sparse.csr_matrix(
+        (
+            np.concatenate((
+                idf[ingredient_columns],
+                np.full(len(tag_columns), SIMILAR_TAG_WEIGHT)
+            )),
+            (
+                np.searchsorted(recipe_ids, np.concatenate((
+                    ingredient_pairs[:, 0], tag_pairs[:, 0]
+                ))),
+                np.concatenate((
+                    ingredient_columns, tag_columns + len(ingredient_ids)
+                ))
+            )
+        ),
+        shape=(len(recipe_ids), len(ingredient_ids) + len(tag_ids))
+    )
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return recipe_ids, sparse.diags(1 / norms) @ matrix
+
+
+def get_batch_size(count):
+    """
+    Число строк блока: не больше SIMILAR_BATCH_SIZE и столько, чтобы
+    даже полностью заполненный блок не превысил SIMILAR_BLOCK_SIZE
+    ненулевых близостей.
+    """
+    return max(1, min(SIMILAR_BATCH_SIZE, SIMILAR_BLOCK_SIZE // max(count, 1)))
+
+
+def get_batches(rows, count):
+    size = get_batch_size(count)
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def get_similarities(matrix, rows):
+    """
+    Разреженный блок близостей строк rows со всеми рецептами: тройки
+    (номер строки в блоке, номер рецепта, близость) с положительной
+    близостью, без близости рецепта с самим собой.
+    """
+    block = (matrix[rows] @ matrix.T).tocoo()
+    keep = (block.col != rows[block.row]) & (block.data > 0)
+    return block.row[keep], block.col[keep], block.data[keep]
+
+
+def get_top(batch_rows, columns, scores, size):
+    """
+    Оставляет для каждой строки блока не более size самых близких
+    рецептов.
+    """
+    import numpy as np
+
+    order = np.lexsort((-scores, batch_rows))
+    batch_rows, columns, scores = (
+        batch_rows[order], columns[order], scores[order]
+    )
+    ranks = np.arange(len(batch_rows)) - np.searchsorted(
+        batch_rows, batch_rows
+    )
+    keep = ranks < size
+    return batch_rows[keep], columns[keep], scores[keep]
+
+
+def write_neighbours(neighbours):
+    RecipeNeighbour.objects.bulk_create(
+        neighbours, batch_size=SIMILAR_CHUNK_SIZE, ignore_conflicts=True
+    )
+
+
+def get_neighbours(recipe_ids, rows, similarities):
+    batch_rows, columns, scores = get_top(
+        *similarities, SIMILAR_NEIGHBOURS_SIZE
+    )
+    return [
+        RecipeNeighbour(
+            recipe_id=recipe_ids[rows[batch_row]],
+            neighbour_id=recipe_ids[column],
+            score=score
+        )
+        for batch_row, column, score in zip(
+            batch_rows.tolist(), columns.tolist(), scores.tolist()
+        )
+    ]
+
+
+@transaction.atomic
+def build_neighbours():
+    """
+    Пересчитывает соседей всех рецептов блоками строк. Возвращает число
+    записей.
+    """
+    import numpy as np
+
+    recipe_ids, matrix = get_matrix()
+    rows = np.arange(len(recipe_ids))
+    recipe_ids = recipe_ids.tolist()
+    RecipeNeighbour.objects.all().delete()
+    count = 0
+    for batch in get_batches(rows, len(recipe_ids)):
+        neighbours = get_neighbours(
+            recipe_ids, batch.tolist(), get_similarities(matrix, batch)
+        )
+        write_neighbours(neighbours)
+        count += len(neighbours)
+    return count
+
+
+def prune_neighbours(recipe_ids):
+    """
+    Оставляет рецептам recipe_ids по SIMILAR_NEIGHBOURS_SIZE самых
+    близких соседей.
+    """
+    extra, kept, current = [], 0, None
+    for pk, recipe_id in RecipeNeighbour.objects.filter(
+        recipe_id__in=recipe_ids
+    ).order_by('recipe_id', '-score').values_list('pk', 'recipe_id'):
+        if recipe_id != current:
+            current, kept = recipe_id, 0
+        kept += 1
+        if kept > SIMILAR_NEIGHBOURS_SIZE:
+            extra.append(pk)
+    for start in range(0, len(extra), SIMILAR_CHUNK_SIZE):
+        RecipeNeighbour.objects.filter(
+            pk__in=extra[start:start + SIMILAR_CHUNK_SIZE]
+        ).delete()
+
+
+@transaction.atomic
+def fold_in_neighbours():
+    """
+    Добавляет рецепты без соседей, то есть новые и изменённые: считает
+    их соседей и вставляет их в списки тех рецептов, где они ближе
+    последнего соседа. Веса IDF пересчитываются, но списки остальных
+    рецептов между ними не обновляются - это делает полный пересчёт.
+    Рецепты без общих ингредиентов и тегов с другими проверяются при
+    каждом запуске. Возвращает число добавленных рецептов.
+    """
+    import numpy as np
+
+    new_ids = set(Recipe.objects.filter(
+        neighbours__isnull=True
+    ).values_list('pk', flat=True))
+    if not new_ids:
+        return 0
+    RecipeNeighbour.objects.filter(neighbour_id__in=new_ids).delete()
+
+    recipe_ids, matrix = get_matrix()
+    is_new = np.isin(recipe_ids, list(new_ids))
+    thresholds = np.zeros(len(recipe_ids))
+    for row in RecipeNeighbour.objects.values('recipe_id').annotate(
+        count=Count('pk'), min_score=Min('score')
+    ).filter(count__gte=SIMILAR_NEIGHBOURS_SIZE).order_by():
+        thresholds[np.searchsorted(recipe_ids, row['recipe_id'])] = (
+            row['min_score']
+        )
+    recipe_ids = recipe_ids.tolist()
+
+    for batch in get_batches(np.flatnonzero(is_new), len(recipe_ids)):
+        similarities = get_similarities(matrix, batch)
+        neighbours = get_neighbours(recipe_ids, batch.tolist(), similarities)
+
+        batch_rows, columns, scores = similarities
+        closer = (scores > thresholds[columns]) & ~is_new[columns]
+        neighbours += [
+            RecipeNeighbour(
+                recipe_id=recipe_ids[column],
+                neighbour_id=recipe_ids[batch[batch_row]],
+                score=score
+            )
+            for batch_row, column, score in zip(
+                batch_rows[closer].tolist(),
+                columns[closer].tolist(),
+                scores[closer].tolist()
+            )
+        ]
+        write_neighbours(neighbours)
+        prune_neighbours(
+            {recipe_ids[column] for column in columns[closer].tolist()}
+        )
+    return len(new_ids)
+
+
+def get_similar_ids(recipe_id, size):
+    return list(RecipeNeighbour.objects.filter(
+        recipe_id=recipe_id
+    ).order_by('-score').values_list('neighbour_id', flat=True)[:size])
@@ -0,0 +1,46 @@
+from django.db.models import F
+
+from recipes_app.models import Recipe
+
+
+def get_tags_mask(tags):
+    mask = 0
+    for tag in tags:
+        mask |= tag.mask
+    return mask
+
+
+def sync_tags_mask(recipe_ids):
+    """
+    Пересчитывает маску тегов рецептов по таблице связей Recipe.tags.
+    """
+    masks = dict.fromkeys(recipe_ids, 0)
+    for recipe_id, bit in Recipe.tags.through.objects.filter(
+        recipe_id__in=masks
+    ).values_list('recipe_id', 'tag__bit'):
+        if bit is not None:
+            masks[recipe_id] |= 1 << bit
+    Recipe.objects.bulk_update(
+        [Recipe(pk=pk, tags_mask=mask) for pk, mask in masks.items()],
+        ('tags_mask',)
+    )
+
+
+def clear_tag_bit(tag):
+    """
+    Снимает бит удаляемого тега со всех рецептов, чтобы его можно было
+    отдать новому тегу.
+    """
+    Recipe.objects.filter(tags=tag).update(
+        tags_mask=F('tags_mask').bitand(~tag.mask)
+    )
+
+
+def filter_by_tags(queryset, tags):
+    """
+    Рецепты хотя бы с одним из тегов: одно условие на строку рецепта
+    без соединения с таблицей связей и без повторов строк.
+    """
+    return queryset.alias(
+        matching_tags=F('tags_mask').bitand(get_tags_mask(tags))
+    ).filter(matching_tags__gt=0)
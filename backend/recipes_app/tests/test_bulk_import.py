@@ -0,0 +1,95 @@
+from unittest import mock
+
+from rest_framework import status
+
+from foodgram_api.tests.base import FoodgramTestCase
+from recipes_app.models import Recipe, RecipePopularity
+from subscriptions_app.models import Subscription, TimelineEntry
+
+
+@mock.patch('recipes_app.serializers.RECIPE_BULK_IMPORT_BATCH_SIZE', 2)
+class RecipeBulkImportTests(FoodgramTestCase):
+    """
+    Массовая загрузка пишет рецепты через bulk_create в обход сигналов,
+    поэтому её побочные эффекты сверяются с созданием по одному.
+    Пачка в два рецепта, чтобы загрузка шла несколькими пачками.
+    """
+    def setUp(self):
+        super().setUp()
+        self.admin = self.create_user('admin')
+        self.admin.is_staff = True
+        self.admin.save()
+        self.reader = self.create_user('reader')
+        Subscription.objects.create(user=self.reader, author=self.admin)
+        self.client = self.get_client(self.admin)
+        self.items = (
+            ((self.breakfast,), ((self.flour, 100), (self.milk, 200))),
+            ((self.dinner,), ((self.egg, 3),)),
+            ((self.breakfast, self.dinner), ((self.milk, 50),)),
+        )
+
+    def post(self, url, data, schedule_renditions):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, data, format='json')
+        names = [call.args[0] for call in schedule_renditions.call_args_list]
+        schedule_renditions.reset_mock()
+        return response, names
+
+    def get_effects(self, recipe_ids):
+        recipes = Recipe.objects.filter(pk__in=recipe_ids).order_by('pk')
+        return {
+            'tags_mask': [recipe.tags_mask for recipe in recipes],
+            'ingredients': [
+                sorted(recipe.recipe_ingredients.values_list(
+                    'ingredient', 'amount'
+                )) for recipe in recipes
+            ],
+            'timeline': sorted(TimelineEntry.objects.filter(
+                recipe__in=recipe_ids
+            ).values_list('user', 'author')),
+            'popularity': sorted(RecipePopularity.objects.filter(
+                recipe__in=recipe_ids
+            ).values_list('score', flat=True)),
+        }
+
+    @mock.patch('recipes_app.serializers.schedule_renditions')
+    @mock.patch('recipes_app.signals.schedule_renditions')
+    def test_side_effects_match_single_creation(self, *schedulers):
+        single_ids, single_names = [], []
+        for tags, ingredients in self.items:
+            response, names = self.post(
+                '/api/recipes/',
+                self.get_recipe_data(tags, ingredients),
+                schedulers[0]
+            )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            single_ids.append(response.data['id'])
+            single_names += names
+        self.admin.refresh_from_db()
+        self.assertEqual(self.admin.recipes_count, len(self.items))
+
+        response, bulk_names = self.post(
+            '/api/recipes/bulk_import/',
+            [self.get_recipe_data(tags, ingredients)
+             for tags, ingredients in self.items],
+            schedulers[1]
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        bulk_ids = [recipe['id'] for recipe in response.data]
+        self.assertEqual(len(bulk_ids), len(self.items))
+
+        self.admin.refresh_from_db()
+        self.assertEqual(self.admin.recipes_count, 2 * len(self.items))
+        self.assertEqual(
+            self.get_effects(bulk_ids), self.get_effects(single_ids)
+        )
+        self.assertEqual(
+            len(self.get_effects(bulk_ids)['timeline']), len(self.items)
+        )
+        self.assertEqual(len(single_names), len(self.items))
+        self.assertEqual(
+            sorted(bulk_names),
+            sorted(Recipe.objects.filter(pk__in=bulk_ids).values_list(
+                'image', flat=True
+            ))
+        )
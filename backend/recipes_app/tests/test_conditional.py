@@ -0,0 +1,61 @@
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from rest_framework import status
+
+from foodgram_api.tests.base import FoodgramTestCase, get_image_bytes
+from recipes_app.images import generate_renditions
+from recipes_app.models import Recipe
+
+
+@mock.patch('recipes_app.images.schedule_renditions')
+class RecipeConditionalGetTests(FoodgramTestCase):
+    """
+    ETag и Last-Modified рецепта зависят от одних и тех же данных,
+    в том числе от готовности копий изображения. У рецепта своё
+    изображение: копии общего создаются фоновыми потоками других тестов.
+    """
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('author')
+        self.recipe = self.create_recipe(
+            self.author, (self.breakfast,), ((self.flour, 100),)
+        )
+        self.image = default_storage.save(
+            'recipes/images/conditional.png', ContentFile(get_image_bytes())
+        )
+        Recipe.objects.filter(pk=self.recipe.pk).update(image=self.image)
+        self.url = f'/api/recipes/{self.recipe.pk}/'
+
+    def test_etag_changes_with_recipe(self, schedule_renditions):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        response = self.get_client(self.author).patch(
+            self.url,
+            self.get_recipe_data(
+                (self.breakfast,), ((self.flour, 100),), name='Другое'
+            ),
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['name'], 'Другое')
+
+    def test_last_modified_waits_for_renditions(self, schedule_renditions):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('Last-Modified', response)
+        pending_etag = response['ETag']
+
+        generate_renditions(self.image)
+        response = self.client.get(self.url)
+        self.assertIn('Last-Modified', response)
+        self.assertNotEqual(response['ETag'], pending_etag)
+        response = self.client.get(
+            self.url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
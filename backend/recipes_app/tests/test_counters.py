@@ -0,0 +1,56 @@
+from rest_framework import status
+
+from foodgram_api.tests.base import FoodgramTestCase
+from recipes_app.models import Favorite, Recipe, ShoppingCart
+
+
+class RecipeCountersSaveTests(FoodgramTestCase):
+    """
+    Изменение рецепта не затирает счётчики избранного и списков
+    покупок.
+    """
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('author')
+        self.reader = self.create_user('reader')
+        self.recipe = self.create_recipe(
+            self.author, (self.breakfast,), ((self.flour, 100),)
+        )
+        self.stale_recipe = Recipe.objects.get(pk=self.recipe.pk)
+        Favorite.objects.create(user=self.reader, recipe=self.recipe)
+        ShoppingCart.objects.create(user=self.reader, recipe=self.recipe)
+
+    def assertCounters(self, favorites, in_carts):
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.favorites_count, favorites)
+        self.assertEqual(self.recipe.in_carts_count, in_carts)
+
+    def test_save_of_stale_instance_keeps_counters(self):
+        self.stale_recipe.name = 'Новое название'
+        self.stale_recipe.save()
+        self.assertCounters(1, 1)
+        self.assertEqual(self.recipe.name, 'Новое название')
+
+    def test_patch_keeps_counters(self):
+        response = self.get_client(self.author).patch(
+            f'/api/recipes/{self.recipe.pk}/',
+            self.get_recipe_data(
+                (self.dinner,), ((self.milk, 200),), name='Новое название'
+            ),
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertCounters(1, 1)
+
+    def test_counters_follow_api_changes(self):
+        client = self.get_client(self.author)
+        for url in ('favorite', 'shopping_cart'):
+            response = client.post(f'/api/recipes/{self.recipe.pk}/{url}/')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertCounters(2, 2)
+        for url in ('favorite', 'shopping_cart'):
+            response = client.delete(f'/api/recipes/{self.recipe.pk}/{url}/')
+            self.assertEqual(
+                response.status_code, status.HTTP_204_NO_CONTENT
+            )
+        self.assertCounters(1, 1)
@@ -0,0 +1,91 @@
+from io import BytesIO
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image
+
+from foodgram_api.tests.base import FoodgramTestCase
+from recipes_app import images
+from recipes_app.constants import (IMAGE_RENDITION_FORMATS,
+                                   IMAGE_RENDITION_SIZES)
+
+
+class ImageRenditionsTests(FoodgramTestCase):
+    """
+    Копии создаются во всех размерах и форматах, а до их готовности
+    get_rendition_urls отдаёт ссылку на оригинал. Изображение своё:
+    копии общего создаются фоновыми потоками других тестов.
+    """
+    def setUp(self):
+        super().setUp()
+        buffer = BytesIO()
+        Image.new('RGBA', (2000, 1000), (200, 100, 50, 128)).save(
+            buffer, 'PNG'
+        )
+        self.image_name = default_storage.save(
+            'recipes/images/renditions.png', ContentFile(buffer.getvalue())
+        )
+        self.image = mock.Mock()
+        self.image.name = self.image_name
+        self.image.url = default_storage.url(self.image_name)
+
+    def test_generate_renditions(self):
+        images.generate_renditions(self.image_name)
+        self.assertTrue(images.renditions_exist(self.image_name))
+        self.assertIsNotNone(images.get_renditions_time(self.image_name))
+        for size, (width, height) in IMAGE_RENDITION_SIZES.items():
+            for image_format, options in IMAGE_RENDITION_FORMATS.items():
+                name = images.get_rendition_name(
+                    self.image_name, size, image_format
+                )
+                with default_storage.open(name) as file:
+                    rendition = Image.open(file)
+                    rendition.load()
+                self.assertEqual(rendition.format, options['pil_format'])
+                self.assertIn(rendition.mode, options['modes'])
+                self.assertEqual(
+                    rendition.size, (min(width, 2000), min(width, 2000) // 2)
+                )
+
+    @mock.patch('recipes_app.images.schedule_renditions')
+    def test_urls_fall_back_to_original(self, schedule_renditions):
+        self.assertIsNone(images.get_rendition_urls(None))
+        self.assertIsNone(images.get_renditions_time(self.image_name))
+
+        urls = images.get_rendition_urls(self.image)
+        schedule_renditions.assert_called_once_with(self.image_name)
+        self.assertEqual(set(urls), set(IMAGE_RENDITION_SIZES))
+        for formats in urls.values():
+            self.assertEqual(
+                formats, dict.fromkeys(IMAGE_RENDITION_FORMATS, self.image.url)
+            )
+
+        images.generate_renditions(self.image_name)
+        schedule_renditions.reset_mock()
+        urls = images.get_rendition_urls(
+            self.image, build_url=lambda url: f'http://testserver{url}'
+        )
+        schedule_renditions.assert_not_called()
+        self.assertEqual(
+            urls['thumbnail']['webp'],
+            'http://testserver' + default_storage.url(
+                images.get_rendition_name(
+                    self.image_name, 'thumbnail', 'webp'
+                )
+            )
+        )
+
+    @mock.patch('recipes_app.images.executor')
+    def test_failed_generation_is_not_retried(self, executor):
+        self.addCleanup(images._failed.discard, 'recipes/images/missing.png')
+        with self.assertLogs('recipes_app.images', 'ERROR'):
+            images.run_generation('recipes/images/missing.png')
+        images.schedule_renditions('recipes/images/missing.png')
+        executor.submit.assert_not_called()
+
+        images.schedule_renditions(self.image_name)
+        executor.submit.assert_called_once_with(
+            images.run_generation, self.image_name
+        )
+        images._scheduled.discard(self.image_name)
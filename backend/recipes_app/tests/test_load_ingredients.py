@@ -0,0 +1,81 @@
+import json
+import os
+import re
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+
+from foodgram_api.tests.base import FoodgramTestCase
+from recipes_app.models import Ingredient
+
+CSV_ROWS = (
+    'name,measurement_unit\n'
+    'мука,г\n'
+    'сахар,г\n'
+    'сахар,г\n'
+    'соль,\n'
+    'сахар,ч. л.\n'
+)
+
+
+class LoadIngredientsTests(FoodgramTestCase):
+    """
+    Итоги load_ingredients сходятся с тем, что реально записано в базу,
+    в том числе при повторном запуске. Пачка в два ключа, чтобы строки
+    одного названия попадали в разные пачки.
+    """
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        return path
+
+    def load(self, path):
+        stdout = StringIO()
+        with mock.patch(
+            'recipes_app.management.commands.load_ingredients'
+            '.ingredient_index.invalidate'
+        ) as invalidate:
+            call_command('load_ingredients', path, batch_size=2, stdout=stdout)
+        counts = re.search(
+            r'Processed (\d+) rows .* inserted (\d+), skipped (\d+) '
+            r'existing or duplicate, (\d+) invalid',
+            stdout.getvalue()
+        )
+        return [int(count) for count in counts.groups()], invalidate.called
+
+    def test_repeat_run_inserts_nothing(self):
+        path = self.write('ingredients.csv', CSV_ROWS)
+        before = Ingredient.objects.count()
+        self.assertEqual(self.load(path), ([5, 2, 2, 1], True))
+        self.assertEqual(Ingredient.objects.count(), before + 2)
+        self.assertTrue(Ingredient.objects.filter(
+            name='сахар', measurement_unit='ч. л.'
+        ).exists())
+        self.assertFalse(Ingredient.objects.filter(name='соль').exists())
+
+        self.assertEqual(self.load(path), ([5, 0, 4, 1], False))
+        self.assertEqual(Ingredient.objects.count(), before + 2)
+
+    def test_json_input(self):
+        path = self.write('ingredients.json', json.dumps([
+            {'name': 'молоко', 'measurement_unit': 'мл'},
+            {'name': 'ваниль', 'measurement_unit': 'г'},
+            {'name': 'ваниль'},
+            'ваниль',
+            {'name': 'корица', 'measurement_unit': 'г'},
+        ], ensure_ascii=False))
+        self.assertEqual(self.load(path), ([5, 2, 1, 2], True))
+        self.assertEqual(
+            set(Ingredient.objects.filter(
+                name__in=('ваниль', 'корица')
+            ).values_list('name', flat=True)),
+            {'ваниль', 'корица'}
+        )
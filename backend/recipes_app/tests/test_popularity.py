@@ -0,0 +1,63 @@
+from datetime import datetime, timezone
+from io import StringIO
+
+from django.core.management import call_command
+from rest_framework import status
+
+from foodgram_api.tests.base import FoodgramTestCase
+from recipes_app.models import Favorite, RecipePopularity, ShoppingCart
+
+
+class PopularityTests(FoodgramTestCase):
+    """
+    Оценка популярности хранится логарифмом, поэтому не переполняется
+    и через десятилетия после POPULARITY_EPOCH.
+    """
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('author')
+        self.reader = self.create_user('reader')
+        self.old, self.new, self.unknown = (
+            self.create_recipe(self.author, name=name)
+            for name in ('old', 'new', 'unknown')
+        )
+
+    def get_ids(self, **params):
+        response = self.client.get(
+            '/api/recipes/', {'ordering': 'popular', **params}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [recipe['id'] for recipe in response.data['results']]
+
+    def test_recent_activity_wins_far_from_epoch(self):
+        for model in (Favorite, ShoppingCart):
+            model.objects.create(user=self.reader, recipe=self.old)
+            model.objects.create(user=self.author, recipe=self.old)
+        Favorite.objects.create(user=self.reader, recipe=self.new)
+        ShoppingCart.objects.filter(recipe=self.old).update(
+            created_at=datetime(2070, 1, 1, tzinfo=timezone.utc)
+        )
+        Favorite.objects.filter(recipe=self.old).update(
+            created_at=datetime(2070, 1, 1, tzinfo=timezone.utc)
+        )
+        Favorite.objects.filter(recipe=self.new).update(
+            created_at=datetime(2071, 1, 1, tzinfo=timezone.utc)
+        )
+        call_command('update_popularity', '--full', stdout=StringIO())
+
+        self.assertEqual(
+            self.get_ids(), [self.new.pk, self.old.pk, self.unknown.pk]
+        )
+        self.assertEqual(
+            RecipePopularity.objects.get(recipe=self.unknown).score, 0
+        )
+
+    def test_cursor_pagination_rejects_explicit_ordering(self):
+        response = self.client.get(
+            '/api/recipes/', {'ordering': 'popular', 'pagination': 'cursor'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('pagination', response.data)
+
+        response = self.client.get('/api/recipes/', {'pagination': 'cursor'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -0,0 +1,87 @@
+from unittest import skipIf, skipUnless
+
+from django.db import connection
+from rest_framework import status
+
+from foodgram_api.tests.base import FoodgramTestCase
+from recipes_app.models import Recipe
+from recipes_app.search import search_fallback
+
+
+class SearchTestCase(FoodgramTestCase):
+    """
+    Рецепты, в которых слово запроса встречается в названии, в описании
+    или нигде. Слова в нижнем регистре: SQLite не различает регистр
+    только у латиницы.
+    """
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('author')
+        self.in_text = self.create_recipe(self.author, name='Завтрак')
+        Recipe.objects.filter(pk=self.in_text.pk).update(
+            text='Тонкие блины на молоке'
+        )
+        self.in_name = self.create_recipe(
+            self.author, (self.breakfast,), name='Тонкие блины с мёдом'
+        )
+        self.other = self.create_recipe(self.author, name='Омлет')
+
+    def search(self, value, **params):
+        response = self.client.get(
+            '/api/recipes/', {'search': value, **params}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [recipe['id'] for recipe in response.data['results']]
+
+
+@skipIf(connection.vendor == 'postgresql', 'Поиск идёт через PostgreSQL.')
+class SearchFallbackTests(SearchTestCase):
+    def test_name_match_ranks_first(self):
+        self.assertEqual(
+            self.search('блины'), [self.in_name.pk, self.in_text.pk]
+        )
+
+    def test_every_word_must_match(self):
+        self.assertEqual(self.search('блины мёдом'), [self.in_name.pk])
+        self.assertEqual(self.search('блины омлет'), [])
+
+    def test_blank_search_keeps_all_recipes(self):
+        self.assertEqual(len(self.search('  ')), 3)
+        self.assertEqual(
+            search_fallback(Recipe.objects.all(), '').count(), 3
+        )
+
+    def test_search_combines_with_filters(self):
+        self.assertEqual(
+            self.search('блины', tags='breakfast'), [self.in_name.pk]
+        )
+        self.assertEqual(self.search('блины', tags='dinner'), [])
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Нужен PostgreSQL.')
+class SearchPostgresqlTests(SearchTestCase):
+    def test_name_match_ranks_first(self):
+        self.assertEqual(
+            self.search('блины'), [self.in_name.pk, self.in_text.pk]
+        )
+
+    def test_word_forms_match(self):
+        self.assertEqual(
+            self.search('блин'), [self.in_name.pk, self.in_text.pk]
+        )
+        self.assertEqual(self.search('молоко'), [self.in_text.pk])
+
+    def test_websearch_syntax(self):
+        self.assertEqual(self.search('блины -мёд'), [self.in_text.pk])
+        self.assertCountEqual(
+            self.search('омлет or мёд'), [self.in_name.pk, self.other.pk]
+        )
+
+    def test_search_index_exists(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT indexdef FROM pg_indexes WHERE indexname = %s',
+                ('recipe_search_idx',)
+            )
+            [(indexdef,)] = cursor.fetchall()
+        self.assertIn('gin', indexdef.lower())
@@ -0,0 +1,143 @@
+import csv
+import json
+
+from rest_framework import status
+
+from foodgram_api.tests.base import FoodgramTestCase
+from recipes_app.models import Recipe, ShoppingCart, ShoppingListItem
+
+
+class ShoppingListTests(FoodgramTestCase):
+    """
+    Список покупок хранится суммами по ингредиентам. Сигналы отдельных
+    записей и пакетные операции меняют их одинаково.
+    """
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('author')
+        self.reader = self.create_user('reader')
+        self.client = self.get_client(self.reader)
+        self.pancakes = self.create_recipe(
+            self.author, (self.breakfast,),
+            ((self.flour, 100), (self.milk, 200)), name='pancakes'
+        )
+        self.omelette = self.create_recipe(
+            self.author, (self.breakfast,),
+            ((self.milk, 50), (self.egg, 3)), name='omelette'
+        )
+
+    def get_list(self, user=None):
+        return dict(ShoppingListItem.objects.filter(
+            user=user or self.reader
+        ).values_list('ingredient', 'amount'))
+
+    def get_in_carts(self, recipe):
+        recipe.refresh_from_db()
+        return recipe.in_carts_count
+
+    def test_single_and_batch_changes_agree(self):
+        ShoppingCart.objects.create(user=self.author, recipe=self.pancakes)
+        ShoppingCart.objects.create(user=self.author, recipe=self.omelette)
+        response = self.client.post(
+            '/api/recipes/shopping_cart/batch/',
+            {'add': [self.pancakes.pk, self.omelette.pk], 'remove': []},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        expected = {self.flour.pk: 100, self.milk.pk: 250, self.egg.pk: 3}
+        self.assertEqual(self.get_list(self.author), expected)
+        self.assertEqual(self.get_list(), expected)
+        self.assertEqual(self.get_in_carts(self.pancakes), 2)
+
+        ShoppingCart.objects.get(
+            user=self.author, recipe=self.omelette
+        ).delete()
+        response = self.client.post(
+            '/api/recipes/shopping_cart/batch/',
+            {'add': [], 'remove': [self.omelette.pk]},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        expected = {self.flour.pk: 100, self.milk.pk: 200}
+        self.assertEqual(self.get_list(self.author), expected)
+        self.assertEqual(self.get_list(), expected)
+        self.assertEqual(self.get_in_carts(self.omelette), 0)
+
+    def test_download_sums_ingredients(self):
+        for recipe in (self.pancakes, self.omelette):
+            response = self.client.post(
+                f'/api/recipes/{recipe.pk}/shopping_cart/'
+            )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.client.get('/api/recipes/download_shopping_cart/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        content = b''.join(response.streaming_content).decode()
+        lines = [line for line in content.splitlines() if line.strip()]
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(any(self.milk.name in line and '250' in line
+                            for line in lines))
+
+    def download(self, file_format):
+        ShoppingCart.objects.create(user=self.reader, recipe=self.pancakes)
+        ShoppingCart.objects.create(user=self.reader, recipe=self.omelette)
+        response = self.client.get(
+            '/api/recipes/download_shopping_cart/', {'format': file_format}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response['Content-Disposition'],
+            f'attachment; filename=Shopping_cart.{file_format}'
+        )
+        return response, b''.join(response.streaming_content).decode()
+
+    def get_expected_rows(self):
+        return sorted(
+            (ingredient.name, amount, ingredient.measurement_unit)
+            for ingredient, amount in (
+                (self.flour, 100), (self.milk, 250), (self.egg, 3)
+            )
+        )
+
+    def test_download_txt(self):
+        response, content = self.download('txt')
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        self.assertEqual(content.splitlines(), [
+            f'{name} - {amount} {measurement_unit}'
+            for name, amount, measurement_unit in self.get_expected_rows()
+        ])
+
+    def test_download_csv(self):
+        response, content = self.download('csv')
+        self.assertTrue(response['Content-Type'].startswith('text/csv'))
+        header, *rows = csv.reader(content.splitlines())
+        self.assertEqual(header, ['name', 'amount', 'measurement_unit'])
+        self.assertEqual(rows, [
+            [name, str(amount), measurement_unit]
+            for name, amount, measurement_unit in self.get_expected_rows()
+        ])
+
+    def test_download_json(self):
+        response, content = self.download('json')
+        self.assertTrue(
+            response['Content-Type'].startswith('application/json')
+        )
+        self.assertEqual(json.loads(content), [
+            {'name': name, 'amount': amount,
+             'measurement_unit': measurement_unit}
+            for name, amount, measurement_unit in self.get_expected_rows()
+        ])
+
+    def test_download_unknown_format(self):
+        response = self.client.get(
+            '/api/recipes/download_shopping_cart/', {'format': 'xml'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('txt, csv, json', response.content.decode())
+
+    def test_deleted_recipe_leaves_shopping_list(self):
+        ShoppingCart.objects.create(user=self.reader, recipe=self.pancakes)
+        ShoppingCart.objects.create(user=self.reader, recipe=self.omelette)
+        Recipe.objects.get(pk=self.omelette.pk).delete()
+        self.assertEqual(
+            self.get_list(), {self.flour.pk: 100, self.milk.pk: 200}
+        )
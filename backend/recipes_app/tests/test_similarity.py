@@ -0,0 +1,80 @@
+from unittest import mock
+
+from rest_framework import status
+
+from foodgram_api.tests.base import FoodgramTestCase
+from recipes_app import similarity
+from recipes_app.models import RecipeNeighbour
+
+
+class SimilarRecipesTests(FoodgramTestCase):
+    """
+    Соседи считаются разреженными блоками, размер которых зависит от
+    числа рецептов, поэтому результат не должен зависеть от размера
+    блока.
+    """
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('author')
+        self.pancakes = self.create_recipe(
+            self.author, (self.breakfast,),
+            ((self.flour, 100), (self.milk, 200), (self.egg, 2)),
+            name='pancakes'
+        )
+        self.crepes = self.create_recipe(
+            self.author, (self.breakfast,),
+            ((self.flour, 50), (self.milk, 300), (self.egg, 1)),
+            name='crepes'
+        )
+        self.omelette = self.create_recipe(
+            self.author, (self.dinner,),
+            ((self.milk, 50), (self.egg, 3)),
+            name='omelette'
+        )
+        self.bread = self.create_recipe(
+            self.author, (), ((self.flour, 500),), name='bread'
+        )
+
+    def get_neighbours(self):
+        return {
+            (recipe_id, neighbour_id): round(score, 9)
+            for recipe_id, neighbour_id, score
+            in RecipeNeighbour.objects.values_list(
+                'recipe_id', 'neighbour_id', 'score'
+            )
+        }
+
+    def test_block_size_does_not_change_neighbours(self):
+        similarity.build_neighbours()
+        expected = self.get_neighbours()
+        with mock.patch('recipes_app.similarity.SIMILAR_BLOCK_SIZE', 1):
+            self.assertEqual(similarity.get_batch_size(4), 1)
+            similarity.build_neighbours()
+        self.assertEqual(self.get_neighbours(), expected)
+        self.assertNotIn((self.pancakes.pk, self.pancakes.pk), expected)
+
+    def test_fold_in_matches_full_build(self):
+        similarity.build_neighbours()
+        expected = self.get_neighbours()
+        RecipeNeighbour.objects.filter(recipe=self.crepes).delete()
+        with mock.patch('recipes_app.similarity.SIMILAR_BLOCK_SIZE', 1):
+            self.assertEqual(similarity.fold_in_neighbours(), 1)
+        self.assertEqual(self.get_neighbours(), expected)
+
+    def test_similar_endpoint_orders_by_score(self):
+        similarity.build_neighbours()
+        response = self.client.get(
+            f'/api/recipes/{self.pancakes.pk}/similar/'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [recipe['id'] for recipe in response.data][:2],
+            [self.crepes.pk, self.omelette.pk]
+        )
+
+    def test_similar_endpoint_unknown_recipe(self):
+        for pk in ('abc', 100500):
+            response = self.client.get(f'/api/recipes/{pk}/similar/')
+            self.assertEqual(
+                response.status_code, status.HTTP_404_NOT_FOUND
+            )
@@ -0,0 +1,57 @@
+from rest_framework import status
+
+from foodgram_api.tests.base import FoodgramTestCase
+from recipes_app.models import Tag
+
+
+class TagFilterTests(FoodgramTestCase):
+    """
+    Фильтр по тегам работает по Recipe.tags_mask, поэтому маска должна
+    следовать за любым изменением тегов рецепта.
+    """
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('author')
+        self.recipe = self.create_recipe(
+            self.author, (self.breakfast,), ((self.flour, 100),)
+        )
+        self.other = self.create_recipe(
+            self.author, (self.dinner,), ((self.milk, 100),)
+        )
+
+    def get_ids(self, *slugs):
+        response = self.client.get(
+            '/api/recipes/', {'tags': slugs, 'limit': 100}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {recipe['id'] for recipe in response.data['results']}
+
+    def test_filter_by_one_or_several_tags(self):
+        self.assertEqual(self.get_ids('breakfast'), {self.recipe.pk})
+        self.assertEqual(
+            self.get_ids('breakfast', 'dinner'),
+            {self.recipe.pk, self.other.pk}
+        )
+
+    def test_patch_moves_recipe_to_new_tag(self):
+        response = self.get_client(self.author).patch(
+            f'/api/recipes/{self.recipe.pk}/',
+            self.get_recipe_data((self.dinner,), ((self.flour, 100),)),
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.get_ids('breakfast'), set())
+        self.assertEqual(
+            self.get_ids('dinner'), {self.recipe.pk, self.other.pk}
+        )
+
+    def test_tag_removed_from_recipes_side(self):
+        self.dinner.recipes_tags.clear()
+        self.assertEqual(self.get_ids('dinner'), set())
+
+    def test_deleted_tag_bit_is_reused_without_stale_matches(self):
+        self.breakfast.delete()
+        lunch = Tag.objects.create(name='Обед', color='#8775D2', slug='lunch')
+        self.assertEqual(self.get_ids('lunch'), set())
+        self.recipe.tags.add(lunch)
+        self.assertEqual(self.get_ids('lunch'), {self.recipe.pk})
@@ -0,0 +1,118 @@
+from django.db import connection, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from recipes_app.models import (Recipe,
+                                RecipeIngredientQuantity,
+                                ShoppingCart)
+from recipes_app.shopping_list import change_shopping_lists
+
+COUNTER_FIELDS = {
+    'Favorite': 'favorites_count',
+    'ShoppingCart': 'in_carts_count',
+}
+
+
+def apply_changes(model, user_id, recipe_ids, sign):
+    """
+    Изменения при добавлении (sign=1) и удалении (sign=-1) рецептов
+    recipe_ids в избранное или список покупок пользователя: счётчики
+    рецептов и, для списка покупок, суммы ингредиентов. Вызывается и
+    сигналами отдельных записей, и пакетными операциями.
+    """
+    if not recipe_ids:
+        return
+    field = COUNTER_FIELDS[model.__name__]
+    recipes = Recipe.objects.filter(pk__in=recipe_ids)
+    if sign < 0:
+        recipes = recipes.filter(**{f'{field}__gte': 1})
+    recipes.update(**{field: F(field) + sign})
+
+    if model is ShoppingCart:
+        totals = RecipeIngredientQuantity.objects.filter(
+            recipe_id__in=recipe_ids
+        ).values('ingredient').annotate(total=Sum('amount')).order_by()
+        change_shopping_lists(
+            (user_id,),
+            {row['ingredient']: sign * row['total'] for row in totals}
+        )
+
+
+def get_placeholders(values):
+    return ', '.join(['%s'] * len(values))
+
+
+def get_columns(model):
+    quote = connection.ops.quote_name
+    return (
+        quote(model._meta.db_table),
+        quote(model._meta.get_field('user').column),
+        quote(model._meta.get_field('recipe').column),
+        quote(model._meta.get_field('created_at').column),
+    )
+
+
+@transaction.atomic
+def add_user_recipes(model, user_id, recipe_ids):
+    """
+    Добавляет рецепты в избранное или список покупок одним INSERT:
+    существующие рецепты, которых ещё нет у пользователя. Повторы и
+    несуществующие id пропускаются без ошибки. Возвращает пары
+    (id записи, id рецепта) добавленных.
+    """
+    recipe_ids = list(dict.fromkeys(recipe_ids))
+    if not recipe_ids:
+        return []
+    quote = connection.ops.quote_name
+    table, user, recipe, created_at = get_columns(model)
+    recipe_pk = quote(Recipe._meta.pk.column)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} ({user}, {recipe}, {created_at})'
+            f' SELECT %s, {recipe_pk}, %s'
+            f' FROM {quote(Recipe._meta.db_table)}'
+            f' WHERE {recipe_pk} IN ({get_placeholders(recipe_ids)})'
+            f' ON CONFLICT DO NOTHING'
+            f' RETURNING {quote(model._meta.pk.column)}, {recipe}',
+            [
+                user_id,
+                connection.ops.adapt_datetimefield_value(timezone.now()),
+                *recipe_ids
+            ]
+        )
+        added = cursor.fetchall()
+    apply_changes(model, user_id, [recipe_id for _, recipe_id in added], 1)
+    return added
+
+
+@transaction.atomic
+def remove_user_recipes(model, user_id, recipe_ids):
+    """
+    Удаляет рецепты из избранного или списка покупок одним DELETE.
+    Возвращает id удалённых рецептов.
+    """
+    recipe_ids = list(dict.fromkeys(recipe_ids))
+    if not recipe_ids:
+        return []
+    table, user, recipe, _ = get_columns(model)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {table} WHERE {user} = %s'
+            f' AND {recipe} IN ({get_placeholders(recipe_ids)})'
+            f' RETURNING {recipe}',
+            [user_id, *recipe_ids]
+        )
+        removed = [recipe_id for recipe_id, in cursor.fetchall()]
+    apply_changes(model, user_id, removed, -1)
+    return removed
+
+
+@transaction.atomic
+def change_user_recipes(model, user_id, add, remove):
+    """
+    Удаляет и добавляет рецепты одной транзакцией. Возвращает id
+    добавленных и удалённых рецептов.
+    """
+    removed = remove_user_recipes(model, user_id, remove)
+    added = add_user_recipes(model, user_id, add)
+    return [recipe_id for _, recipe_id in added], removed
@@ -1,141 +1,398 @@
-from django.db.models import Sum
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.db.models import (BooleanField,
+                              Exists,
+                              F,
+                              OuterRef,
+                              Value)
+from django.http import Http404, HttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
-from django.shortcuts import get_object_or_404
 from rest_framework import filters, status
 from rest_framework.decorators import action
 from rest_framework.permissions import (AllowAny,
+                                        IsAdminUser,
                                         IsAuthenticated,
                                         IsAuthenticatedOrReadOnly)
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 
+from recipes_app.constants import (INGREDIENTS_VERSION_KEY,
+                                   RECIPE_BULK_IMPORT_MAX_SIZE,
+                                   SIMILAR_RECIPES_SIZE,
+                                   TAGS_VERSION_KEY)
+from recipes_app.images import get_renditions_time
+from recipes_app.ingredient_index import ingredient_index
 from recipes_app.models import (Favorite,
                                 Ingredient,
                                 Recipe,
-                                RecipeIngredientQuantity,
                                 ShoppingCart,
                                 Tag
                                 )
 from recipes_app.serializers import (FavoriteSerializer,
                                      IngredientSerializer,
+                                     RecipeBatchSerializer,
                                      RecipeCreateSerializer,
                                      RecipeRetrieveSerializer,
                                      ShoppingCartSerializer,
                                      TagSerializer
                                      )
+from foodgram_api.async_views import AsyncAPIView
 from foodgram_api.filters import IngredientFilter, RecipeFilter
 from recipes_app.permissions import IsAuthorOrReadOnly
-from foodgram_api.utils import convert_shopping_cart_to_txt
+from recipes_app.similarity import get_similar_ids
+from recipes_app.user_recipes import (add_user_recipes,
+                                      change_user_recipes,
+                                      remove_user_recipes)
+from foodgram_api.constants import SHOPPING_CART_CHUNK_SIZE
+from foodgram_api.mixins import ConditionalGetMixin
+from foodgram_api.negotiation import FirstRendererNegotiation
+from foodgram_api.pagination import FeedPagination, RecipePagination
+from foodgram_api.utils import SHOPPING_CART_FORMATS, stream_shopping_cart
+from foodgram_api.versions import get_local_version
+from subscriptions_app.models import Subscription
+from subscriptions_app.timeline import get_feed_page
 
+RENDERED_CATALOGUES = {}
 
-class TagsViewSet(ModelViewSet):
-    queryset = Tag.objects.all()
+
+class CatalogueViewSet(ConditionalGetMixin, ModelViewSet):
+    """
+    Базовый вьюсет справочников: ETag и Last-Modified берутся из версии
+    справочника, которую меняют сигналы моделей. Версия читается один
+    раз за запрос.
+    """
     http_method_names = ('get',)
-    serializer_class = TagSerializer
     permission_classes = (AllowAny,)
     pagination_class = None
+    version_key = None
+    catalogue_version = None
+
+    def get_catalogue_version(self):
+        if self.catalogue_version is None:
+            self.catalogue_version = get_local_version(self.version_key)
+        return self.catalogue_version
+
+    def get_etag_data(self, request):
+        return self.get_catalogue_version()[0]
+
+    def get_last_modified(self, request):
+        return self.get_catalogue_version()[1]
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            self.list_rendered, request, *args, **kwargs
+        )
+
+    def list_rendered(self, request, *args, **kwargs):
+        """
+        Полный список отдаётся готовыми байтами JSON, которые хранятся в
+        памяти процесса до смены версии справочника.
+        """
+        if request.accepted_renderer.format != 'json':
+            return super().list(request, *args, **kwargs)
 
+        version, _ = self.get_catalogue_version()
+        rendered = RENDERED_CATALOGUES.get(self.version_key)
+        if rendered is None or rendered[0] != version:
+            data = self.get_serializer(self.get_queryset(), many=True).data
+            rendered = (version, JSONRenderer().render(data))
+            RENDERED_CATALOGUES[self.version_key] = rendered
+        return HttpResponse(rendered[1], content_type='application/json')
 
-class IngredientViewSet(ModelViewSet):
+
+class TagsViewSet(CatalogueViewSet):
+    queryset = Tag.objects.all()
+    serializer_class = TagSerializer
+    version_key = TAGS_VERSION_KEY
+
+
+class IngredientViewSet(CatalogueViewSet):
     queryset = Ingredient.objects.all()
-    http_method_names = ('get',)
     serializer_class = IngredientSerializer
-    permission_classes = (AllowAny,)
     filter_backends = (DjangoFilterBackend, filters.SearchFilter)
     filterset_class = IngredientFilter
-    pagination_class = None
+    version_key = INGREDIENTS_VERSION_KEY
+
+    def list_rendered(self, request, *args, **kwargs):
+        name = request.query_params.get('name')
+        if not name:
+            return super().list_rendered(request, *args, **kwargs)
+        return Response(ingredient_index.search(
+            name, self.get_catalogue_version()[0]
+        ))
 
 
-class RecipeViewSet(ModelViewSet):
+class RecipeViewSet(ConditionalGetMixin, ModelViewSet):
     queryset = Recipe.objects.all()
     permission_classes = (IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
+    pagination_class = RecipePagination
+    conditional_vary_headers = ('Authorization',)
 
-    def get_serializer_class(self):
-        if self.action in ('list', 'retrieve'):
-            return RecipeRetrieveSerializer
-        return RecipeCreateSerializer
-
-    def perform_create(self, serializer):
+    def get_user_flags(self):
+        """
+        Выражения для is_favorited и is_in_shopping_cart текущего
+        пользователя относительно рецепта из внешнего запроса.
+        """
         user = self.request.user
-        serializer.save(author=user)
+        if user.is_anonymous:
+            return {
+                'is_favorited': Value(False, output_field=BooleanField()),
+                'is_in_shopping_cart': Value(
+                    False, output_field=BooleanField()
+                ),
+            }
+        return {
+            'is_favorited': Exists(Favorite.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+            'is_in_shopping_cart': Exists(ShoppingCart.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+        }
 
-    def add_recipe(self, model, request, pk, message):
-        recipe = get_object_or_404(Recipe, pk=pk)
+    def get_is_subscribed(self, author):
         user = self.request.user
+        if user.is_anonymous:
+            return Value(False, output_field=BooleanField())
+        return Exists(Subscription.objects.filter(user=user, author=author))
 
-        if model.objects.filter(recipe=recipe, user=user).exists():
-            return Response(data=message, status=status.HTTP_400_BAD_REQUEST)
+    def get_queryset(self):
+        if self.action not in ('list', 'retrieve', 'feed', 'similar'):
+            return super().get_queryset()
 
-        data = {
-            'recipe': recipe.pk,
-            'user': user.pk
-        }
-        if model.__name__ == 'Favorite':
-            serializer = FavoriteSerializer(data=data)
-        else:
-            serializer = ShoppingCartSerializer(data=data)
+        return Recipe.objects.annotate(
+            **self.get_user_flags(),
+            author_is_subscribed=self.get_is_subscribed(OuterRef('author'))
+        )
 
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
+    def get_fingerprint(self):
+        """
+        Всё, от чего зависит ответ retrieve, одним лёгким запросом.
+        """
+        try:
+            return Recipe.objects.filter(pk=self.kwargs['pk']).annotate(
+                **self.get_user_flags(),
+                author_is_subscribed=self.get_is_subscribed(
+                    OuterRef('author')
+                )
+            ).values(
+                'updated_at',
+                'image',
+                'is_favorited',
+                'is_in_shopping_cart',
+                'author_is_subscribed',
+                'author__email',
+                'author__username',
+                'author__first_name',
+                'author__last_name',
+            ).first()
+        except (TypeError, ValueError):
+            return None
 
-        return Response(data=serializer.data, status=status.HTTP_201_CREATED)
+    def get_etag_data(self, request):
+        self.fingerprint = None
+        if self.action != 'retrieve':
+            return None
+
+        self.fingerprint = self.get_fingerprint()
+        if self.fingerprint is None:
+            return None
+        self.renditions_time = (
+            get_renditions_time(self.fingerprint['image'])
+            if self.fingerprint['image'] else None
+        )
+        self.catalogue_versions = (
+            get_local_version(TAGS_VERSION_KEY),
+            get_local_version(INGREDIENTS_VERSION_KEY),
+        )
+        return (
+            request.user.pk,
+            sorted(self.fingerprint.items()),
+            self.renditions_time,
+            self.catalogue_versions,
+        )
 
-    def delete_recipe(self, model, request, pk, message):
-        get_object_or_404(model,
-                          recipe=Recipe.objects.filter(pk=pk).first(),
-                          user=self.request.user).delete()
+    def get_last_modified(self, request):
+        """
+        Флаги пользователя не имеют времени изменения, поэтому
+        Last-Modified отдаётся только анонимам; для остальных
+        достаточно ETag. Пока копии изображения не готовы, ответ
+        изменится без изменения рецепта, и Last-Modified не отдаётся.
+        """
+        if self.fingerprint is None or not request.user.is_anonymous:
+            return None
+        if self.fingerprint['image'] and self.renditions_time is None:
+            return None
+        return max(
+            self.fingerprint['updated_at'],
+            self.renditions_time or self.fingerprint['updated_at'],
+            *(changed_at for _, changed_at in self.catalogue_versions),
+        )
+
+    def get_serializer_class(self):
+        if self.action in ('list', 'retrieve', 'feed', 'similar'):
+            return RecipeRetrieveSerializer
+        return RecipeCreateSerializer
 
-        return Response(status=status.HTTP_204_NO_CONTENT)
+    def perform_create(self, serializer):
+        user = self.request.user
+        serializer.save(author=user)
 
-    @action(detail=True,
+    @action(detail=False,
             methods=('post',),
-            permission_classes=(IsAuthenticated,)
+            permission_classes=(IsAdminUser,)
             )
-    def favorite(self, request, pk=None):
-        return self.add_recipe(Favorite,
-                               request,
-                               pk,
-                               'Рецепт уже есть в избранном.')
-
-    @favorite.mapping.delete
-    def delete_from_favorites(self, request, pk=None):
-        return self.delete_recipe(Favorite,
-                                  request,
-                                  pk,
-                                  'Такого рецепта нет в избранном.')
-
-    @action(detail=True,
-            methods=('post',),
-            permission_classes=(IsAuthenticated,)
+    def bulk_import(self, request):
+        serializer = RecipeCreateSerializer(
+            data=request.data,
+            many=True,
+            allow_empty=False,
+            max_length=RECIPE_BULK_IMPORT_MAX_SIZE,
+            context=self.get_serializer_context()
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save(author=request.user)
+        return Response(data=serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False,
+            permission_classes=(IsAuthenticated,),
+            pagination_class=FeedPagination
             )
-    def shopping_cart(self, request, pk):
-        return self.add_recipe(ShoppingCart,
-                               request,
-                               pk,
-                               'Рецепт уже есть в списке покупок.')
-
-    @shopping_cart.mapping.delete
-    def delete_from_shopping_cart(self, request, pk):
-        return self.delete_recipe(ShoppingCart,
-                                  request,
-                                  pk,
-                                  'Такого рецепта нет в списке покупок.')
+    def feed(self, request):
+        """
+        Рецепты авторов, на которых подписан пользователь, от новых
+        к старым.
+        """
+        page = self.paginator.paginate_feed(
+            request, partial(get_feed_page, request.user)
+        )
+        recipes = self.get_queryset().in_bulk(page)
+        serializer = self.get_serializer(
+            [recipes[pk] for pk in page if pk in recipes], many=True
+        )
+        return self.paginator.get_paginated_response(serializer.data)
+
+    @action(detail=True)
+    def similar(self, request, pk=None):
+        """
+        Рецепты с похожими ингредиентами и тегами, от самых близких.
+        Соседи заранее рассчитаны командой build_similar_recipes.
+        """
+        try:
+            pk = int(pk)
+        except (TypeError, ValueError):
+            raise Http404
+        similar_ids = get_similar_ids(pk, SIMILAR_RECIPES_SIZE)
+        if not similar_ids and not Recipe.objects.filter(pk=pk).exists():
+            raise Http404
+        recipes = self.get_queryset().in_bulk(similar_ids)
+        serializer = self.get_serializer(
+            [recipes[recipe_id] for recipe_id in similar_ids
+             if recipe_id in recipes],
+            many=True
+        )
+        return Response(serializer.data)
 
     @action(detail=False,
-            permission_classes=(IsAuthenticated,)
+            permission_classes=(IsAuthenticated,),
+            content_negotiation_class=FirstRendererNegotiation
             )
     def download_shopping_cart(self, request):
-        ingredients = RecipeIngredientQuantity.objects.filter(
-            recipe__shopping_cart__user=request.user
-        ).values(
+        file_format = request.query_params.get('format', 'txt')
+        if file_format not in SHOPPING_CART_FORMATS:
+            return Response(
+                data=('Поддерживаемые форматы: '
+                      f'{", ".join(SHOPPING_CART_FORMATS)}.'),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        ingredients = request.user.shopping_list.values(
             'ingredient__name',
-            'ingredient__measurement_unit'
+            'ingredient__measurement_unit',
+            ingredient_total=F('amount')
         ).order_by(
             'ingredient__name'
-        ).annotate(
-            ingredient_total=Sum('amount')
+        ).iterator(chunk_size=SHOPPING_CART_CHUNK_SIZE)
+
+        return stream_shopping_cart(ingredients, file_format)
+
+
+class RecipeRelationView(AsyncAPIView):
+    """
+    Асинхронное добавление рецепта в избранное или список покупок
+    и удаление из него.
+    """
+    model = None
+    serializer_class = None
+    exists_message = None
+
+    async def post(self, request, pk):
+        added = await sync_to_async(add_user_recipes)(
+            self.model, request.user.pk, [pk]
+        )
+        if not added:
+            if not await Recipe.objects.filter(pk=pk).aexists():
+                raise Http404
+            return self.render(
+                self.exists_message, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        [(instance_id, recipe_id)] = added
+        instance = self.model(
+            id=instance_id, recipe_id=recipe_id, user_id=request.user.pk
         )
+        return self.render(
+            self.serializer_class(instance).data,
+            status=status.HTTP_201_CREATED
+        )
+
+    async def delete(self, request, pk):
+        if not await sync_to_async(remove_user_recipes)(
+            self.model, request.user.pk, [pk]
+        ):
+            raise Http404
+        return self.render(status=status.HTTP_204_NO_CONTENT)
+
+
+class RecipeRelationBatchView(AsyncAPIView):
+    """
+    Добавление и удаление многих рецептов в избранном или списке
+    покупок одним запросом. Несуществующие рецепты и повторы
+    пропускаются, в ответе - id реально добавленных и удалённых.
+    """
+    model = None
+
+    async def post(self, request):
+        serializer = RecipeBatchSerializer(data=self.get_data(request))
+        serializer.is_valid(raise_exception=True)
+        added, removed = await sync_to_async(change_user_recipes)(
+            self.model,
+            request.user.pk,
+            serializer.validated_data['add'],
+            serializer.validated_data['remove']
+        )
+        return self.render({'added': added, 'removed': removed})
+
+
+class FavoriteView(RecipeRelationView):
+    model = Favorite
+    serializer_class = FavoriteSerializer
+    exists_message = 'Рецепт уже есть в избранном.'
+
+
+class ShoppingCartView(RecipeRelationView):
+    model = ShoppingCart
+    serializer_class = ShoppingCartSerializer
+    exists_message = 'Рецепт уже есть в списке покупок.'
+
+
+class FavoriteBatchView(RecipeRelationBatchView):
+    model = Favorite
+
 
-        return convert_shopping_cart_to_txt(ingredients)
+class ShoppingCartBatchView(RecipeRelationBatchView):
+    model = ShoppingCart
@@ -5,3 +5,6 @@ class SubscriptionsAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'subscriptions_app'
     verbose_name = 'Подписки'
+
+    def ready(self):
+        import subscriptions_app.signals  # noqa: F401
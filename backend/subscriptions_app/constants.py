@@ -0,0 +1,3 @@
+FEED_FANOUT_MAX_FOLLOWERS = 10000
+FEED_BACKFILL_SIZE = 100
+FEED_CHUNK_SIZE = 2000
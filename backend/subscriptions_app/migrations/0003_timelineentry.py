@@ -0,0 +1,68 @@
+# Generated by Django 4.2.11 on 2026-10-18 21:00
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+FEED_FANOUT_MAX_FOLLOWERS = 10000
+FEED_BACKFILL_SIZE = 100
+
+
+def fill_timelines(apps, schema_editor):
+    Subscription = apps.get_model('subscriptions_app', 'Subscription')
+    Recipe = apps.get_model('recipes_app', 'Recipe')
+    TimelineEntry = apps.get_model('subscriptions_app', 'TimelineEntry')
+
+    author_recipes = {}
+    entries = []
+    for user_id, author_id in Subscription.objects.filter(
+        author__followers_count__lte=FEED_FANOUT_MAX_FOLLOWERS
+    ).values_list('user_id', 'author_id').iterator():
+        if author_id not in author_recipes:
+            author_recipes[author_id] = list(
+                Recipe.objects.filter(author_id=author_id).order_by(
+                    '-pub_date', '-id'
+                ).values_list('pk', 'pub_date')[:FEED_BACKFILL_SIZE]
+            )
+        entries += [
+            TimelineEntry(
+                user_id=user_id,
+                recipe_id=recipe_id,
+                author_id=author_id,
+                pub_date=pub_date
+            ) for recipe_id, pub_date in author_recipes[author_id]
+        ]
+    TimelineEntry.objects.bulk_create(entries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes_app', '0008_tag_bit_recipe_tags_mask'),
+        ('subscriptions_app', '0002_initial'),
+        ('users_app', '0002_user_followers_count_user_recipes_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pub_date', models.DateTimeField(verbose_name='Дата публикации')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Автор рецепта')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to='recipes_app.recipe', verbose_name='Рецепт')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='timeline', to=settings.AUTH_USER_MODEL, verbose_name='Подписчик')),
+            ],
+            options={
+                'verbose_name': 'запись ленты',
+                'verbose_name_plural': 'Лента подписок',
+                'indexes': [models.Index(fields=['user', '-pub_date', '-recipe'], name='timeline_user_pub_date'), models.Index(fields=['user', 'author'], name='timeline_user_author')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='timelineentry',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='unique_timeline_entry'),
+        ),
+        migrations.RunPython(fill_timelines, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.11 on 2026-10-18 21:21
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+FEED_FANOUT_MAX_FOLLOWERS = 10000
+
+
+def fill_pull_authors(apps, schema_editor):
+    """
+    Авторы, которых 0003 не разложила по лентам.
+    """
+    User = apps.get_model('users_app', 'User')
+    PullAuthor = apps.get_model('subscriptions_app', 'PullAuthor')
+    PullAuthor.objects.bulk_create([
+        PullAuthor(author_id=pk) for pk in User.objects.filter(
+            followers_count__gt=FEED_FANOUT_MAX_FOLLOWERS
+        ).values_list('pk', flat=True)
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users_app', '0002_user_followers_count_user_recipes_count'),
+        ('subscriptions_app', '0003_timelineentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PullAuthor',
+            fields=[
+                ('author', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+            ],
+            options={
+                'verbose_name': 'автор без раскладки по лентам',
+                'verbose_name_plural': 'Авторы без раскладки по лентам',
+            },
+        ),
+        migrations.RunPython(fill_pull_authors, migrations.RunPython.noop),
+    ]
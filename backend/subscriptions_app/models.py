@@ -1,5 +1,6 @@
 from django.db import models
 
+from recipes_app.models import Recipe
 from users_app.models import User
 
 
@@ -38,3 +39,78 @@ class Subscription(models.Model):
         )
         verbose_name = 'подписка'
         verbose_name_plural = 'Подписки'
+
+
+class TimelineEntry(models.Model):
+    """
+    Рецепт в ленте подписок пользователя. Записи создаются при
+    публикации рецепта и при подписке; рецепты авторов с очень большим
+    числом подписчиков в ленту не пишутся и подмешиваются при чтении.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        db_index=False,
+        verbose_name='Подписчик',
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Рецепт',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор рецепта',
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    def __str__(self):
+        return f'{self.recipe} в ленте {self.user}'
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'recipe'),
+                name='unique_timeline_entry'
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('user', '-pub_date', '-recipe'),
+                name='timeline_user_pub_date'
+            ),
+            models.Index(
+                fields=('user', 'author'),
+                name='timeline_user_author'
+            ),
+        )
+        verbose_name = 'запись ленты'
+        verbose_name_plural = 'Лента подписок'
+
+
+class PullAuthor(models.Model):
+    """
+    Автор, рецепты которого не раскладываются по лентам подписчиков, а
+    подмешиваются при чтении. Автор попадает сюда, когда подписчиков
+    становится больше FEED_FANOUT_MAX_FOLLOWERS, и остаётся до
+    rebuild_timelines, даже если подписчиков стало меньше: иначе
+    рецепты, опубликованные без раскладки, пропали бы из лент.
+    """
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='+',
+        verbose_name='Автор',
+    )
+
+    def __str__(self):
+        return str(self.author)
+
+    class Meta:
+        verbose_name = 'автор без раскладки по лентам'
+        verbose_name_plural = 'Авторы без раскладки по лентам'
@@ -1,42 +1,13 @@
 from rest_framework import serializers
 
+from foodgram_api.mixins import TimedSerializerMixin
 from recipes_app.models import Recipe
 from recipes_app.serializers import RecipeSerializer
 from subscriptions_app.models import Subscription
 
 
-class SubscribeSerializer(serializers.ModelSerializer):
-    """
-    Сериализатор подписок.
-    """
-    class Meta:
-        model = Subscription
-        fields = ('user', 'author')
-
-    def to_representation(self, instance):
-        request = self.context.get('request')
-        context = {'request': request}
-        serializer = SubscriptionSerializer(
-            instance,
-            context=context
-        )
-        return serializer.data
-
-    def validate(self, data):
-        user = data.get('user')
-        author = data.get('author')
-        if user == author:
-            raise serializers.ValidationError(
-                'Нельзя подписаться на самого себя.'
-            )
-        if Subscription.objects.filter(user=user, author=author).exists():
-            raise serializers.ValidationError(
-                'Вы уже подписаны на этого автора.'
-            )
-        return data
-
-
-class SubscriptionSerializer(serializers.ModelSerializer):
+class SubscriptionSerializer(TimedSerializerMixin,
+                             serializers.ModelSerializer):
     """
     Сериализатор предоставления данных подписок.
     """
@@ -67,12 +38,20 @@ class SubscriptionSerializer(serializers.ModelSerializer):
         )
 
     def get_is_subscribed(self, obj):
+        annotated = getattr(obj, 'is_subscribed', None)
+        if annotated is not None:
+            return annotated
+
         request = self.context.get('request')
         return Subscription.objects.filter(
             author=obj.author, user=request.user
         ).exists()
 
     def get_recipes(self, obj):
+        queryset = getattr(obj, 'author_recipes', None)
+        if queryset is not None:
+            return RecipeSerializer(queryset, read_only=True, many=True).data
+
         request = self.context.get('request')
         if request.GET.get('recipes_limit'):
             recipes_limit = int(request.GET['recipes_limit'])
@@ -87,4 +66,8 @@ class SubscriptionSerializer(serializers.ModelSerializer):
         return serializer.data
 
     def get_recipes_count(self, obj):
-        return obj.author.recipes.count()
+        annotated = getattr(obj, 'recipes_count', None)
+        if annotated is not None:
+            return annotated
+
+        return obj.author.recipes_count
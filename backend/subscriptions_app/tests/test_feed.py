@@ -0,0 +1,136 @@
+from unittest import mock
+
+from django.core.management import call_command
+from rest_framework import status
+
+from foodgram_api.tests.base import FoodgramTestCase
+from subscriptions_app.models import PullAuthor, Subscription
+
+
+@mock.patch('subscriptions_app.timeline.FEED_FANOUT_MAX_FOLLOWERS', 1)
+class FeedTests(FoodgramTestCase):
+    """
+    Лента подписок с порогом раскладки в одного подписчика: второй
+    подписчик переводит автора на подмешивание при чтении. Рецепты
+    раскладываются по лентам после фиксации транзакции.
+    """
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('author')
+        self.other_author = self.create_user('other')
+        self.first = self.create_user('first')
+        self.second = self.create_user('second')
+        self.old_recipe = self.create_recipe(self.author, name='Старый')
+
+    def create_recipe(self, *args, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return super().create_recipe(*args, **kwargs)
+
+    def get_feed(self, user, limit=100):
+        response = self.get_client(user).get(
+            '/api/recipes/feed/', {'limit': limit}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def get_feed_ids(self, user):
+        return [recipe['id'] for recipe in self.get_feed(user).data['results']]
+
+    def subscribe(self, user, author):
+        Subscription.objects.create(user=user, author=author)
+
+    def test_feed_is_newest_first_and_follows_subscriptions(self):
+        self.subscribe(self.first, self.author)
+        self.subscribe(self.first, self.other_author)
+        other_recipe = self.create_recipe(self.other_author)
+        new_recipe = self.create_recipe(self.author)
+        self.assertEqual(
+            self.get_feed_ids(self.first),
+            [new_recipe.pk, other_recipe.pk, self.old_recipe.pk]
+        )
+        Subscription.objects.filter(
+            user=self.first, author=self.author
+        ).delete()
+        self.assertEqual(self.get_feed_ids(self.first), [other_recipe.pk])
+
+    def test_cursor_pages_cover_feed_once(self):
+        self.subscribe(self.first, self.author)
+        recipes = [self.create_recipe(self.author) for _ in range(4)]
+        expected = [recipe.pk for recipe in reversed(recipes)]
+        expected.append(self.old_recipe.pk)
+        client = self.get_client(self.first)
+        ids, url = [], '/api/recipes/feed/?limit=2'
+        while url:
+            response = client.get(url)
+            ids += [recipe['id'] for recipe in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(ids, expected)
+
+    def test_author_over_limit_is_merged_on_read(self):
+        self.subscribe(self.first, self.author)
+        self.subscribe(self.second, self.author)
+        self.assertTrue(
+            PullAuthor.objects.filter(author=self.author).exists()
+        )
+        new_recipe = self.create_recipe(self.author)
+        expected = [new_recipe.pk, self.old_recipe.pk]
+        self.assertEqual(self.get_feed_ids(self.first), expected)
+        self.assertEqual(self.get_feed_ids(self.second), expected)
+
+    def test_author_back_under_limit_keeps_recipes_in_feeds(self):
+        self.subscribe(self.first, self.author)
+        self.subscribe(self.second, self.author)
+        new_recipe = self.create_recipe(self.author)
+        Subscription.objects.filter(
+            author=self.author, user=self.second
+        ).delete()
+        self.assertEqual(
+            self.get_feed_ids(self.first), [new_recipe.pk, self.old_recipe.pk]
+        )
+
+        call_command('rebuild_timelines', stdout=mock.MagicMock())
+        self.assertFalse(PullAuthor.objects.exists())
+        self.assertEqual(
+            self.get_feed_ids(self.first), [new_recipe.pk, self.old_recipe.pk]
+        )
+        newest = self.create_recipe(self.author)
+        self.assertEqual(
+            self.get_feed_ids(self.first),
+            [newest.pk, new_recipe.pk, self.old_recipe.pk]
+        )
+
+    def test_follower_of_pulled_author_sees_older_recipes(self):
+        self.subscribe(self.first, self.author)
+        self.subscribe(self.second, self.author)
+        Subscription.objects.filter(
+            author=self.author, user=self.first
+        ).delete()
+        self.subscribe(self.first, self.author)
+        self.assertEqual(self.get_feed_ids(self.first), [self.old_recipe.pk])
+
+    def test_fan_out_waits_for_commit(self):
+        self.subscribe(self.first, self.author)
+        with self.captureOnCommitCallbacks() as callbacks:
+            recipe = super().create_recipe(self.author)
+            self.assertEqual(
+                self.get_feed_ids(self.first), [self.old_recipe.pk]
+            )
+        for callback in callbacks:
+            callback()
+        self.assertEqual(
+            self.get_feed_ids(self.first), [recipe.pk, self.old_recipe.pk]
+        )
+
+    @mock.patch('subscriptions_app.timeline.FEED_BACKFILL_SIZE', 2)
+    def test_recipes_beyond_backfill_are_merged_on_read(self):
+        recipes = [self.old_recipe] + [
+            self.create_recipe(self.author) for _ in range(3)
+        ]
+        self.subscribe(self.first, self.author)
+        self.assertEqual(
+            self.get_feed_ids(self.first),
+            [recipe.pk for recipe in reversed(recipes)]
+        )
+        self.assertFalse(
+            PullAuthor.objects.filter(author=self.author).exists()
+        )
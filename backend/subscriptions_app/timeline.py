@@ -0,0 +1,193 @@
+from django.db import transaction
+from django.db.models import Q
+
+from recipes_app.models import Recipe
+from subscriptions_app.constants import (FEED_BACKFILL_SIZE,
+                                         FEED_CHUNK_SIZE,
+                                         FEED_FANOUT_MAX_FOLLOWERS)
+from subscriptions_app.models import (PullAuthor,
+                                      Subscription,
+                                      TimelineEntry)
+from users_app.models import User
+
+
+def write_entries(entries):
+    TimelineEntry.objects.bulk_create(
+        entries, batch_size=FEED_CHUNK_SIZE, ignore_conflicts=True
+    )
+
+
+def get_pull_authors():
+    return PullAuthor.objects.values('author_id')
+
+
+def mark_pull_author(author_id):
+    """
+    Переводит автора на подмешивание при чтении, если подписчиков
+    стало больше FEED_FANOUT_MAX_FOLLOWERS. Решение принимается по
+    текущему счётчику в базе. Возвращает, подмешивается ли автор.
+    """
+    if User.objects.filter(
+        pk=author_id, followers_count__gt=FEED_FANOUT_MAX_FOLLOWERS
+    ).exists():
+        PullAuthor.objects.bulk_create(
+            [PullAuthor(author_id=author_id)], ignore_conflicts=True
+        )
+        return True
+    return PullAuthor.objects.filter(author_id=author_id).exists()
+
+
+def fan_out(recipes):
+    """
+    Добавляет новые рецепты в ленты подписчиков их авторов. Авторы из
+    PullAuthor пропускаются: их рецепты подмешиваются при чтении ленты.
+    Вызывается после фиксации транзакции, создавшей рецепты, и пишет
+    записи пачками по FEED_CHUNK_SIZE.
+    """
+    author_recipes = {}
+    for recipe in recipes:
+        author_recipes.setdefault(recipe.author_id, []).append(recipe)
+    followers = Subscription.objects.filter(
+        author_id__in=author_recipes
+    ).exclude(
+        author_id__in=get_pull_authors()
+    ).values_list('user_id', 'author_id').iterator(chunk_size=FEED_CHUNK_SIZE)
+
+    entries = []
+    for user_id, author_id in followers:
+        entries += [
+            TimelineEntry(
+                user_id=user_id,
+                recipe_id=recipe.pk,
+                author_id=author_id,
+                pub_date=recipe.pub_date
+            ) for recipe in author_recipes[author_id]
+        ]
+        if len(entries) >= FEED_CHUNK_SIZE:
+            write_entries(entries)
+            entries = []
+    write_entries(entries)
+
+
+def get_pulled_authors(user):
+    """
+    Авторы подписок пользователя, рецепты которых подмешиваются при
+    чтении ленты: авторы из PullAuthor и авторы, у которых рецептов
+    больше FEED_BACKFILL_SIZE, - их старые рецепты в ленту не попали.
+    """
+    return Subscription.objects.filter(user=user).filter(
+        Q(author_id__in=get_pull_authors())
+        | Q(author__recipes_count__gt=FEED_BACKFILL_SIZE)
+    ).values('author_id')
+
+
+def get_backfill(author_id):
+    return Recipe.objects.filter(author_id=author_id).order_by(
+        '-pub_date', '-id'
+    ).values_list('pk', 'pub_date')[:FEED_BACKFILL_SIZE]
+
+
+def backfill(user_id, author_id):
+    """
+    Добавляет в ленту последние FEED_BACKFILL_SIZE рецептов автора,
+    на которого подписался пользователь. Более старые рецепты
+    подмешиваются при чтении, см. get_pulled_authors.
+    """
+    if mark_pull_author(author_id):
+        return
+    write_entries([
+        TimelineEntry(
+            user_id=user_id,
+            recipe_id=recipe_id,
+            author_id=author_id,
+            pub_date=pub_date
+        ) for recipe_id, pub_date in get_backfill(author_id)
+    ])
+
+
+def prune(user_id, author_id):
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+@transaction.atomic
+def rebuild_timelines():
+    """
+    Заполняет ленты заново по подпискам, как если бы каждый подписался
+    сейчас, и заново выбирает авторов без раскладки по текущему числу
+    подписчиков. Нужна после массовой загрузки данных, изменения
+    FEED_FANOUT_MAX_FOLLOWERS и чтобы вернуть раскладку авторам, у
+    которых стало меньше подписчиков.
+    """
+    TimelineEntry.objects.all().delete()
+    PullAuthor.objects.all().delete()
+    PullAuthor.objects.bulk_create([
+        PullAuthor(author_id=pk) for pk in User.objects.filter(
+            followers_count__gt=FEED_FANOUT_MAX_FOLLOWERS
+        ).values_list('pk', flat=True)
+    ])
+    subscriptions = Subscription.objects.exclude(
+        author_id__in=get_pull_authors()
+    ).order_by('author_id').values_list(
+        'user_id', 'author_id'
+    ).iterator(chunk_size=FEED_CHUNK_SIZE)
+
+    entries, count = [], 0
+    recipes_author_id, recipes = None, []
+    for user_id, author_id in subscriptions:
+        if author_id != recipes_author_id:
+            recipes_author_id, recipes = author_id, list(
+                get_backfill(author_id)
+            )
+        entries += [
+            TimelineEntry(
+                user_id=user_id,
+                recipe_id=recipe_id,
+                author_id=author_id,
+                pub_date=pub_date
+            ) for recipe_id, pub_date in recipes
+        ]
+        if len(entries) >= FEED_CHUNK_SIZE:
+            write_entries(entries)
+            count += len(entries)
+            entries = []
+    write_entries(entries)
+    return count + len(entries)
+
+
+def before(position, pk_field):
+    """
+    Условие «раньше позиции (pub_date, id)» в порядке ленты.
+    """
+    pub_date, pk = position
+    return Q(pub_date__lt=pub_date) | Q(
+        pub_date=pub_date, **{f'{pk_field}__lt': pk}
+    )
+
+
+def get_feed_page(user, position, size):
+    """
+    Возвращает id рецептов страницы ленты после позиции position
+    (None - с начала) и позицию для следующей страницы или None.
+    Лента читается одним проходом по индексу (user, -pub_date, -recipe);
+    рецепты авторов из get_pulled_authors берутся отдельным запросом и
+    сливаются с ней, повторы убираются.
+    """
+    entries = TimelineEntry.objects.filter(user=user)
+    if position is not None:
+        entries = entries.filter(before(position, 'recipe_id'))
+    rows = list(entries.order_by('-pub_date', '-recipe_id').values_list(
+        'pub_date', 'recipe_id'
+    )[:size + 1])
+
+    recipes = Recipe.objects.filter(author_id__in=get_pulled_authors(user))
+    if position is not None:
+        recipes = recipes.filter(before(position, 'id'))
+    pulled_rows = list(recipes.order_by('-pub_date', '-id').values_list(
+        'pub_date', 'id'
+    )[:size + 1])
+    if pulled_rows:
+        rows = sorted(set(rows + pulled_rows), reverse=True)
+
+    page = rows[:size]
+    next_position = page[-1] if len(rows) > size else None
+    return [recipe_id for _, recipe_id in page], next_position
@@ -1,13 +1,18 @@
-from django.shortcuts import get_object_or_404
-from rest_framework import status, views
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import BooleanField, F, Value, Window
+from django.db.models.functions import RowNumber
+from django.http import Http404
+from rest_framework import exceptions, status
 from rest_framework.generics import ListAPIView
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.response import Response
+from rest_framework.settings import api_settings
 
+from foodgram_api.async_views import AsyncAPIView, delete_atomic
+
+from recipes_app.models import Recipe
 from subscriptions_app.models import Subscription
-from subscriptions_app.serializers import (SubscribeSerializer,
-                                           SubscriptionSerializer
-                                           )
+from subscriptions_app.serializers import SubscriptionSerializer
 from users_app.models import User
 
 
@@ -20,28 +25,88 @@ class SubscriptionViewSet(ListAPIView):
 
     def get_queryset(self):
         user = self.request.user
-        return user.follower.all()
+        return user.follower.select_related('author').annotate(
+            is_subscribed=Value(True, output_field=BooleanField()),
+            recipes_count=F('author__recipes_count')
+        ).order_by('id')
+
+    def get_recipes_limit(self):
+        recipes_limit = self.request.query_params.get('recipes_limit')
+        if recipes_limit and recipes_limit.isdigit():
+            return int(recipes_limit)
+        return None
+
+    def paginate_queryset(self, queryset):
+        """
+        Рецепты всех авторов страницы загружаются одним запросом:
+        первые recipes_limit рецептов каждого автора отбираются
+        оконной функцией.
+        """
+        page = super().paginate_queryset(queryset)
+        subscriptions = page if page is not None else list(queryset)
+
+        recipes = Recipe.objects.filter(
+            author__in=[subscription.author_id
+                        for subscription in subscriptions]
+        )
+        recipes_limit = self.get_recipes_limit()
+        if recipes_limit is not None:
+            recipes = recipes.annotate(
+                row_number=Window(
+                    RowNumber(),
+                    partition_by=F('author'),
+                    order_by=F('pub_date').desc()
+                )
+            ).filter(row_number__lte=recipes_limit)
+
+        author_recipes = {}
+        for recipe in recipes:
+            author_recipes.setdefault(recipe.author_id, []).append(recipe)
+        for subscription in subscriptions:
+            subscription.author_recipes = author_recipes.get(
+                subscription.author_id, []
+            )
+        return page
 
 
-class SubscribeView(views.APIView):
+class SubscribeView(AsyncAPIView):
     """
-    Вьюсет добавления или удаления подписки.
+    Асинхронное добавление или удаление подписки. Проверки идут
+    через асинхронный ORM, в синхронном потоке - только создание
+    подписки с её сигналами и ответ.
     """
-    permission_classes = (IsAuthenticated,)
+    @transaction.atomic
+    def subscribe(self, request, author):
+        subscription = Subscription.objects.create(
+            user=request.user, author=author
+        )
+        return SubscriptionSerializer(
+            subscription, context={'request': request}
+        ).data
 
-    def post(self, request, pk):
-        author = get_object_or_404(User, pk=pk)
-        data = {'author': author.id, 'user': self.request.user.id}
-        serializer = SubscribeSerializer(
-            data=data, context={'request': request}
+    def validation_error(self, message):
+        return exceptions.ValidationError(
+            {api_settings.NON_FIELD_ERRORS_KEY: [message]}
         )
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
-        return Response(data=serializer.data, status=status.HTTP_201_CREATED)
 
-    def delete(self, request, pk):
-        get_object_or_404(Subscription,
-                          user=self.request.user,
-                          author__id=pk).delete()
+    async def post(self, request, pk):
+        author = await User.objects.filter(pk=pk).afirst()
+        if author is None:
+            raise Http404
+        if author.pk == request.user.pk:
+            raise self.validation_error('Нельзя подписаться на самого себя.')
+        if await Subscription.objects.filter(
+            user=request.user, author=author
+        ).aexists():
+            raise self.validation_error('Вы уже подписаны на этого автора.')
+        data = await sync_to_async(self.subscribe)(request, author)
+        return self.render(data, status=status.HTTP_201_CREATED)
 
-        return Response(status=status.HTTP_204_NO_CONTENT)
+    async def delete(self, request, pk):
+        subscription = await Subscription.objects.filter(
+            user=request.user, author_id=pk
+        ).afirst()
+        if subscription is None:
+            raise Http404
+        await delete_atomic(subscription)
+        return self.render(status=status.HTTP_204_NO_CONTENT)
@@ -5,3 +5,6 @@ class UsersAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users_app'
     verbose_name = 'Пользователи'
+
+    def ready(self):
+        import users_app.signals  # noqa: F401
@@ -3,3 +3,7 @@ FIRST_NAME_LENGTH = 150
 LAST_NAME_LENGTH = 150
 EMAIL_MAX_LENGTH = 254
 PASSWORD_MAX_LENGTH = 150
+
+PROFILE_VERSION_KEY = 'user_profile_version:{}'
+PROFILE_FIELDS = frozenset(('email', 'username', 'first_name', 'last_name'))
+AUTH_FIELDS = frozenset(('is_active',))
@@ -2,6 +2,7 @@ from django.contrib.auth.models import AbstractUser
 from django.core.validators import RegexValidator
 from django.db import models
 
+from foodgram_api.utils import CounterFieldsMixin
 from users_app.constants import (EMAIL_MAX_LENGTH,
                                  FIRST_NAME_LENGTH,
                                  LAST_NAME_LENGTH,
@@ -9,13 +10,14 @@ from users_app.constants import (EMAIL_MAX_LENGTH,
                                  USERNAME_MAX_LENGTH)
 
 
-class User(AbstractUser):
+class User(CounterFieldsMixin, AbstractUser):
     """
     Используется стандартная модель Пользователя.
     Переопределены условия работы полей и добавлены ограничения.
     """
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ('first_name', 'last_name', 'username')
+    counter_fields = ('recipes_count', 'followers_count')
 
     username = models.CharField(
         max_length=USERNAME_MAX_LENGTH,
@@ -60,10 +62,31 @@ class User(AbstractUser):
         verbose_name="фамилия",
         help_text=f'Фамилия. Ограничение в {LAST_NAME_LENGTH} символов.'
     )
+    recipes_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='рецептов'
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='подписчиков'
+    )
 
     def __str__(self):
         return self.username
 
+    def refresh_from_db(self, using=None, fields=None):
+        """
+        Обращение к отложенному полю загружает все отложенные поля одним
+        запросом. Так пользователь из кэша токенов, у которого есть
+        только id, догружается один раз, а не по запросу на поле.
+        """
+        deferred = self.get_deferred_fields()
+        if fields is not None and set(fields) <= deferred:
+            fields = deferred
+        super().refresh_from_db(using=using, fields=fields)
+
     class Meta:
         verbose_name = 'пользователь'
         verbose_name_plural = 'Пользователи'
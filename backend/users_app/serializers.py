@@ -6,6 +6,7 @@ from rest_framework.serializers import (CharField,
                                         RegexField,
                                         SerializerMethodField)
 
+from foodgram_api.mixins import TimedSerializerMixin
 from subscriptions_app.models import Subscription
 from users_app.constants import (EMAIL_MAX_LENGTH,
                                  FIRST_NAME_LENGTH,
@@ -85,7 +86,7 @@ class UserCreateSerializer(UserCreateSerializer):
         return attrs
 
 
-class UserSerializer(UserSerializer):
+class UserSerializer(TimedSerializerMixin, UserSerializer):
     """
     Djoser-сериализатор пользователя.
     """
@@ -103,7 +104,13 @@ class UserSerializer(UserSerializer):
         )
 
     def get_is_subscribed(self, obj):
+        annotated = getattr(obj, 'is_subscribed', None)
+        if annotated is not None:
+            return annotated
+
         request = self.context.get('request')
+        if request and obj.pk == request.user.pk:
+            return False
 
         return not request or (
             not request.user.is_anonymous
@@ -0,0 +1,55 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from foodgram_api.authentication import token_cache
+from foodgram_api.versions import bump_version
+from users_app.constants import (AUTH_FIELDS,
+                                 PROFILE_FIELDS,
+                                 PROFILE_VERSION_KEY)
+from users_app.models import User
+
+
+@receiver(post_save, sender=User)
+def bump_profile_version(sender, instance, update_fields=None, **kwargs):
+    """
+    Меняет версию профиля, от которой зависят закэшированные рецепты
+    автора. Сохранение last_login при входе версию не меняет.
+    """
+    if update_fields is not None and PROFILE_FIELDS.isdisjoint(update_fields):
+        return
+    key = PROFILE_VERSION_KEY.format(instance.pk)
+    transaction.on_commit(lambda: bump_version(key))
+
+
+@receiver(post_save, sender=User)
+def forget_user_tokens(sender, instance, created, update_fields=None,
+                       **kwargs):
+    """
+    Убирает токены пользователя из кэша авторизации при деактивации:
+    кэшируются токены только активных пользователей.
+    """
+    if created or (
+        update_fields is not None and AUTH_FIELDS.isdisjoint(update_fields)
+    ):
+        return
+    keys = list(Token.objects.filter(user=instance).values_list(
+        'key', flat=True
+    ))
+
+    def forget():
+        for key in keys:
+            token_cache.delete(key)
+    transaction.on_commit(forget)
+
+
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(sender, instance, **kwargs):
+    """
+    Выход через djoser удаляет токен: он сразу перестаёт действовать.
+    Ключ запоминается сразу: после удаления Django обнуляет первичный
+    ключ экземпляра.
+    """
+    key = instance.key
+    transaction.on_commit(lambda: token_cache.delete(key))
@@ -0,0 +1,70 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+
+from foodgram_api.authentication import token_cache
+from foodgram_api.tests.base import PASSWORD, FoodgramTestCase
+from subscriptions_app.models import Subscription
+from users_app.models import User
+
+
+class CachedTokenAuthenticationTests(FoodgramTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user('user')
+        self.client = self.get_client(self.user)
+        self.key = self.client._credentials['HTTP_AUTHORIZATION'].split()[1]
+        response = self.client.get('/api/recipes/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def tearDown(self):
+        token_cache.delete(self.key)
+
+    def test_cache_keeps_no_password_or_profile(self):
+        self.assertEqual(token_cache.get(self.key)[0], self.user.pk)
+        self.assertNotIn(self.user.password, map(str, token_cache.get(
+            self.key
+        )))
+
+    def test_cached_token_needs_no_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/recipes/')
+        self.assertFalse(any(
+            'authtoken_token' in query['sql'] for query in queries
+        ))
+
+    def test_set_password_does_not_write_stale_user(self):
+        User.objects.filter(pk=self.user.pk).update(first_name='Админ')
+        self.create_recipe(self.user)
+        Subscription.objects.create(
+            user=self.create_user('follower'), author=self.user
+        )
+        response = self.client.post(
+            '/api/users/set_password/',
+            {'current_password': PASSWORD, 'new_password': 'New-password-2'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.first_name, 'Админ')
+        self.assertEqual(self.user.recipes_count, 1)
+        self.assertEqual(self.user.followers_count, 1)
+        self.assertTrue(self.user.check_password('New-password-2'))
+
+    def test_profile_is_current(self):
+        User.objects.filter(pk=self.user.pk).update(first_name='Новое')
+        response = self.client.get('/api/users/me/')
+        self.assertEqual(response.data['first_name'], 'Новое')
+
+    def test_deactivation_revokes_cached_token(self):
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        response = self.client.get('/api/users/me/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_logout_revokes_cached_token(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/auth/token/logout/')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        response = self.client.get('/api/users/me/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,50 @@
+from rest_framework import status
+
+from foodgram_api.tests.base import PASSWORD, FoodgramTestCase
+from subscriptions_app.models import Subscription
+from users_app.models import User
+
+
+class UserCountersSaveTests(FoodgramTestCase):
+    """
+    Полное сохранение пользователя не затирает счётчики, которые
+    сигналы меняют отдельными UPDATE.
+    """
+    def setUp(self):
+        super().setUp()
+        self.author = self.create_user('author')
+        self.follower = self.create_user('follower')
+        self.stale_author = User.objects.get(pk=self.author.pk)
+        self.create_recipe(self.author)
+        Subscription.objects.create(user=self.follower, author=self.author)
+
+    def assertCounters(self, recipes, followers):
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.recipes_count, recipes)
+        self.assertEqual(self.author.followers_count, followers)
+
+    def test_save_of_stale_instance_keeps_counters(self):
+        self.stale_author.first_name = 'Новое'
+        self.stale_author.save()
+        self.assertCounters(1, 1)
+        self.assertEqual(self.author.first_name, 'Новое')
+
+    def test_update_fields_with_counters_are_ignored(self):
+        self.stale_author.save(
+            update_fields=('first_name', 'recipes_count', 'followers_count')
+        )
+        self.assertCounters(1, 1)
+
+    def test_set_password_keeps_counters(self):
+        response = self.get_client(self.author).post(
+            '/api/users/set_password/',
+            {'current_password': PASSWORD, 'new_password': 'New-password-2'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertCounters(1, 1)
+        self.assertTrue(self.author.check_password('New-password-2'))
+
+    def test_counters_follow_recipes_and_subscriptions(self):
+        self.author.recipes.get().delete()
+        Subscription.objects.filter(author=self.author).delete()
+        self.assertCounters(0, 0)
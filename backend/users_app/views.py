@@ -0,0 +1,21 @@
+from django.db.models import BooleanField, Exists, OuterRef, Value
+from djoser.views import UserViewSet as DjoserUserViewSet
+
+from subscriptions_app.models import Subscription
+
+
+class UserViewSet(DjoserUserViewSet):
+    """
+    Djoser-вьюсет пользователей. is_subscribed текущего пользователя
+    вычисляется в том же запросе подзапросом Exists.
+    """
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        user = self.request.user
+        if user.is_anonymous:
+            return queryset.annotate(
+                is_subscribed=Value(False, output_field=BooleanField())
+            )
+        return queryset.annotate(is_subscribed=Exists(
+            Subscription.objects.filter(user=user, author=OuterRef('pk'))
+        ))